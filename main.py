@@ -35,7 +35,28 @@ def main(is_run_controller: bool = True) -> MoneySaverApplication:
     app_config = MoneySaverApplicationConfig(
         base_config,
         os.environ["SQL_URL"],
-        {"model_name": "base"},
+        {
+            "backend": "duration-routed",
+            "duration_routed": {
+                "max_duration_seconds": 120,
+                "routes": [
+                    {
+                        "max_duration_seconds": 8,
+                        "recognizer": {
+                            "backend": "openai-whisper",
+                            "openai_whisper": {"model_name": "tiny"},
+                        },
+                    },
+                    {
+                        "max_duration_seconds": 120,
+                        "recognizer": {
+                            "backend": "openai-whisper",
+                            "openai_whisper": {"model_name": "base"},
+                        },
+                    },
+                ],
+            },
+        },
         {
             "access_token_expire_minutes": 300,
             "secret_key": os.environ["SECRET_KEY"],
@@ -2,7 +2,7 @@ from abc import ABC
 from dataclasses import dataclass
 from typing import Type, Union
 
-from linebot import LineBotApi, WebhookHandler
+from linebot import WebhookParser
 from loguru import logger
 from passlib.context import CryptContext
 
@@ -17,24 +17,53 @@ from money_saver_app.controller.external.line.line_controller import (
 )
 from money_saver_app.repository.recorder_repository import (
     ExternalUserRepository,
+    ItemCategoryRejectionRepository,
+    JobRepository,
+    NotificationDeliveryRepository,
+    PipelineCheckpointRepository,
+    ProcessedEventRepository,
+    SchedulerLeaseRepository,
     TransactionRepository,
     UserRepository,
 )
 from money_saver_app.repository.sql_crud_repository import SQLCrudRepository
+from money_saver_app.service.concurrency.concurrency_limiter import ConcurrencyLimiter
+from money_saver_app.service.external.line.line_messaging_client import (
+    LineMessagingClient,
+)
 from money_saver_app.service.external.line.line_notification_service import (
     LineNotificationService,
 )
+from money_saver_app.service.external.line.user_profile_cache import (
+    UserProfileCache,
+)
+from money_saver_app.service.job_queue.durable_job_queue import DurableJobQueue
 from money_saver_app.service.money_saver.auth_service import AuthService
+from money_saver_app.service.money_saver.item_category_memory import ItemCategoryMemory
 from money_saver_app.service.money_saver.money_saver_service import MoneySaverService
 from money_saver_app.service.money_saver.transaction_service import TransactionService
+from money_saver_app.service.money_saver.transaction_view_parser import (
+    TransactionViewParser,
+)
 from money_saver_app.service.money_saver.user_service import UserService
+from money_saver_app.service.observability.structured_logging import configure_logging
+from money_saver_app.service.pipeline_service.pipeline_checkpoint_service import (
+    PipelineCheckpointService,
+)
 from money_saver_app.service.pipeline_service.pipeline_impls.pipeline_factory import (
     TextPipelineFactory,
     VoiceDevelopmentPipelineFactory,
     VoicePipelineFactory,
 )
-from money_saver_app.service.voice_recognizer.voice_recognizer_impl.openai_whisper_voice_recognizer import (
-    OpenAIWhisperVoiceRecognizer,
+from money_saver_app.service.pipeline_service.pipeline_job_service import (
+    PipelineJobService,
+)
+from money_saver_app.service.scheduler.leader_election import LeaderElection
+from money_saver_app.service.voice_recognizer.voice_recognizer_impl.guarded_voice_recognizer import (
+    GuardedVoiceRecognizer,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer_registry import (
+    create_voice_recognizer,
 )
 from smart_base_model.llm.large_language_model_base import LargeLanguageModelBase
 from smart_base_model.llm.llm_impls.openai_large_language_model import OpenAIModel
@@ -48,6 +77,7 @@ class MoneySaverController(ABC):
     auth_service: AuthService
     money_saver_service: MoneySaverService
     transaction_service: TransactionService
+    pipeline_job_service: PipelineJobService
     external_controllers: list[RouterController]
 
     def run(self) -> None: ...
@@ -64,14 +94,30 @@ class MoneySaverApplication:
     def __init__(self, app_config: MoneySaverApplicationConfig) -> None:
         self.base_config = app_config.base_config
         self.app_config = app_config
+        self._handle_logger()
 
         self.llm = self._get_language_model(app_config.base_config)
         logger.info(f"[MODEL SELECTION] Select LLM: {self.llm.get_model_name()}")
 
         self.password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-        self.voice_recognizer = OpenAIWhisperVoiceRecognizer(
-            app_config.openai_whisper_config
+        self.llm_limiter = ConcurrencyLimiter("LLM", app_config.llm_concurrency_config)
+        voice_recognizer_concurrency_config = (
+            app_config.voice_recognizer_concurrency_config
+        )
+        self.voice_recognizer = GuardedVoiceRecognizer(
+            create_voice_recognizer(app_config.voice_recognizer_config),
+            (
+                ConcurrencyLimiter(
+                    app_config.voice_recognizer_config["backend"],
+                    voice_recognizer_concurrency_config,
+                )
+                if voice_recognizer_concurrency_config is not None
+                else None
+            ),
+        )
+        logger.info(
+            f"[MODEL SELECTION] Select voice recognizer: {app_config.voice_recognizer_config['backend']}"
         )
 
         engine = SQLCrudRepository.create_all_tables(app_config.sql_url)
@@ -85,9 +131,23 @@ class MoneySaverApplication:
             self.user_service, self.password_context, app_config.jwt_config
         )
         self.transaction_repo = TransactionRepository(engine)
+        self.item_category_memory = ItemCategoryMemory()
 
         self.transaction_service = TransactionService(
-            engine, self.user_repo, self.transaction_repo
+            engine,
+            self.user_repo,
+            self.transaction_repo,
+            self.item_category_memory,
+            ItemCategoryRejectionRepository(engine),
+        )
+        self.transaction_service.load_item_category_memory_in_background()
+
+        self.transaction_view_parser = TransactionViewParser(
+            self.llm, app_config.transaction_view_parser_config, self.llm_limiter
+        )
+
+        self.pipeline_checkpoint_service = PipelineCheckpointService(
+            PipelineCheckpointRepository(engine), app_config.pipeline_checkpoint_config
         )
 
         self.voice_pipeline_factory = VoicePipelineFactory()
@@ -100,40 +160,77 @@ class MoneySaverApplication:
             self.user_service,
             self.transaction_service,
             self.llm,
+            self.transaction_view_parser,
             self.voice_recognizer,
+            self.pipeline_checkpoint_service,
+            ProcessedEventRepository(engine),
+        )
+
+        self.pipeline_job_service = PipelineJobService(
+            self.money_saver_service, app_config.pipeline_job_config
         )
 
-        self.webhook_handler = WebhookHandler(
-            self.app_config.line_service_config.channel_secret
+        line_service_config = self.app_config.line_service_config
+        self.webhook_parser = WebhookParser(line_service_config.channel_secret)
+        self.line_client = LineMessagingClient(
+            line_service_config.channel_access_token,
+            line_service_config.api_base_url,
+            line_service_config.data_api_base_url,
+            line_service_config.max_connections,
+            line_service_config.timeout_seconds,
+            line_service_config.max_retries,
+            line_service_config.retry_backoff_seconds,
         )
-        self.line_bot_api = LineBotApi(
-            self.app_config.line_service_config.channel_access_token
+        self.user_profile_cache = UserProfileCache(
+            self.line_client,
+            line_service_config.profile_cache_ttl_seconds,
+            line_service_config.profile_cache_max_stale_seconds,
+            line_service_config.profile_cache_max_entries,
         )
         self.line_message_context = BehaviorSubject[MessageContext[Union[str, bytes]]]()
+        self.line_job_queue = DurableJobQueue(
+            "line", JobRepository(engine), app_config.line_job_queue_config
+        )
 
         self.external_service_controllers: list[RouterController] = [
             LineServiceRouteController(
                 self.voice_recognizer,
                 self.llm,
+                self.llm_limiter,
                 "/api/public/line",
                 self.transaction_service,
                 self.money_saver_service,
                 self.user_service,
-                self.line_bot_api,
-                self.webhook_handler,
+                self.line_client,
+                self.user_profile_cache,
+                self.webhook_parser,
                 self.line_message_context,
+                self.line_job_queue,
             )
         ]
+        # handlers are registered by the controllers, so jobs left from a previous run are only picked up now
+        self.line_job_queue.start()
 
         self.line_notification_service = LineNotificationService(
-            self.line_bot_api, self.user_service, self.transaction_service
+            self.line_client,
+            self.user_service,
+            self.transaction_service,
+            NotificationDeliveryRepository(engine),
+            line_service_config.push_concurrency,
+            line_service_config.push_rate_per_second,
+            line_service_config.push_burst,
+            app_config.digest_slot_config,
+            LeaderElection(
+                "notify_all_users_with_self_transactions",
+                SchedulerLeaseRepository(engine),
+                app_config.scheduler_leader_election_config,
+            ),
         )
 
-        self._handle_logger()
         self.line_notification_service.schedule_auto_push_notification()
 
     def _handle_logger(self) -> None:
-        logger.add("./log/server.log", rotation="1 day", retention="1 month")
+        configure_logging(self.app_config.logging_config)
 
     def _get_language_model(
         self, base_config: BaseApplicationConfig
@@ -152,11 +249,25 @@ class MoneySaverApplication:
         raise Exception("[NO MODEL CONFIG PROVIDED] Failed to create language model")
 
     def run_controller(self, controller_cls: Type[MoneySaverController]) -> None:
-        controller_cls(
-            self.app_config,
-            self.user_service,
-            self.auth_service,
-            self.money_saver_service,
-            self.transaction_service,
-            self.external_service_controllers,
-        ).run()
+        try:
+            controller_cls(
+                self.app_config,
+                self.user_service,
+                self.auth_service,
+                self.money_saver_service,
+                self.transaction_service,
+                self.pipeline_job_service,
+                self.external_service_controllers,
+            ).run()
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """
+        Drains the in-flight LINE jobs before releasing the LINE client and the voice recognizer.
+        """
+        self.line_notification_service.stop_auto_push_notification()
+        self.line_job_queue.shutdown()
+        self.pipeline_job_service.shutdown()
+        self.line_client.close()
+        self.voice_recognizer.shutdown()
@@ -1,10 +1,34 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+from typing import Optional
 
 from application.application_config import BaseApplicationConfig
+from money_saver_app.controller.core.upload_utils import AudioUploadConfig
+from money_saver_app.service.concurrency.bounded_executor import BoundedExecutorConfig
+from money_saver_app.service.concurrency.concurrency_limiter import (
+    ConcurrencyLimitConfig,
+)
+from money_saver_app.service.job_queue.durable_job_queue import DurableJobQueueConfig
 from money_saver_app.service.money_saver.auth_service import JwtConfig
-from money_saver_app.service.voice_recognizer.voice_recognizer_impl.openai_whisper_voice_recognizer import (
-    OpenAIWhisperConfig,
+from money_saver_app.service.money_saver.transaction_view_parser import (
+    TransactionViewParserConfig,
+)
+from money_saver_app.service.observability.structured_logging import LoggingConfig
+from money_saver_app.service.pipeline_service.pipeline_checkpoint_service import (
+    PipelineCheckpointConfig,
+)
+from money_saver_app.service.pipeline_service.pipeline_job_service import (
+    PipelineJobConfig,
+)
+from money_saver_app.service.scheduler.delivery_slot_scheduler import (
+    DeliverySlotConfig,
+)
+from money_saver_app.service.scheduler.leader_election import LeaderElectionConfig
+from money_saver_app.service.voice_recognizer.streaming_transcriber import (
+    StreamingTranscriptionConfig,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer_registry import (
+    VoiceRecognizerConfig,
 )
 
 
@@ -12,12 +36,98 @@ from money_saver_app.service.voice_recognizer.voice_recognizer_impl.openai_whisp
 class LineServiceConfig:
     channel_access_token: str
     channel_secret: str
+    api_base_url: str = "https://api.line.me"
+    data_api_base_url: str = "https://api-data.line.me"
+    max_connections: int = 32
+    timeout_seconds: float = 10
+    max_retries: int = 3
+    retry_backoff_seconds: float = 0.5
+    profile_cache_ttl_seconds: float = 60 * 60
+    profile_cache_max_stale_seconds: float = 60 * 60 * 24
+    profile_cache_max_entries: int = 10000
+    push_concurrency: int = 32
+    push_rate_per_second: float = 1000
+    push_burst: int = 100
 
 
 @dataclass
 class MoneySaverApplicationConfig:
     base_config: BaseApplicationConfig
     sql_url: str
-    openai_whisper_config: OpenAIWhisperConfig
+    voice_recognizer_config: VoiceRecognizerConfig
     jwt_config: JwtConfig
     line_service_config: LineServiceConfig
+    transaction_view_parser_config: TransactionViewParserConfig = field(
+        default_factory=lambda: TransactionViewParserConfig(
+            max_batch_size=8, max_wait_ms=50
+        )
+    )
+    llm_concurrency_config: ConcurrencyLimitConfig = field(
+        default_factory=lambda: ConcurrencyLimitConfig(
+            max_concurrency=8, queue_timeout_seconds=10
+        )
+    )
+    # Only needed for backends without their own bounded queue; the Whisper worker pool admits
+    # `num_workers + max_queue_size` jobs itself.
+    voice_recognizer_concurrency_config: Optional[ConcurrencyLimitConfig] = None
+    pipeline_checkpoint_config: PipelineCheckpointConfig = field(
+        default_factory=lambda: PipelineCheckpointConfig(
+            ttl_seconds=60 * 60 * 24, max_attempts=2, retry_backoff_seconds=1
+        )
+    )
+    audio_upload_config: AudioUploadConfig = field(
+        default_factory=lambda: AudioUploadConfig(
+            max_bytes=10 * 1024 * 1024,
+            spool_memory_bytes=1024 * 1024,
+            chunk_size=64 * 1024,
+        )
+    )
+    pipeline_job_config: PipelineJobConfig = field(
+        default_factory=lambda: PipelineJobConfig(
+            executor=BoundedExecutorConfig(
+                max_workers=4, max_queue_size=32, shutdown_timeout_seconds=30
+            ),
+            max_jobs_per_user=2,
+            result_ttl_seconds=60 * 10,
+        )
+    )
+    line_job_queue_config: DurableJobQueueConfig = field(
+        default_factory=lambda: DurableJobQueueConfig(
+            num_workers=8,
+            lease_seconds=60,
+            poll_interval_seconds=1,
+            max_attempts=5,
+            retry_backoff_seconds=2,
+            max_retry_backoff_seconds=300,
+            shutdown_timeout_seconds=30,
+            # ~1 minute of backlog for 8 workers, LINE reply tokens do not last much longer
+            max_pending_jobs=200,
+        )
+    )
+    # 00:00 - 02:00 in Taipei, 24 slots of 5 minutes
+    digest_slot_config: DeliverySlotConfig = field(
+        default_factory=lambda: DeliverySlotConfig(
+            window_start_utc="16:00", window_minutes=120, num_slots=24
+        )
+    )
+    scheduler_leader_election_config: LeaderElectionConfig = field(
+        default_factory=lambda: LeaderElectionConfig(
+            lease_seconds=30, renew_interval_seconds=10
+        )
+    )
+    # SQL statements are logged once the sql level is lowered to INFO, 10% of the LINE info/debug lines are kept
+    logging_config: LoggingConfig = field(
+        default_factory=lambda: LoggingConfig(
+            level="INFO",
+            file_path="./log/server.log",
+            rotation="1 day",
+            retention="1 month",
+            category_levels={"sql": "WARNING", "line": "INFO", "pipeline": "INFO"},
+            sample_rates={"line": 0.1},
+        )
+    )
+    streaming_transcription_config: StreamingTranscriptionConfig = field(
+        default_factory=lambda: StreamingTranscriptionConfig(
+            partial_interval_seconds=1, window_seconds=10, max_duration_seconds=120
+        )
+    )
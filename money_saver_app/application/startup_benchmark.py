@@ -0,0 +1,98 @@
+"""
+Measures how long a fresh server process takes to accept requests and to become ready for voice, by polling `GET /ready`.
+
+The server command is started with the current environment (the same variables as `main.py`), e.g.
+
+    python -m money_saver_app.application.startup_benchmark --command "python main.py" --url http://localhost:8000/ready --runs 3
+
+`serving_seconds` is the time until `/ready` first answers, `voice_ready_seconds` until it reports `voice_ready`.
+Before the Whisper workers were warmed in the background both were the same, since the server only bound its port after the models loaded.
+"""
+
+import argparse
+import json
+import shlex
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Optional
+
+import numpy as np
+
+
+def _poll_readiness(url: str) -> Optional[dict[str, Any]]:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None
+
+
+def measure_startup(
+    command: list[str],
+    url: str,
+    timeout_seconds: float,
+    poll_interval_seconds: float = 0.1,
+) -> dict[str, Optional[float]]:
+    started_at = time.monotonic()
+    process = subprocess.Popen(command)
+    serving_seconds: Optional[float] = None
+    voice_ready_seconds: Optional[float] = None
+    try:
+        while time.monotonic() - started_at < timeout_seconds:
+            if process.poll() is not None:
+                raise RuntimeError(
+                    f"[BENCHMARK] Server exited with {process.returncode} before it was ready"
+                )
+            optional_readiness = _poll_readiness(url)
+            elapsed_seconds = time.monotonic() - started_at
+            if optional_readiness is not None:
+                if serving_seconds is None:
+                    serving_seconds = elapsed_seconds
+                if optional_readiness.get("voice_ready"):
+                    voice_ready_seconds = elapsed_seconds
+                    break
+            time.sleep(poll_interval_seconds)
+    finally:
+        process.terminate()
+        process.wait()
+    return {
+        "serving_seconds": serving_seconds,
+        "voice_ready_seconds": voice_ready_seconds,
+    }
+
+
+def _summarize(values: list[Optional[float]]) -> Optional[dict[str, Any]]:
+    measured = [value for value in values if value is not None]
+    if not measured:
+        return None
+    return {
+        "runs": len(measured),
+        "p50_seconds": float(np.percentile(measured, 50)),
+        "max_seconds": max(measured),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--command", default="python main.py")
+    parser.add_argument("--url", default="http://localhost:8000/ready")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    runs = [
+        measure_startup(shlex.split(args.command), args.url, args.timeout)
+        for _ in range(args.runs)
+    ]
+    report = {
+        "runs": runs,
+        "serving": _summarize([run["serving_seconds"] for run in runs]),
+        "voice_ready": _summarize([run["voice_ready_seconds"] for run in runs]),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
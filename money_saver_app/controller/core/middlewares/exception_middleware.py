@@ -5,7 +5,10 @@ from fastapi import Request
 from fastapi.responses import JSONResponse
 from loguru import logger
 
-from money_saver_app.service.money_saver.error_code import ErrorCodeWithError
+from money_saver_app.service.money_saver.error_code import (
+    ErrorCodeWithError,
+    ResumablePipelineError,
+)
 
 
 class ExceptionMiddleware:
@@ -17,8 +20,11 @@ class ExceptionMiddleware:
             return await call_next(request)
         except ErrorCodeWithError as error_with_code:
             logger.exception(error_with_code)
+            content = {"detail": str(error_with_code), "timestamp": utc_time}
+            if isinstance(error_with_code, ResumablePipelineError):
+                content["run_id"] = str(error_with_code.run_id)
             return JSONResponse(
-                content={"detail": str(error_with_code), "timestamp": utc_time},
+                content=content,
                 status_code=error_with_code.ERROR_CODE,
             )
         except Exception as base_exception:
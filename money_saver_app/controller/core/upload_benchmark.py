@@ -0,0 +1,122 @@
+"""
+Measures the peak RSS of reading audio uploads fully into memory against spooling them with `spool_upload_file`.
+
+Each mode runs in a fresh spawned process. `--uploads` uploads of `--size-mb` MB are read concurrently and every buffer is
+held until all of them have been read, as with requests in flight at the same time. As in the web server, every
+`UploadFile` is backed by a file that the multipart parser already spooled, so only the read itself is measured. The
+spooled mode uses the application's `audio_upload_config`, with `max_bytes` raised to the upload size if needed.
+
+    python -m money_saver_app.controller.core.upload_benchmark --size-mb 10 --uploads 8
+"""
+
+import argparse
+import dataclasses
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Union, cast
+
+from fastapi import UploadFile
+
+from money_saver_app.application.money_saver_application_config import (
+    MoneySaverApplicationConfig,
+)
+from money_saver_app.controller.core.upload_utils import (
+    AudioUploadConfig,
+    spool_upload_file,
+)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _audio_upload_config(size_bytes: int) -> AudioUploadConfig:
+    (config_field,) = [
+        field
+        for field in dataclasses.fields(MoneySaverApplicationConfig)
+        if field.name == "audio_upload_config"
+    ]
+    config = cast(Callable[[], AudioUploadConfig], config_field.default_factory)()
+    config["max_bytes"] = max(config["max_bytes"], size_bytes)
+    return config
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _write_upload(directory: str, size_bytes: int) -> str:
+    path = os.path.join(directory, "upload.bin")
+    with open(path, "wb") as file:
+        for offset in range(0, size_bytes, CHUNK_SIZE):
+            file.write(os.urandom(min(CHUNK_SIZE, size_bytes - offset)))
+    return path
+
+
+def _read_upload(
+    mode: str, upload_file: UploadFile, config: AudioUploadConfig
+) -> Union[bytes, BinaryIO]:
+    if mode == "in-memory":
+        return upload_file.file.read()
+    return spool_upload_file(upload_file, config)
+
+
+def run_upload_benchmark(mode: str, size_bytes: int, num_uploads: int) -> dict[str, Any]:
+    config = _audio_upload_config(size_bytes)
+    with tempfile.TemporaryDirectory() as directory:
+        path = _write_upload(directory, size_bytes)
+        baseline_rss_mb = _peak_rss_mb()
+        all_read = threading.Barrier(num_uploads)
+
+        def upload() -> None:
+            with open(path, "rb") as file:
+                upload_file = UploadFile(file, size=size_bytes, filename="upload.bin")
+                audio = _read_upload(mode, upload_file, config)
+                all_read.wait()
+                if not isinstance(audio, bytes):
+                    audio.close()
+
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(num_uploads) as executor:
+            for future in [executor.submit(upload) for _ in range(num_uploads)]:
+                future.result()
+        elapsed_seconds = time.perf_counter() - started_at
+
+    peak_rss_mb = _peak_rss_mb()
+    return {
+        "mode": mode,
+        "upload_mb": size_bytes / 1024 / 1024,
+        "uploads": num_uploads,
+        "spool_memory_mb": config["spool_memory_bytes"] / 1024 / 1024,
+        "elapsed_seconds": elapsed_seconds,
+        "baseline_rss_mb": baseline_rss_mb,
+        "peak_rss_mb": peak_rss_mb,
+        "peak_rss_increase_mb": peak_rss_mb - baseline_rss_mb,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-mb", type=float, default=10)
+    parser.add_argument("--uploads", type=int, default=8)
+    args = parser.parse_args()
+
+    size_bytes = int(args.size_mb * 1024 * 1024)
+    # one process per mode, so that the peak RSS of one mode is not carried into the other
+    context = multiprocessing.get_context("spawn")
+    reports = []
+    for mode in ("in-memory", "spooled"):
+        with context.Pool(1) as pool:
+            reports.append(
+                pool.apply(run_upload_benchmark, (mode, size_bytes, args.uploads))
+            )
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import tempfile
+from typing import BinaryIO, TypedDict
+
+from fastapi import UploadFile
+
+from money_saver_app.service.money_saver.error_code import AudioTooLargeError
+
+
+class AudioUploadConfig(TypedDict):
+    max_bytes: int
+    spool_memory_bytes: int
+    chunk_size: int
+
+
+def spool_upload_file(upload_file: UploadFile, config: AudioUploadConfig) -> BinaryIO:
+    """
+    Streams an uploaded file in chunks into a spooled buffer, which stays in memory up to `spool_memory_bytes`
+    and rolls over to a temp file beyond it. Raises `AudioTooLargeError` as soon as `max_bytes` is exceeded.
+    The returned buffer is rewound and owned by the caller.
+    """
+    max_bytes = config["max_bytes"]
+    if upload_file.size is not None and upload_file.size > max_bytes:
+        raise AudioTooLargeError(max_bytes)
+
+    buffer = tempfile.SpooledTemporaryFile(max_size=config["spool_memory_bytes"])
+    total_bytes = 0
+    while chunk := upload_file.file.read(config["chunk_size"]):
+        total_bytes += len(chunk)
+        if total_bytes > max_bytes:
+            buffer.close()
+            raise AudioTooLargeError(max_bytes)
+        buffer.write(chunk)
+
+    buffer.seek(0)
+    return buffer  # type: ignore
@@ -1,9 +1,22 @@
+import asyncio
 from dataclasses import dataclass
-from typing import Annotated, Iterable
+from typing import Any, AsyncIterator, Iterable, Optional, Union
+from uuid import UUID
 
 import uvicorn
-from fastapi import Depends, FastAPI, File
+from fastapi import (
+    Depends,
+    FastAPI,
+    Query,
+    Response,
+    UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from loguru import logger
 from pydantic import BaseModel
 
@@ -16,11 +29,29 @@ from money_saver_app.controller.core.middlewares.exception_middleware import (
 )
 from money_saver_app.controller.core.router_controller import RouterController
 from money_saver_app.controller.core.transaction_controller import TransactionController
+from money_saver_app.controller.core.upload_utils import spool_upload_file
 from money_saver_app.controller.core.user_controller import UserController
+from money_saver_app.service.money_saver.error_code import (
+    ErrorCodeWithError,
+    ResumablePipelineError,
+)
+from money_saver_app.service.observability.structured_logging import (
+    LogCategory,
+    category_logger,
+)
 from money_saver_app.service.pipeline_service.pipeline_impls.voice_pipeline_step import (
     MoneySaverPipelineContext,
     VoicePipelineContext,
 )
+from money_saver_app.service.pipeline_service.pipeline_job_service import (
+    PipelineJobStatus,
+    PipelineJobView,
+)
+from money_saver_app.service.voice_recognizer.streaming_transcriber import (
+    StreamingTranscriber,
+)
+
+pipeline_logger = category_logger(LogCategory.Pipeline)
 
 
 class TextPipelineRequest(BaseModel):
@@ -43,9 +74,17 @@ class VoiceMoneySaverWebController(MoneySaverController, RouterController):
     - A root route that returns a welcome message.
     - Registering the `UserController` with the `/api/admin` prefix.
 
+    `POST /api/save-record-from-audio?async=true` answers `202` with a pipeline job right away, the job is then polled with
+    `GET /api/jobs/{job_id}` or followed with the server-sent events of `GET /api/jobs/{job_id}/events`.
+
+    The `/api/ws/save-record-from-stream` WebSocket accepts binary 16 kHz mono PCM16 chunks followed by an `end` text message,
+    pushes `partial` transcripts while the audio is still arriving, then the `final` transcript and the saved `transactions`.
+
     The `run` method starts the FastAPI application using the `uvicorn` server, listening on `0.0.0.0:8000`.
     """
 
+    SSE_KEEP_ALIVE_SECONDS = 15
+
     def __post_init__(self) -> None:
         self.app = FastAPI()
         self.register_routes()
@@ -60,7 +99,7 @@ class VoiceMoneySaverWebController(MoneySaverController, RouterController):
         self.register_middlewares()
 
     def register_middlewares(self) -> None:
-        exclueded_routes = ["/api/public", "/openapi.json", "/docs"]
+        exclueded_routes = ["/api/public", "/openapi.json", "/docs", "/ready"]
         middlewares = [
             ExceptionMiddleware(),
             AuthMiddleware(self.auth_service, exclueded_routes),
@@ -73,18 +112,61 @@ class VoiceMoneySaverWebController(MoneySaverController, RouterController):
         def read_root():
             return {"message": "Welcome to Money Saver API"}
 
+        @self.app.get("/ready")
+        def read_readiness() -> dict[str, bool]:
+            return {
+                "serving": True,
+                "voice_ready": self.money_saver_service.voice_recognizer.is_ready(),
+            }
+
         @self.app.post("/api/save-record-from-audio")
         def save_record_from_audio(
-            audio_file: Annotated[bytes, File()],
+            audio_file: UploadFile,
+            response: Response,
+            is_async: bool = Query(False, alias="async"),
             current_user_id: int = Depends(get_current_user_id),
-        ) -> VoicePipelineContext:
+        ) -> Union[VoicePipelineContext, PipelineJobView]:
             logger.info(f"[PIPELINE EXECUTION] User ID: {current_user_id}")
-            context = self.money_saver_service.execute_voice_pipeline(
-                audio_file, current_user_id
+            if is_async:
+                # the job owns the spooled audio from here on
+                job = self.pipeline_job_service.submit_voice_job(
+                    spool_upload_file(audio_file, self.app_config.audio_upload_config),
+                    current_user_id,
+                )
+                response.status_code = status.HTTP_202_ACCEPTED
+                return job
+
+            with spool_upload_file(
+                audio_file, self.app_config.audio_upload_config
+            ) as audio_buffer:
+                context = self.money_saver_service.execute_voice_pipeline(
+                    audio_buffer, current_user_id
+                )
+            pipeline_logger.opt(lazy=True).debug(
+                "[PIPELINE FINAL CONTEXT] Context: {}", context.model_dump
             )
-            logger.info(f"[PIPELINE FINAL CONTEXT] Context: {context.model_dump()}")
             return context
 
+        @self.app.get("/api/jobs/{job_id}")
+        def get_pipeline_job(
+            job_id: UUID,
+            current_user_id: int = Depends(get_current_user_id),
+        ) -> PipelineJobView:
+            return self.pipeline_job_service.get_job(job_id, current_user_id)
+
+        @self.app.get("/api/jobs/{job_id}/events")
+        def stream_pipeline_job_events(
+            job_id: UUID,
+            current_user_id: int = Depends(get_current_user_id),
+        ) -> StreamingResponse:
+            # fails with 404 before the stream starts
+            self.pipeline_job_service.get_job(job_id, current_user_id)
+            return StreamingResponse(
+                self._stream_job_events(job_id, current_user_id),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache"},
+            )
+
         @self.app.post("/api/save-record-from-text")
         def save_record_from_text(
             text_pipeline_context: TextPipelineRequest,
@@ -94,9 +176,52 @@ class VoiceMoneySaverWebController(MoneySaverController, RouterController):
             context = self.money_saver_service.execute_text_pipeline(
                 text_pipeline_context.source_text, current_user_id
             )
-            logger.info(f"[PIPELINE FINAL CONTEXT] Context: {context.model_dump()}")
+            pipeline_logger.opt(lazy=True).debug(
+                "[PIPELINE FINAL CONTEXT] Context: {}", context.model_dump
+            )
+            return context
+
+        @self.app.post("/api/pipeline-runs/{run_id}/resume")
+        def resume_pipeline_run(
+            run_id: UUID,
+            current_user_id: int = Depends(get_current_user_id),
+        ) -> MoneySaverPipelineContext:
+            logger.info(f"[PIPELINE RESUME] User ID: {current_user_id}, Run ID: {run_id}")
+            context = self.money_saver_service.resume_pipeline(run_id, current_user_id)
+            pipeline_logger.opt(lazy=True).debug(
+                "[PIPELINE FINAL CONTEXT] Context: {}", context.model_dump
+            )
             return context
 
+        @self.app.websocket("/api/ws/save-record-from-stream")
+        async def save_record_from_stream(websocket: WebSocket) -> None:
+            optional_jwt = websocket.cookies.get(AuthMiddleware.COOKIE_NAME)
+            optional_jwt_user = (
+                await run_in_threadpool(
+                    self.auth_service.get_jwt_user_from_jwt, optional_jwt
+                )
+                if optional_jwt is not None
+                else None
+            )
+            if optional_jwt_user is None:
+                await websocket.close(code=1008, reason="Please login first")
+                return
+
+            await websocket.accept()
+            await self._stream_record(websocket, optional_jwt_user["id"])
+
+        @self.app.get("/api/private/admin/voice-recognizer/metrics")
+        def get_voice_recognizer_metrics(
+            current_user_id: int = Depends(get_current_user_id),
+        ) -> dict[str, Any]:
+            return self.money_saver_service.voice_recognizer.get_metrics()
+
+        @self.app.get("/api/private/admin/pipeline-jobs/metrics")
+        def get_pipeline_job_metrics(
+            current_user_id: int = Depends(get_current_user_id),
+        ) -> dict[str, Any]:
+            return self.pipeline_job_service.get_metrics()
+
         self.route_controllers: Iterable[RouterController] = [
             AuthController("/api/public/auth", self.auth_service, self.user_service),
             UserController("/api/private/admin", self.user_service),
@@ -109,5 +234,84 @@ class VoiceMoneySaverWebController(MoneySaverController, RouterController):
             logger.info(f"[ROUTER REGISTRATION] Router: {router.prefix}")
             self.app.include_router(router)
 
+    async def _stream_job_events(
+        self, job_id: UUID, user_id: int
+    ) -> AsyncIterator[str]:
+        last_status: Optional[PipelineJobStatus] = None
+        while True:
+            job = await self.pipeline_job_service.wait_for_update(
+                job_id, user_id, last_status, self.SSE_KEEP_ALIVE_SECONDS
+            )
+            if job.status == last_status:
+                yield ": keep-alive\n\n"
+                continue
+            last_status = job.status
+            yield f"event: {job.status.value}\ndata: {job.model_dump_json()}\n\n"
+            if job.is_finished:
+                return
+
+    async def _stream_record(self, websocket: WebSocket, user_id: int) -> None:
+        transcriber = StreamingTranscriber(
+            self.money_saver_service.voice_recognizer,
+            self.app_config.streaming_transcription_config,
+        )
+        partial_task: Optional[asyncio.Task] = None
+
+        async def emit_partial() -> None:
+            try:
+                text = await run_in_threadpool(transcriber.transcribe_partial)
+            except ErrorCodeWithError as error:
+                logger.warning(f"[STREAMING TRANSCRIPTION] Partial skipped: {error}")
+                return
+            await websocket.send_json({"type": "partial", "text": text})
+
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                if message.get("text") == "end":
+                    break
+                if message.get("bytes") is None:
+                    continue
+                transcriber.append(message["bytes"])
+                is_idle = partial_task is None or partial_task.done()
+                if is_idle and transcriber.should_emit_partial():
+                    partial_task = asyncio.create_task(emit_partial())
+
+            if partial_task is not None:
+                await partial_task
+            final_text = await run_in_threadpool(transcriber.finish)
+            await websocket.send_json({"type": "final", "text": final_text})
+
+            context = await run_in_threadpool(
+                self.money_saver_service.execute_text_pipeline, final_text, user_id
+            )
+            pipeline_logger.opt(lazy=True).debug(
+                "[PIPELINE FINAL CONTEXT] Context: {}", context.model_dump
+            )
+            await websocket.send_json(
+                {
+                    "type": "transactions",
+                    "run_id": str(context.run_id),
+                    "transaction_reads": [
+                        transaction_read.model_dump(mode="json")
+                        for transaction_read in context.transaction_reads
+                    ],
+                }
+            )
+        except WebSocketDisconnect:
+            logger.info(f"[STREAMING TRANSCRIPTION] User {user_id} disconnected")
+            if partial_task is not None:
+                partial_task.cancel()
+            return
+        except ErrorCodeWithError as error:
+            logger.exception(error)
+            content = {"type": "error", "detail": str(error)}
+            if isinstance(error, ResumablePipelineError):
+                content["run_id"] = str(error.run_id)
+            await websocket.send_json(content)
+        await websocket.close()
+
     def run(self) -> None:
         uvicorn.run(app=self.app, host="0.0.0.0", port=8000)
@@ -1,28 +1,46 @@
-import datetime
+import json
+import uuid
+from concurrent.futures import Future
 from enum import Enum
 from typing import Any, Callable, Optional, Union, cast
 from uuid import UUID
 
 from fastapi import APIRouter, Request
-from linebot import LineBotApi, WebhookHandler
+from fastapi.concurrency import run_in_threadpool
+from linebot import WebhookParser
 from linebot.exceptions import InvalidSignatureError
-from linebot.models.events import MessageEvent, PostbackEvent
+from linebot.models.events import Event, MessageEvent, PostbackEvent
 from linebot.models.messages import AudioMessage, TextMessage
-from loguru import logger
 from openai import BaseModel
 
 from money_saver_app.controller.core.router_controller import RouterController
+from money_saver_app.service.concurrency.concurrency_limiter import ConcurrencyLimiter
+from money_saver_app.service.concurrency.single_flight import SingleFlight
 from money_saver_app.repository.models import TransactionRead
+from money_saver_app.service.external.line.line_messaging_client import (
+    LineApiError,
+    LineMessagingClient,
+)
 from money_saver_app.service.external.line.line_models import (
     LineButtonTemplate,
+    LineCarouselColumn,
+    LineCarouselTemplate,
     LinePostBackAction,
     LineSendMessage,
+    LineSendMessages,
     LineTemplateSendMessage,
     LineTextSendMessage,
     MessageContext,
-    UserProfile,
 )
-from money_saver_app.service.money_saver.error_code import ErrorCodeWithError
+from money_saver_app.service.external.line.user_profile_cache import (
+    UserProfileCache,
+)
+from money_saver_app.service.job_queue.durable_job_queue import DurableJobQueue
+from money_saver_app.service.money_saver.error_code import (
+    BackendOverloadedError,
+    ErrorCodeWithError,
+    ResumablePipelineError,
+)
 from money_saver_app.service.money_saver.money_saver_service import MoneySaverService
 from money_saver_app.service.money_saver.transaction_service import TransactionService
 from money_saver_app.service.money_saver.user_service import UserService
@@ -35,128 +53,235 @@ from money_saver_app.service.pipeline_service.pipeline_impls.voice_pipeline_step
     MoneySaverPipelineContext,
 )
 from money_saver_app.service.voice_recognizer.voice_recognizer import VoiceRecognizer
-from money_saver_app.utils import threaded
+from money_saver_app.service.observability.structured_logging import (
+    LogCategory,
+    category_logger,
+)
 from smart_base_model.llm.large_language_model_base import LargeLanguageModelBase
 from smart_base_model.messaging.behavior_subject import BehaviorSubject
 
+logger = category_logger(LogCategory.Line)
+
 
 class TransactionOperationType(Enum):
     AddTransaction = "AddTransaction"
     DeleteTransaction = "DeleteTransaction"
+    RetryPipeline = "RetryPipeline"
 
 
 class TransactionActionView(BaseModel):
     operation_type: TransactionOperationType
     transaction_id: Optional[UUID] = None
+    is_recalled: bool = False
+    run_id: Optional[UUID] = None
+
+
+class LineJobKind(Enum):
+    MessageEvent = "LineMessageEvent"
+    PostbackEvent = "LinePostbackEvent"
 
 
 class LineServiceRouteController(RouterController):
+    """
+    Webhook events are persisted in the `job_queue` and acknowledged right away, the queue workers then handle them
+    synchronously. Since a job may run after its reply token expired (a retry or a restart), replies fall back to a push message.
+    Message jobs are idempotent: the LINE message id is recorded together with the transactions it produced, and a
+    message that was already recorded (a LINE redelivery, or a retry after a crash past the commit) is skipped.
+    """
+
+    MAX_CAROUSEL_COLUMNS = 10
+    MAX_REPLY_MESSAGES = 5
+
     def __init__(
         self,
         voice_recognizer: VoiceRecognizer,
         model_llm: LargeLanguageModelBase,
+        llm_limiter: ConcurrencyLimiter,
         router_prefix: str,
         transaction_service: TransactionService,
         money_saver_service: MoneySaverService,
         user_servcie: UserService,
-        line_bot_api: LineBotApi,
-        webhook_handler: WebhookHandler,
+        line_client: LineMessagingClient,
+        user_profile_cache: UserProfileCache,
+        webhook_parser: WebhookParser,
         message_context_subject: BehaviorSubject[MessageContext[Union[str, bytes]]],
+        job_queue: DurableJobQueue,
     ) -> None:
         self.voice_recognizer = voice_recognizer
         self.llm = model_llm
+        self.llm_limiter = llm_limiter
+        self.action_single_flight = SingleFlight[Optional[AssistantActionView]](
+            "assistant-action"
+        )
         self.transaction_service = transaction_service
         self.money_saver_service = money_saver_service
         self.user_servcie = user_servcie
         self.router_prefix = router_prefix
         self.router = APIRouter(prefix=self.router_prefix)
-        # 必須放上自己的Channel Access Token
-        self.line_bot_api = line_bot_api
+        self.line_client = line_client
+        self.user_profile_cache = user_profile_cache
         # 必須放上自己的Channel Secret
-        self.handler = webhook_handler
+        self.webhook_parser = webhook_parser
         self.message_context_subject = message_context_subject
+        self.job_queue = job_queue
 
-        self.message_context_subject.subscribe(self._handle_line_audio_message)
-        self.message_context_subject.subscribe(self._handle_line_text_message)
+        self.message_context_subject.subscribe(self._handle_line_message)
+        self.job_queue.register_handler(
+            LineJobKind.MessageEvent.value, self._handle_message_job
+        )
+        self.job_queue.register_handler(
+            LineJobKind.PostbackEvent.value, self._handle_postback_job
+        )
 
     def register_routes(self) -> APIRouter:
         @self.router.post("/callback")
         async def callback(request: Request):
             # get X-Line-Signature header value
             signature = request.headers["X-Line-Signature"]
-            logger.info(signature)
 
-            # get request body as text
+            # get request body as text, only its size is logged
             body = await request.body()
             body_text = body.decode("utf-8")
-            logger.info(body_text)
+            logger.debug("[LINE WEBHOOK] Received {} bytes", len(body))
 
-            # handle webhook body
+            # parse webhook body, the events are persisted and handled by the job queue so that the webhook acks right away
             try:
-                self.handler.handle(body_text, signature)
+                events = self.webhook_parser.parse(body_text, signature)
             except InvalidSignatureError:
                 logger.critical(
                     "Invalid signature. Please check your channel access token/channel secret."
                 )
+                return "OK"
 
+            jobs = self._create_jobs(events)
+            try:
+                await run_in_threadpool(self.job_queue.enqueue, jobs)
+            except BackendOverloadedError as error:
+                # still acknowledged, so that LINE does not redeliver into the overloaded queue
+                self._reply_busy(events, error)
             return "OK"
 
-        @self.handler.add(MessageEvent, message=TextMessage)
-        def handle_text_message(event: MessageEvent):
-            user_profile = UserProfile.model_validate(
-                self.line_bot_api.get_profile(event.source.user_id).as_json_dict()
-            )
-            logger.info(
-                f"[LINE MESSAGE] User {user_profile} Message: {event.message.text}"
-            )
+        return self.router
 
-            def reply_message_wrapper(message: LineSendMessage) -> None:
-                self.line_bot_api.reply_message(event.reply_token, message)
+    def _reply_busy(self, events: list[Event], error: BackendOverloadedError) -> None:
+        for event in events:
+            if isinstance(event, (MessageEvent, PostbackEvent)):
+                self.line_client.submit(
+                    self.line_client.reply_message(
+                        event.reply_token, LineTextSendMessage(text=str(error))
+                    )
+                ).add_done_callback(self._log_reply_failure)
 
-            self.message_context_subject.next(
-                MessageContext(
-                    user_profile=user_profile,
-                    message_content=event.message.text,
-                    reply_message=reply_message_wrapper,
-                )
+    async def _reply_or_push_message(
+        self, reply_token: str, line_user_id: str, message: LineSendMessages
+    ) -> None:
+        try:
+            await self.line_client.reply_message(reply_token, message)
+        except LineApiError as error:
+            # 400: the reply token expired or was already used by a previous attempt of the job
+            if error.status != 400:
+                raise
+            logger.warning(
+                f"[LINE REPLY] Reply token rejected, push to {line_user_id} instead: {error}"
             )
+            await self.line_client.push_message(line_user_id, message)
 
-        @self.handler.add(MessageEvent, message=AudioMessage)
-        def handle_audio_message(event: MessageEvent):
-            user_profile = UserProfile.model_validate(
-                self.line_bot_api.get_profile(event.source.user_id).as_json_dict()
-            )
-            audio_binary = self.line_bot_api.get_message_content(
-                event.message.id
-            ).content
+    def _create_reply_message_wrapper(
+        self, reply_token: str, line_user_id: str
+    ) -> Callable[[LineSendMessages], None]:
+        # never waits for the reply, so it is safe to call from the LINE client loop as well
+        def reply_message_wrapper(message: LineSendMessages) -> None:
+            self.line_client.submit(
+                self._reply_or_push_message(reply_token, line_user_id, message)
+            ).add_done_callback(self._log_reply_failure)
+
+        return reply_message_wrapper
+
+    def _log_reply_failure(self, future: Future) -> None:
+        optional_error = future.exception()
+        if optional_error is not None:
+            logger.error(f"[LINE REPLY] Failed to reply: {optional_error}")
 
+    def _handle_line_message(
+        self, message_context: MessageContext[Union[str, bytes]]
+    ) -> None:
+        if isinstance(message_context.message_content, str):
+            self._handle_line_text_message(message_context)
+        else:
+            self._handle_line_audio_message(message_context)
+
+    def _create_jobs(self, events: list[Event]) -> list[tuple[str, str]]:
+        jobs: list[tuple[str, str]] = []
+        for event in events:
+            if isinstance(event, MessageEvent) and isinstance(
+                event.message, (TextMessage, AudioMessage)
+            ):
+                jobs.append((LineJobKind.MessageEvent.value, event.as_json_string()))
+            elif isinstance(event, PostbackEvent):
+                jobs.append((LineJobKind.PostbackEvent.value, event.as_json_string()))
+        return jobs
+
+    @staticmethod
+    def _message_event_id(event: MessageEvent) -> UUID:
+        # the message id stays the same across webhook redeliveries
+        return uuid.uuid5(uuid.NAMESPACE_URL, f"line/message/{event.message.id}")
+
+    def _handle_message_job(self, payload: str) -> None:
+        event = MessageEvent.new_from_json_dict(json.loads(payload))
+        event_id = self._message_event_id(event)
+        if self.money_saver_service.is_event_processed(event_id):
             logger.info(
-                f"[LINE MESSAGE] User: {user_profile} Audio Message: {event.message}"
+                f"[LINE MESSAGE] Message {event.message.id} was already processed, skipping"
             )
+            return
+        self._handle_message_event(event, event_id)
 
-            def reply_message_wrapper(message: LineSendMessage) -> None:
-                self.line_bot_api.reply_message(event.reply_token, message)
+    def _handle_postback_job(self, payload: str) -> None:
+        self._handle_postback_event(
+            PostbackEvent.new_from_json_dict(json.loads(payload))
+        )
 
-            self.message_context_subject.next(
-                MessageContext(
-                    user_profile=user_profile,
-                    message_content=audio_binary,
-                    reply_message=reply_message_wrapper,
-                )
+    def _handle_message_event(self, event: MessageEvent, event_id: UUID) -> None:
+        line_user_id = event.source.user_id
+        # the profile is only informative, it must not delay the message
+        optional_user_profile = self.user_profile_cache.get(line_user_id)
+        message_content: Union[str, bytes]
+        if isinstance(event.message, TextMessage):
+            message_content = event.message.text
+            logger.info(
+                f"[LINE MESSAGE] User {optional_user_profile or line_user_id} Message: {message_content}"
             )
-
-        @self.handler.add(PostbackEvent)
-        def handle_postback_message(event: PostbackEvent):
-            transaction_action_view = TransactionActionView.model_validate_json(
-                cast(str, event.postback.data)
+        else:
+            message_content = self.line_client.submit(
+                self.line_client.get_message_content(event.message.id)
+            ).result()
+            logger.info(
+                f"[LINE MESSAGE] User: {optional_user_profile or line_user_id} Audio Message: {event.message}"
             )
 
-            def reply_message_wrapper(message: LineSendMessage) -> None:
-                self.line_bot_api.reply_message(event.reply_token, message)
-
-            self._handle_action_view(transaction_action_view, reply_message_wrapper)
+        self.message_context_subject.next(
+            MessageContext(
+                line_user_id=line_user_id,
+                user_profile=optional_user_profile,
+                message_content=message_content,
+                reply_message=self._create_reply_message_wrapper(
+                    event.reply_token, line_user_id
+                ),
+                event_id=event_id,
+            )
+        )
 
-        return self.router
+    def _handle_postback_event(self, event: PostbackEvent) -> None:
+        transaction_action_view = TransactionActionView.model_validate_json(
+            cast(str, event.postback.data)
+        )
+        self._handle_action_view(
+            transaction_action_view,
+            event.source.user_id,
+            self._create_reply_message_wrapper(
+                event.reply_token, event.source.user_id
+            ),
+        )
 
     def __format_transaction_read(self, read: TransactionRead) -> str:
         transaction_category_lookup: dict[TransactionType, str] = {
@@ -169,8 +294,19 @@ class LineServiceRouteController(RouterController):
     def _handle_action_view(
         self,
         transaction_action_view: TransactionActionView,
-        reply_message: Callable[[LineSendMessage], Any],
+        line_user_id: str,
+        reply_message: Callable[[LineSendMessages], Any],
     ) -> None:
+        if (
+            transaction_action_view.operation_type
+            == TransactionOperationType.RetryPipeline
+            and transaction_action_view.run_id is not None
+        ):
+            self._handle_line_pipeline_retry(
+                transaction_action_view.run_id, line_user_id, reply_message
+            )
+            return
+
         if transaction_action_view.transaction_id is None:
             return
 
@@ -194,6 +330,11 @@ class LineServiceRouteController(RouterController):
             logger.info(
                 f"[TRANSACTION DELETION] Transaction with id {transaction_action_view.transaction_id} deleted."
             )
+            if is_deleted and transaction_action_view.is_recalled:
+                user = self.user_servcie.register_line_user(line_user_id)
+                self.transaction_service.forget_item_category(
+                    user.id, optional_transaction_read.item.name
+                )
             reply_message(LineTextSendMessage(text=f"已刪除該交易"))
             return
 
@@ -207,47 +348,139 @@ class LineServiceRouteController(RouterController):
                 )
             )
 
-    def __handle_execute_text_pipeline(
-        self, source_text: str, user_id: int
+    def __handle_execute_pipeline(
+        self,
+        source_text: str,
+        user_id: int,
+        event_id: Optional[UUID],
+        voice_audio: Optional[bytes],
     ) -> MoneySaverPipelineContext:
-        pipeline_context = self.money_saver_service.execute_text_pipeline(
-            source_text, user_id=user_id
+        pipeline_context: MoneySaverPipelineContext
+        if voice_audio is None:
+            pipeline_context = self.money_saver_service.execute_text_pipeline(
+                source_text, user_id=user_id, event_id=event_id
+            )
+        else:
+            # the voice pipeline starts from the transcript, and transcribes the audio again with a bigger model if it cannot be parsed
+            pipeline_context = self.money_saver_service.execute_voice_pipeline(
+                voice_audio, user_id, event_id=event_id, source_text=source_text
+            )
+        logger.opt(lazy=True).debug(
+            "[PIPELINE FINISHED CONTEXT] {}", pipeline_context.model_dump
         )
-        logger.info(f"[PIPELINE FINISHED CONTEXT] {pipeline_context}")
         return pipeline_context
 
     def _create_template_message_for_pipeline_context(
         self, context: MoneySaverPipelineContext
-    ) -> Optional[LineTemplateSendMessage]:
-        if context.transaction_read is None:
+    ) -> Optional[list[LineSendMessage]]:
+        """
+        A carousel holds at most `MAX_CAROUSEL_COLUMNS` columns and a reply at most `MAX_REPLY_MESSAGES` messages,
+        so the transactions are split over several carousels and only the ones beyond both limits are left out.
+        """
+        if not context.transaction_reads:
             return
 
-        delete_action = TransactionActionView(
-            operation_type=TransactionOperationType.DeleteTransaction,
-            transaction_id=context.transaction_read.id,
-        ).model_dump_json()
+        max_transactions = self.MAX_CAROUSEL_COLUMNS * self.MAX_REPLY_MESSAGES
+        if len(context.transaction_reads) > max_transactions:
+            logger.warning(
+                f"[LINE MESSAGE] {len(context.transaction_reads)} transactions exceed reply limit, only the first {max_transactions} are listed"
+            )
+
+        transaction_reads = context.transaction_reads[:max_transactions]
+        return [
+            self._create_carousel_message(
+                transaction_reads[offset : offset + self.MAX_CAROUSEL_COLUMNS],
+                context.is_recalled,
+            )
+            for offset in range(0, len(transaction_reads), self.MAX_CAROUSEL_COLUMNS)
+        ]
+
+    def _create_carousel_message(
+        self, transaction_reads: list[TransactionRead], is_recalled: bool
+    ) -> LineTemplateSendMessage:
+        columns: list[LineCarouselColumn] = []
+        for transaction_read in transaction_reads:
+            delete_action = TransactionActionView(
+                operation_type=TransactionOperationType.DeleteTransaction,
+                transaction_id=transaction_read.id,
+                is_recalled=is_recalled,
+            ).model_dump_json()
+            columns.append(
+                LineCarouselColumn(
+                    title="是否刪除此筆交易？ (如確認無誤，請略過此訊息)",
+                    text=self.__format_transaction_read(transaction_read)[:60],
+                    actions=[
+                        LinePostBackAction(
+                            label="取消", display_text="確定取消", data=delete_action
+                        ),
+                    ],
+                )
+            )
 
-        add_action = TransactionActionView(
-            operation_type=TransactionOperationType.AddTransaction,
-            transaction_id=context.transaction_read.id,
+        return LineTemplateSendMessage(
+            alt_text="\n".join(
+                self.__format_transaction_read(transaction_read)
+                for transaction_read in transaction_reads
+            )[:400],
+            template=LineCarouselTemplate(columns=columns),
+        )
+
+    def _create_retry_template_message(
+        self, error: ResumablePipelineError
+    ) -> LineTemplateSendMessage:
+        retry_action = TransactionActionView(
+            operation_type=TransactionOperationType.RetryPipeline,
+            run_id=error.run_id,
         ).model_dump_json()
 
         return LineTemplateSendMessage(
-            alt_text="Confirm for adding transaction",
+            alt_text="Retry for adding transaction",
             template=LineButtonTemplate(
-                title="是否刪除此筆交易？ (如確認無誤，請略過此訊息)",
-                text=self.__format_transaction_read(context.transaction_read),
+                title="交易紀錄失敗",
+                text=str(error)[:60],
                 actions=[
                     LinePostBackAction(
-                        label="取消", display_text="確定取消", data=delete_action
+                        label="重試", display_text="重試", data=retry_action
                     ),
                 ],
             ),
         )
 
+    def _create_reply_message_for_error(
+        self, error: ErrorCodeWithError
+    ) -> LineSendMessage:
+        if isinstance(error, ResumablePipelineError):
+            return self._create_retry_template_message(error)
+        return LineTextSendMessage(str(error))
+
+    def _handle_line_pipeline_retry(
+        self,
+        run_id: UUID,
+        line_user_id: str,
+        reply_message: Callable[[LineSendMessages], Any],
+    ) -> None:
+        user = self.user_servcie.register_line_user(line_user_id)
+        try:
+            context = self.money_saver_service.resume_pipeline(run_id, user.id)
+        except ErrorCodeWithError as error:
+            reply_message(self._create_reply_message_for_error(error))
+            return
+
+        optional_message = self._create_template_message_for_pipeline_context(context)
+        if optional_message is not None:
+            reply_message(optional_message)
+
+    def __ask_assistant_action(self, text_message: str) -> Optional[AssistantActionView]:
+        with self.llm_limiter.acquire():
+            return AssistantActionView.model_ask(text_message, self.llm)
+
     def __handle_text_message_with_reply_message(
-        self, text_message: str, line_user_id: str
-    ) -> Optional[LineSendMessage]:
+        self,
+        text_message: str,
+        line_user_id: str,
+        event_id: Optional[UUID],
+        voice_audio: Optional[bytes] = None,
+    ) -> Optional[LineSendMessages]:
         logger.info(
             f"[RECEIVING LINE MESSAGE] User ID: {line_user_id}, Message: {text_message}"
         )
@@ -255,13 +488,23 @@ class LineServiceRouteController(RouterController):
         user = self.user_servcie.register_line_user(line_user_id)
         logger.info(f"[LINE USER] {user}")
 
-        action = AssistantActionView.model_ask(text_message, self.llm)
+        if self.transaction_service.item_category_memory.recall(user.id, text_message):
+            logger.info(f"[ITEM CATEGORY MEMORY] Recalled item for message: {text_message}")
+            action = AssistantActionView(action_type=AssistantActionType.AddTransaction)
+        else:
+            try:
+                action = self.action_single_flight.do(
+                    SingleFlight.hash_key(text_message),
+                    lambda: self.__ask_assistant_action(text_message),
+                )
+            except ErrorCodeWithError as error:
+                return LineTextSendMessage(str(error))
         if action is None:
             logger.warning(f"[INVALID ACTION] {action}")
             return
 
         logger.info(f"[LINE MESSAGE ACTION] {action}")
-        message: Optional[LineSendMessage] = None
+        message: Optional[LineSendMessages] = None
         match action.action_type:
             case AssistantActionType.Unclear:
                 message = LineTextSendMessage(
@@ -270,11 +513,14 @@ class LineServiceRouteController(RouterController):
                 return message
             case AssistantActionType.AddTransaction:
                 try:
-                    context = self.__handle_execute_text_pipeline(
-                        source_text=text_message, user_id=cast(int, user.id)
+                    context = self.__handle_execute_pipeline(
+                        source_text=text_message,
+                        user_id=cast(int, user.id),
+                        event_id=event_id,
+                        voice_audio=voice_audio,
                     )
                 except ErrorCodeWithError as error:
-                    message = LineTextSendMessage(str(error))
+                    message = self._create_reply_message_for_error(error)
                     return message
 
                 message = self._create_template_message_for_pipeline_context(context)
@@ -287,7 +533,6 @@ class LineServiceRouteController(RouterController):
                 logger.info(f"[LINE MESSAGE RESPONSE] {message}")
                 return message
 
-    @threaded
     def _handle_line_text_message(
         self, message_context: MessageContext[Union[str, bytes]]
     ) -> None:
@@ -295,23 +540,32 @@ class LineServiceRouteController(RouterController):
             return
         user_message = message_context.message_content
         reply_message = self.__handle_text_message_with_reply_message(
-            user_message, message_context.user_profile.user_id
+            user_message, message_context.line_user_id, message_context.event_id
         )
         if reply_message is None:
             return
 
         message_context.reply_message(reply_message)
 
-    @threaded
     def _handle_line_audio_message(
         self, message_context: MessageContext[Union[str, bytes]]
     ) -> None:
         if not isinstance(message_context.message_content, bytes):
             return
 
-        user_message = self.voice_recognizer.recognize(message_context.message_content)
+        try:
+            user_message = self.voice_recognizer.recognize(
+                message_context.message_content
+            )
+        except ErrorCodeWithError as error:
+            message_context.reply_message(LineTextSendMessage(str(error)))
+            return
+
         reply_message = self.__handle_text_message_with_reply_message(
-            user_message, message_context.user_profile.user_id
+            user_message,
+            message_context.line_user_id,
+            message_context.event_id,
+            voice_audio=message_context.message_content,
         )
         if reply_message is None:
             return
@@ -155,3 +155,129 @@ class Transaction(SQLModel, table=True):
                 item_category=self.item.item_category,
             )
         )
+
+
+class PipelineCheckpoint(SQLModel, table=True):
+    """
+    Persists the outputs of the completed steps of a failed pipeline run, so that a retry resumes from the failed step.
+    """
+
+    __tablename__: str = "pipeline_checkpoint"
+
+    id: UUID = Field(primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    source_text: Optional[str] = None
+    views_json: Optional[str] = None
+    failed_step: str
+    attempts: int = 0
+    expires_at: datetime.datetime = Field(
+        sa_column=Column(DateTime(timezone=True), index=True, nullable=False)
+    )
+    created_at: datetime.datetime = Field(
+        default_factory=lambda: datetime.datetime.now(datetime.timezone.utc),
+    )
+
+
+class ItemCategoryRejection(SQLModel, table=True):
+    """
+    Negative feedback on an item recalled from the item category memory: history recorded before `rejected_at` is
+    ignored for this user and (normalized) item name when the memory is rebuilt.
+    """
+
+    __tablename__: str = "item_category_rejection"
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    item_name: str
+    rejected_at: datetime.datetime = Field(
+        default_factory=lambda: datetime.datetime.now(datetime.timezone.utc),
+    )
+
+
+class JobStatus(str, Enum):
+    Pending = "Pending"
+    Running = "Running"
+    Dead = "Dead"
+
+
+class Job(SQLModel, table=True):
+    """
+    A unit of background work (e.g. a LINE webhook event) persisted in the app DB so that it survives restarts.
+    Workers claim a job by taking a lease on it, succeeded jobs are deleted and poison jobs end up `Dead`.
+    """
+
+    __tablename__: str = "job"
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    queue: str = Field(index=True)
+    kind: str
+    payload: str
+    status: JobStatus = Field(default=JobStatus.Pending, index=True)
+    attempts: int = 0
+    available_at: datetime.datetime = Field(
+        default_factory=lambda: datetime.datetime.now(datetime.timezone.utc),
+        sa_column=Column(DateTime(timezone=True), index=True, nullable=False),
+    )
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime.datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+    last_error: Optional[str] = None
+    created_at: datetime.datetime = Field(
+        default_factory=lambda: datetime.datetime.now(datetime.timezone.utc),
+    )
+
+
+class DeliveryStatus(str, Enum):
+    Delivered = "Delivered"
+    Failed = "Failed"
+
+
+class NotificationDelivery(SQLModel, table=True):
+    """
+    The delivery status of a notification job run (`job_name`, `run_key`) for one user, so that a rerun of the job
+    skips the users who already received the message. The id is derived from those three values.
+    """
+
+    __tablename__: str = "notification_delivery"
+
+    id: UUID = Field(primary_key=True)
+    job_name: str = Field(index=True)
+    run_key: str = Field(index=True)
+    user_id: int = Field(foreign_key="user.id")
+    status: DeliveryStatus
+    last_error: Optional[str] = None
+    updated_at: datetime.datetime = Field(
+        default_factory=lambda: datetime.datetime.now(datetime.timezone.utc),
+    )
+
+
+class SchedulerLease(SQLModel, table=True):
+    """
+    The lease of a scheduled job (e.g. the daily digest) shared by all replicas, only the `owner` of an unexpired lease
+    runs the job. `fencing_token` is incremented every time the lease changes hands, so a deposed owner can detect it.
+    """
+
+    __tablename__: str = "scheduler_lease"
+
+    name: str = Field(primary_key=True)
+    owner: str
+    fencing_token: int = 1
+    expires_at: datetime.datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+
+
+class ProcessedEvent(SQLModel, table=True):
+    """
+    Marks an inbound event (e.g. a LINE message) whose transactions were saved. The row is written in the same
+    DB transaction as the transactions, so a redelivered or retried event is recognized and never saved twice.
+    The id is derived from the event's source and id.
+    """
+
+    __tablename__: str = "processed_event"
+
+    id: UUID = Field(primary_key=True)
+    processed_at: datetime.datetime = Field(
+        default_factory=lambda: datetime.datetime.now(datetime.timezone.utc),
+    )
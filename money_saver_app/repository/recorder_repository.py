@@ -1,17 +1,28 @@
 import datetime
-from typing import Optional
+from typing import Iterator, Optional
 from uuid import UUID
 
-from sqlmodel import col, select
+from sqlalchemy import and_, delete, func, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, col, select
 
 from money_saver_app.repository.models import (
+    DeliveryStatus,
     ExternalUser,
+    ItemCategoryRejection,
+    Job,
+    JobStatus,
+    NotificationDelivery,
+    PipelineCheckpoint,
     Platform,
+    ProcessedEvent,
+    SchedulerLease,
     Transaction,
     TransactionItem,
     User,
 )
 from money_saver_app.repository.sql_crud_repository import SQLCrudRepository
+from money_saver_app.service.money_saver.view_model_common import TransactionType
 
 
 class ExternalUserRepository(SQLCrudRepository[int, ExternalUser]):
@@ -73,5 +84,408 @@ class TransactionRepository(SQLCrudRepository[UUID, Transaction]):
             .order_by(col(Transaction.created_at).asc())
         )
 
+    def iterate_all_item_histories(
+        self, batch_size: int = 1000
+    ) -> Iterator[tuple[int, str, TransactionType, str, str, datetime.datetime]]:
+        """
+        Streams `(user_id, item name, transaction_type, item_category, description, created_at)` rows in chronological order.
+        """
+        statement = (
+            select(
+                Transaction.user_id,
+                TransactionItem.name,
+                Transaction.transaction_type,
+                TransactionItem.item_category,
+                TransactionItem.description,
+                Transaction.created_at,
+            )
+            .join(TransactionItem, col(Transaction.item_id) == col(TransactionItem.id))
+            .order_by(col(Transaction.created_at).asc())
+            .execution_options(yield_per=batch_size)
+        )
+        with self._create_session() as session:
+            yield from session.exec(statement)
+
 
 class TransactionItemRepository(SQLCrudRepository[int, TransactionItem]): ...
+
+
+class ItemCategoryRejectionRepository(SQLCrudRepository[UUID, ItemCategoryRejection]):
+    def find_latest_rejections(self) -> dict[tuple[int, str], datetime.datetime]:
+        """
+        The latest rejection time of every `(user_id, item_name)`.
+        """
+        with self._create_session() as session:
+            rows = session.exec(
+                select(
+                    ItemCategoryRejection.user_id,
+                    ItemCategoryRejection.item_name,
+                    func.max(ItemCategoryRejection.rejected_at),
+                ).group_by(
+                    col(ItemCategoryRejection.user_id),
+                    col(ItemCategoryRejection.item_name),
+                )
+            )
+            return {(user_id, item_name): rejected_at for user_id, item_name, rejected_at in rows}
+
+
+class PipelineCheckpointRepository(SQLCrudRepository[UUID, PipelineCheckpoint]):
+    def merge(self, checkpoint: PipelineCheckpoint) -> PipelineCheckpoint:
+        with self._create_session() as session:
+            merged_checkpoint = session.merge(checkpoint)
+            session.commit()
+            return merged_checkpoint
+
+    def claim(self, session: Session, id: UUID) -> bool:
+        """
+        Deletes the checkpoint in the caller's transaction, False when another resume of the run already deleted it.
+        """
+        result = session.execute(
+            delete(PipelineCheckpoint).where(col(PipelineCheckpoint.id) == id)
+        )
+        return result.rowcount == 1
+
+    def find_unexpired_checkpoint_by_id(
+        self, id: UUID, now: datetime.datetime
+    ) -> Optional[PipelineCheckpoint]:
+        return self._find_by(
+            select(PipelineCheckpoint).where(
+                PipelineCheckpoint.id == id, PipelineCheckpoint.expires_at > now
+            )
+        )
+
+    def delete_all_expired(self, now: datetime.datetime) -> int:
+        with self._create_session() as session:
+            result = session.execute(
+                delete(PipelineCheckpoint).where(
+                    col(PipelineCheckpoint.expires_at) <= now
+                )
+            )
+            session.commit()
+            return result.rowcount
+
+
+class JobRepository(SQLCrudRepository[UUID, Job]):
+    """
+    Claims jobs with leases: on Postgres candidates are locked with `FOR UPDATE SKIP LOCKED`, so concurrent workers
+    never wait on each other; on other databases (SQLite) each candidate is claimed with a compare-and-set `UPDATE`
+    that only succeeds if the job is still claimable. Completing or failing a job requires still holding its lease.
+    A job whose lease expired after `max_attempts` claims (its worker died every time, e.g. killed by the OOM killer)
+    is never claimed again, `bury_expired` moves it to `Dead`.
+    """
+
+    def _is_lease_expired(self, queue: str, now: datetime.datetime):
+        return and_(
+            col(Job.queue) == queue,
+            col(Job.status) == JobStatus.Running,
+            col(Job.lease_expires_at) < now,
+        )
+
+    def _is_claimable(self, queue: str, now: datetime.datetime, max_attempts: int):
+        return or_(
+            and_(
+                col(Job.queue) == queue,
+                col(Job.status) == JobStatus.Pending,
+                col(Job.available_at) <= now,
+            ),
+            and_(
+                self._is_lease_expired(queue, now),
+                col(Job.attempts) < max_attempts,
+            ),
+        )
+
+    def _lease_values(
+        self, worker_id: str, lease_expires_at: datetime.datetime
+    ) -> dict:
+        return {
+            "status": JobStatus.Running,
+            "lease_owner": worker_id,
+            "lease_expires_at": lease_expires_at,
+            "attempts": col(Job.attempts) + 1,
+        }
+
+    def claim(
+        self,
+        queue: str,
+        worker_id: str,
+        now: datetime.datetime,
+        lease_expires_at: datetime.datetime,
+        max_attempts: int,
+        limit: int = 1,
+    ) -> list[Job]:
+        candidates = (
+            select(Job.id)
+            .where(self._is_claimable(queue, now, max_attempts))
+            .order_by(col(Job.available_at))
+            .limit(limit)
+        )
+        with self._create_session() as session:
+            if self.engine.dialect.name == "postgresql":
+                ids = list(session.exec(candidates.with_for_update(skip_locked=True)))
+                if ids:
+                    session.execute(
+                        update(Job)
+                        .where(col(Job.id).in_(ids))
+                        .values(**self._lease_values(worker_id, lease_expires_at))
+                        .execution_options(synchronize_session=False)
+                    )
+            else:
+                ids = []
+                for id in list(session.exec(candidates)):
+                    result = session.execute(
+                        update(Job)
+                        .where(
+                            col(Job.id) == id,
+                            self._is_claimable(queue, now, max_attempts),
+                        )
+                        .values(**self._lease_values(worker_id, lease_expires_at))
+                        .execution_options(synchronize_session=False)
+                    )
+                    if result.rowcount == 1:
+                        ids.append(id)
+            session.commit()
+            if not ids:
+                return []
+            return list(session.exec(select(Job).where(col(Job.id).in_(ids))))
+
+    def _update_leased(self, id: UUID, worker_id: str, **values) -> bool:
+        with self._create_session() as session:
+            result = session.execute(
+                update(Job)
+                .where(
+                    col(Job.id) == id,
+                    col(Job.status) == JobStatus.Running,
+                    col(Job.lease_owner) == worker_id,
+                )
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return result.rowcount == 1
+
+    def extend_lease(
+        self, id: UUID, worker_id: str, lease_expires_at: datetime.datetime
+    ) -> bool:
+        return self._update_leased(id, worker_id, lease_expires_at=lease_expires_at)
+
+    def reschedule(
+        self,
+        id: UUID,
+        worker_id: str,
+        available_at: datetime.datetime,
+        last_error: str,
+    ) -> bool:
+        return self._update_leased(
+            id,
+            worker_id,
+            status=JobStatus.Pending,
+            available_at=available_at,
+            lease_owner=None,
+            lease_expires_at=None,
+            last_error=last_error,
+        )
+
+    def bury(self, id: UUID, worker_id: str, last_error: str) -> bool:
+        return self._update_leased(
+            id,
+            worker_id,
+            status=JobStatus.Dead,
+            lease_owner=None,
+            lease_expires_at=None,
+            last_error=last_error,
+        )
+
+    def bury_expired(
+        self, queue: str, now: datetime.datetime, max_attempts: int
+    ) -> int:
+        with self._create_session() as session:
+            result = session.execute(
+                update(Job)
+                .where(
+                    self._is_lease_expired(queue, now),
+                    col(Job.attempts) >= max_attempts,
+                )
+                .values(
+                    status=JobStatus.Dead,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    last_error="Lease expired on every attempt",
+                )
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return result.rowcount
+
+    def complete(self, id: UUID, worker_id: str) -> bool:
+        with self._create_session() as session:
+            result = session.execute(
+                delete(Job).where(
+                    col(Job.id) == id,
+                    col(Job.status) == JobStatus.Running,
+                    col(Job.lease_owner) == worker_id,
+                )
+            )
+            session.commit()
+            return result.rowcount == 1
+
+    def count_unfinished(self, queue: str) -> int:
+        with self._create_session() as session:
+            return session.exec(
+                select(func.count())
+                .select_from(Job)
+                .where(
+                    col(Job.queue) == queue,
+                    col(Job.status).in_([JobStatus.Pending, JobStatus.Running]),
+                )
+            ).one()
+
+    def count_by_status(self, queue: str) -> dict[JobStatus, int]:
+        with self._create_session() as session:
+            rows = session.exec(
+                select(Job.status, func.count())
+                .where(col(Job.queue) == queue)
+                .group_by(col(Job.status))
+            )
+            return {status: count for status, count in rows}
+
+
+class NotificationDeliveryRepository(SQLCrudRepository[UUID, NotificationDelivery]):
+    def merge(
+        self,
+        delivery: NotificationDelivery,
+        lease_name: str,
+        fencing_token: int,
+        now: datetime.datetime,
+    ) -> Optional[NotificationDelivery]:
+        """
+        Writes the delivery only while `fencing_token` still holds the unexpired lease `lease_name`, None when it is stale.
+
+        The lease row is read with a shared lock in the same transaction, so a takeover waits until the write commits.
+        """
+        with self._create_session() as session:
+            lease = session.exec(
+                select(SchedulerLease)
+                .where(
+                    SchedulerLease.name == lease_name,
+                    SchedulerLease.fencing_token == fencing_token,
+                    SchedulerLease.expires_at > now,
+                )
+                .with_for_update(read=True)
+            ).first()
+            if lease is None:
+                return None
+            merged_delivery = session.merge(delivery)
+            session.commit()
+            return merged_delivery
+
+    def find_delivered_user_ids(self, job_name: str, run_key: str) -> set[int]:
+        with self._create_session() as session:
+            return set(
+                session.exec(
+                    select(NotificationDelivery.user_id).where(
+                        NotificationDelivery.job_name == job_name,
+                        NotificationDelivery.run_key == run_key,
+                        NotificationDelivery.status == DeliveryStatus.Delivered,
+                    )
+                )
+            )
+
+
+class SchedulerLeaseRepository(SQLCrudRepository[str, SchedulerLease]):
+    """
+    Every method is a single compare-and-set statement, so concurrent replicas never both hold an unexpired lease.
+    """
+
+    def try_acquire(
+        self,
+        name: str,
+        owner: str,
+        now: datetime.datetime,
+        expires_at: datetime.datetime,
+    ) -> Optional[int]:
+        """
+        Takes over the lease when it is missing or expired and returns the new fencing token, None when another owner holds it.
+        """
+        with self._create_session() as session:
+            result = session.execute(
+                update(SchedulerLease)
+                .where(
+                    col(SchedulerLease.name) == name,
+                    col(SchedulerLease.expires_at) <= now,
+                )
+                .values(
+                    owner=owner,
+                    fencing_token=col(SchedulerLease.fencing_token) + 1,
+                    expires_at=expires_at,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                session.add(SchedulerLease(name=name, owner=owner, expires_at=expires_at))
+            try:
+                session.commit()
+            except IntegrityError:
+                # the lease exists and is held by someone else, or another replica inserted it first
+                return None
+            return session.exec(
+                select(SchedulerLease.fencing_token).where(
+                    SchedulerLease.name == name, SchedulerLease.owner == owner
+                )
+            ).first()
+
+    def renew(
+        self,
+        name: str,
+        owner: str,
+        fencing_token: int,
+        expires_at: datetime.datetime,
+    ) -> bool:
+        with self._create_session() as session:
+            result = session.execute(
+                update(SchedulerLease)
+                .where(
+                    col(SchedulerLease.name) == name,
+                    col(SchedulerLease.owner) == owner,
+                    col(SchedulerLease.fencing_token) == fencing_token,
+                )
+                .values(expires_at=expires_at)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return result.rowcount == 1
+
+    def is_current(self, name: str, fencing_token: int, now: datetime.datetime) -> bool:
+        return (
+            self._find_by(
+                select(SchedulerLease).where(
+                    SchedulerLease.name == name,
+                    SchedulerLease.fencing_token == fencing_token,
+                    SchedulerLease.expires_at > now,
+                )
+            )
+            is not None
+        )
+
+    def release(self, name: str, owner: str, fencing_token: int) -> bool:
+        """
+        Expires the lease right away so that another replica takes over without waiting for it to run out.
+        """
+        with self._create_session() as session:
+            result = session.execute(
+                update(SchedulerLease)
+                .where(
+                    col(SchedulerLease.name) == name,
+                    col(SchedulerLease.owner) == owner,
+                    col(SchedulerLease.fencing_token) == fencing_token,
+                )
+                .values(expires_at=datetime.datetime.now(datetime.timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return result.rowcount == 1
+
+
+class ProcessedEventRepository(SQLCrudRepository[UUID, ProcessedEvent]):
+    def exists(self, id: UUID) -> bool:
+        with self._create_session() as session:
+            return session.get(ProcessedEvent, id) is not None
@@ -1,4 +1,5 @@
 from typing import (
+    Any,
     Callable,
     Generic,
     Iterable,
@@ -12,7 +13,7 @@ from typing import (
 from uuid import UUID
 
 from loguru import logger
-from sqlalchemy import Engine, Select, create_engine
+from sqlalchemy import Engine, Select, create_engine, event
 from sqlmodel import Session, SQLModel, select
 from sqlmodel.sql.expression import Select, SelectOfScalar
 
@@ -24,6 +25,13 @@ class SQLConnectionParam(TypedDict):
     url: str
 
 
+def _enable_sqlite_foreign_keys(dbapi_connection: Any, _: Any) -> None:
+    # SQLite only enforces foreign keys on connections that ask for it
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
 class SQLCrudRepository(Generic[ID, T]):
     def __init__(self, engine: Engine) -> None:
         self.engine = engine
@@ -32,8 +40,10 @@ class SQLCrudRepository(Generic[ID, T]):
     @classmethod
     def create_all_tables(cls, url: str) -> Engine:
         engine = create_engine(
-            url, echo=True, json_serializer=lambda model: model.model_dump_json()
+            url, echo=False, json_serializer=lambda model: model.model_dump_json()
         )
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _enable_sqlite_foreign_keys)
         SQLModel.metadata.create_all(engine)
         return engine
 
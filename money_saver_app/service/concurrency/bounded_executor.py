@@ -0,0 +1,117 @@
+import concurrent.futures
+import threading
+import time
+from typing import Any, Callable, TypedDict, TypeVar
+
+from loguru import logger
+
+from money_saver_app.service.money_saver.error_code import BackendOverloadedError
+
+T = TypeVar("T")
+
+
+class BoundedExecutorConfig(TypedDict):
+    max_workers: int
+    max_queue_size: int
+    shutdown_timeout_seconds: float
+
+
+class BoundedExecutor:
+    """
+    A thread pool of `max_workers` threads accepting at most `max_queue_size` waiting tasks on top of the running ones.
+
+    `submit` never blocks: once the pool is saturated, the task is shed with a `BackendOverloadedError` so that the
+    caller can tell the user to retry instead of piling up threads. `shutdown` stops accepting tasks and drains the
+    running and queued ones for up to `shutdown_timeout_seconds`. Metrics report the time tasks spent waiting in the queue.
+    """
+
+    def __init__(self, name: str, config: BoundedExecutorConfig) -> None:
+        self.name = name
+        self.config = config
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=config["max_workers"], thread_name_prefix=name
+        )
+        self._slots = threading.BoundedSemaphore(
+            config["max_workers"] + config["max_queue_size"]
+        )
+        self._lock = threading.Lock()
+        self._in_flight: set[concurrent.futures.Future] = set()
+        self._is_shutdown = False
+        self._submitted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    def _run(
+        self, func: Callable[..., T], submitted_at: float, *args: Any, **kwargs: Any
+    ) -> T:
+        wait_seconds = time.monotonic() - submitted_at
+        with self._lock:
+            self._total_wait_seconds += wait_seconds
+            self._max_wait_seconds = max(self._max_wait_seconds, wait_seconds)
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            logger.exception(error)
+            with self._lock:
+                self._failed += 1
+            raise
+        with self._lock:
+            self._completed += 1
+        return result
+
+    def _on_done(self, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            self._in_flight.discard(future)
+        self._slots.release()
+
+    def submit(
+        self, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> concurrent.futures.Future[T]:
+        if self._is_shutdown or not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            logger.warning(f"[BOUNDED EXECUTOR] {self.name} is saturated, shedding task")
+            raise BackendOverloadedError(self.name)
+
+        future = self._executor.submit(
+            self._run, func, time.monotonic(), *args, **kwargs
+        )
+        with self._lock:
+            self._submitted += 1
+            self._in_flight.add(future)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self._lock:
+            started = self._completed + self._failed
+            return {
+                "name": self.name,
+                "max_workers": self.config["max_workers"],
+                "max_queue_size": self.config["max_queue_size"],
+                "in_flight": len(self._in_flight),
+                "submitted": self._submitted,
+                "rejected": self._rejected,
+                "completed": self._completed,
+                "failed": self._failed,
+                "average_queue_wait_seconds": self._total_wait_seconds
+                / max(1, started),
+                "max_queue_wait_seconds": self._max_wait_seconds,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._is_shutdown = True
+            in_flight = list(self._in_flight)
+        logger.info(f"[BOUNDED EXECUTOR] {self.name} draining {len(in_flight)} tasks")
+        _, not_done = concurrent.futures.wait(
+            in_flight, timeout=self.config["shutdown_timeout_seconds"]
+        )
+        if not_done:
+            logger.warning(
+                f"[BOUNDED EXECUTOR] {self.name} shut down with {len(not_done)} unfinished tasks"
+            )
+        self._executor.shutdown(wait=False, cancel_futures=True)
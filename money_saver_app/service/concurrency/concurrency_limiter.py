@@ -0,0 +1,39 @@
+import contextlib
+import threading
+from typing import Iterator, TypedDict
+
+from loguru import logger
+
+from money_saver_app.service.money_saver.error_code import BackendOverloadedError
+
+
+class ConcurrencyLimitConfig(TypedDict):
+    max_concurrency: int
+    queue_timeout_seconds: float
+
+
+class ConcurrencyLimiter:
+    """
+    Caps the number of concurrent calls to a backend (LLM, Whisper).
+
+    Callers beyond `max_concurrency` queue on a semaphore for at most `queue_timeout_seconds`;
+    when the deadline passes the call is shed with a `BackendOverloadedError` instead of piling up more work.
+    """
+
+    def __init__(self, backend_name: str, config: ConcurrencyLimitConfig) -> None:
+        self.backend_name = backend_name
+        self.max_concurrency = config["max_concurrency"]
+        self.queue_timeout_seconds = config["queue_timeout_seconds"]
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+
+    @contextlib.contextmanager
+    def acquire(self) -> Iterator[None]:
+        if not self._semaphore.acquire(timeout=self.queue_timeout_seconds):
+            logger.warning(
+                f"[BACKEND OVERLOADED] {self.backend_name} has {self.max_concurrency} calls running, shedding request"
+            )
+            raise BackendOverloadedError(self.backend_name)
+        try:
+            yield
+        finally:
+            self._semaphore.release()
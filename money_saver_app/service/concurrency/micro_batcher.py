@@ -0,0 +1,98 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Generic, TypeVar
+
+from loguru import logger
+
+I = TypeVar("I")
+O = TypeVar("O")
+
+
+class MicroBatcher(Generic[I, O]):
+    """
+    Collects items submitted from concurrent callers and hands them to `handle_batch` as one list.
+
+    A batch is flushed as soon as `max_batch_size` items are waiting or `max_wait_ms` milliseconds have passed since
+    the first item of the batch arrived, whichever comes first. `handle_batch` must return one result per input item,
+    in the same order, and each result is routed back to the `Future` of its caller.
+    Up to `max_concurrent_batches` batches are handled at the same time, so a slow batch does not hold back the next one.
+    Once that many are running, the next batch is only collected when one of them finishes: items keep queueing meanwhile,
+    so a backlog is drained in full batches instead of piling up as small batches in the executor queue.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handle_batch: Callable[[list[I]], list[O]],
+        max_batch_size: int,
+        max_wait_ms: int,
+        max_concurrent_batches: int = 4,
+    ) -> None:
+        self.name = name
+        self.handle_batch = handle_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0, max_wait_ms) / 1000
+        self._queue: queue.SimpleQueue[tuple[I, Future[O]]] = queue.SimpleQueue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrent_batches), thread_name_prefix=name
+        )
+        self._batch_slots = threading.BoundedSemaphore(max(1, max_concurrent_batches))
+        self._worker = threading.Thread(
+            target=self._run, name=f"{name}-batcher", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, item: I) -> Future[O]:
+        future: Future[O] = Future()
+        self._queue.put((item, future))
+        return future
+
+    def execute(self, item: I) -> O:
+        return self.submit(item).result()
+
+    def _collect_batch(self) -> list[tuple[I, Future[O]]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # past the deadline the items already waiting are still taken, only the wait for new ones ends
+                batch.append(
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: list[tuple[I, Future[O]]]) -> None:
+        try:
+            self._handle(batch)
+        finally:
+            self._batch_slots.release()
+
+    def _handle(self, batch: list[tuple[I, Future[O]]]) -> None:
+        items = [item for item, _ in batch]
+        logger.debug(f"[MICRO BATCH] {self.name} flushing {len(items)} items")
+        try:
+            results = self.handle_batch(items)
+            if len(results) != len(items):
+                raise ValueError(
+                    f"[MICRO BATCH] {self.name} returned {len(results)} results for {len(items)} items"
+                )
+        except Exception as error:
+            logger.exception(error)
+            for _, future in batch:
+                future.set_exception(error)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _run(self) -> None:
+        while True:
+            self._batch_slots.acquire()
+            self._executor.submit(self._flush, self._collect_batch())
@@ -0,0 +1,52 @@
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Callable, Generic, TypeVar, Union
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces identical in-flight calls: while a call for a given key is running, every other caller with the same
+    key waits for it and receives the same result (or exception) instead of hitting the backend again.
+    Nothing is cached once the call has finished.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._in_flight: dict[str, Future[T]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def hash_key(content: Union[str, bytes]) -> str:
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    def do(self, key: str, func: Callable[[], T]) -> T:
+        with self._lock:
+            optional_future = self._in_flight.get(key)
+            is_leader = optional_future is None
+            if optional_future is None:
+                optional_future = Future()
+                self._in_flight[key] = optional_future
+        future = optional_future
+
+        if not is_leader:
+            logger.info(f"[SINGLE FLIGHT] {self.name} joined in-flight call: {key}")
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
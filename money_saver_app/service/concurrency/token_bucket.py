@@ -0,0 +1,32 @@
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    """
+    Limits the rate of calls made from an event loop (e.g. LINE push requests) to `rate_per_second`,
+    allowing bursts of up to `burst` calls. `acquire` waits until a token is available.
+    """
+
+    def __init__(self, rate_per_second: float, burst: int) -> None:
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate_per_second
+        )
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        # callers wait in line on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate_per_second)
+                self._refill()
+            self._tokens -= 1
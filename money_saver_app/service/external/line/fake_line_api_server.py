@@ -0,0 +1,85 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Any, NamedTuple, Optional
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+
+class ScriptedResponse(NamedTuple):
+    status: int
+    body: dict[str, Any] = {}
+    headers: dict[str, str] = {}
+
+
+class RecordedRequest(NamedTuple):
+    method: str
+    path: str
+    headers: dict[str, str]
+    json: Optional[dict[str, Any]]
+    received_at: float
+
+
+class FakeLineApiServer:
+    """
+    A local stand-in for the LINE Messaging API, used by the `LineMessagingClient` tests and the push benchmarks.
+
+    Every request is recorded in `requests`. Responses scripted for a path with `script` are returned in order, one per
+    request; once they are used up (or when none were scripted) the request succeeds after `response_delay_seconds`.
+    Point both `api_base_url` and `data_api_base_url` of the client at `base_url`.
+    """
+
+    def __init__(self, response_delay_seconds: float = 0) -> None:
+        self.response_delay_seconds = response_delay_seconds
+        self.requests: list[RecordedRequest] = []
+        self._scripted: defaultdict[str, deque[ScriptedResponse]] = defaultdict(deque)
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self._handle)
+        self._server = TestServer(app)
+
+    @property
+    def base_url(self) -> str:
+        return str(self._server.make_url("")).rstrip("/")
+
+    def script(self, path: str, *responses: ScriptedResponse) -> None:
+        self._scripted[path].extend(responses)
+
+    def requests_to(self, path: str) -> list[RecordedRequest]:
+        return [request for request in self.requests if request.path == path]
+
+    async def start(self) -> None:
+        await self._server.start_server()
+
+    async def close(self) -> None:
+        await self._server.close()
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        self.requests.append(
+            RecordedRequest(
+                request.method,
+                request.path,
+                dict(request.headers),
+                await request.json() if request.can_read_body else None,
+                time.monotonic(),
+            )
+        )
+        scripted = self._scripted[request.path]
+        if scripted:
+            response = scripted.popleft()
+            return web.json_response(
+                response.body, status=response.status, headers=response.headers
+            )
+
+        if self.response_delay_seconds > 0:
+            await asyncio.sleep(self.response_delay_seconds)
+        if request.path.startswith("/v2/bot/profile/"):
+            return web.json_response(
+                {
+                    "userId": request.path.rsplit("/", 1)[-1],
+                    "displayName": "fake",
+                    "language": "zh-TW",
+                    "pictureUrl": "https://example.com/fake.png",
+                }
+            )
+        return web.json_response({})
@@ -0,0 +1,203 @@
+import asyncio
+import random
+import threading
+import uuid
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional, TypeVar, Union
+
+import aiohttp
+
+from money_saver_app.service.external.line.line_models import (
+    LineSendMessages,
+    UserProfile,
+)
+from money_saver_app.service.observability.structured_logging import (
+    LogCategory,
+    category_logger,
+)
+
+logger = category_logger(LogCategory.Line)
+
+T = TypeVar("T")
+
+
+class LineApiError(Exception):
+    def __init__(self, status: int, body: str) -> None:
+        super().__init__(f"[LINE API] Request failed with status {status}: {body}")
+        self.status = status
+        self.body = body
+
+
+class LineMessagingClient:
+    """
+    Async client of the LINE Messaging API built on `aiohttp`, replacing the blocking `LineBotApi`.
+
+    All requests share one keep-alive connection pool (`max_connections`) and are bounded by `timeout_seconds`.
+    Responses with status 429 or 5xx and connection errors are retried up to `max_retries` times with full-jitter
+    exponential backoff (honouring `Retry-After`); pushes carry an `X-Line-Retry-Key` so a retried push is delivered once.
+    Replies are never retried: without a retry key, a reply whose response was lost (a timeout or a 5xx) may have been
+    delivered already, and its reply token is single-use, so a retry would at best be rejected.
+    No single wait exceeds `max_retry_delay_seconds`: a `Retry-After` asking for longer fails the request right away
+    instead of holding the caller (and a delivery slot) for that long.
+
+    The client owns an event loop running on a daemon thread. Coroutines of the client are scheduled on it with `submit`,
+    which returns a `concurrent.futures.Future`, so worker threads can wait on it (`submit(...).result()`)
+    and async code can await it (`asyncio.wrap_future`) without blocking its own loop.
+    """
+
+    RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        channel_access_token: str,
+        api_base_url: str = "https://api.line.me",
+        data_api_base_url: str = "https://api-data.line.me",
+        max_connections: int = 32,
+        timeout_seconds: float = 10,
+        max_retries: int = 3,
+        retry_backoff_seconds: float = 0.5,
+        max_retry_delay_seconds: float = 10,
+    ) -> None:
+        self.api_base_url = api_base_url.rstrip("/")
+        self.data_api_base_url = data_api_base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_retry_delay_seconds = max_retry_delay_seconds
+        self._headers = {"Authorization": f"Bearer {channel_access_token}"}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="line-messaging-client", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, coroutine: Coroutine[Any, Any, T]) -> Future[T]:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=self.timeout,
+                headers=self._headers,
+            )
+        return self._session
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> Optional[float]:
+        """
+        Seconds to wait before the next attempt, None when the server asks for a longer wait than `max_retry_delay_seconds`.
+        """
+        if retry_after is not None and retry_after.isdigit():
+            delay = float(retry_after)
+            return delay if delay <= self.max_retry_delay_seconds else None
+        return random.uniform(
+            0, min(self.max_retry_delay_seconds, self.retry_backoff_seconds * 2**attempt)
+        )
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        json: Optional[dict[str, Any]] = None,
+        headers: Optional[dict[str, str]] = None,
+        is_retryable: bool = True,
+    ) -> Union[dict[str, Any], bytes]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._get_session().request(
+                    method, url, json=json, headers=headers
+                ) as response:
+                    if response.status < 400:
+                        if response.content_type == "application/json":
+                            return await response.json()
+                        return await response.read()
+                    body = await response.text()
+                    optional_delay = self._retry_delay(
+                        attempt, response.headers.get("Retry-After")
+                    )
+                    if (
+                        not is_retryable
+                        or response.status not in self.RETRYABLE_STATUSES
+                        or attempt >= self.max_retries
+                        or optional_delay is None
+                    ):
+                        raise LineApiError(response.status, body)
+                    error_message = f"status {response.status}"
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+                if not is_retryable or attempt >= self.max_retries:
+                    raise
+                error_message = repr(error)
+                optional_delay = self._retry_delay(attempt, None)
+
+            delay = optional_delay or 0.0
+            logger.warning(
+                f"[LINE API] {method} {url} failed ({error_message}), attempt {attempt + 1}/{self.max_retries + 1}, retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    @staticmethod
+    def _as_message_list(
+        messages: LineSendMessages
+    ) -> list[dict[str, Any]]:
+        if not isinstance(messages, list):
+            messages = [messages]
+        return [message.as_json_dict() for message in messages]
+
+    async def get_profile(self, user_id: str) -> UserProfile:
+        content = await self._request(
+            "GET", f"{self.api_base_url}/v2/bot/profile/{user_id}"
+        )
+        return UserProfile.model_validate(content)
+
+    async def get_message_content(self, message_id: str) -> bytes:
+        content = await self._request(
+            "GET", f"{self.data_api_base_url}/v2/bot/message/{message_id}/content"
+        )
+        if isinstance(content, dict):
+            raise LineApiError(200, f"Unexpected JSON content: {content}")
+        return content
+
+    async def reply_message(
+        self,
+        reply_token: str,
+        messages: LineSendMessages,
+    ) -> None:
+        await self._request(
+            "POST",
+            f"{self.api_base_url}/v2/bot/message/reply",
+            json={
+                "replyToken": reply_token,
+                "messages": self._as_message_list(messages),
+            },
+            is_retryable=False,
+        )
+
+    async def push_message(
+        self,
+        to: str,
+        messages: LineSendMessages,
+        retry_key: Optional[str] = None,
+    ) -> None:
+        try:
+            await self._request(
+                "POST",
+                f"{self.api_base_url}/v2/bot/message/push",
+                json={"to": to, "messages": self._as_message_list(messages)},
+                headers={"X-Line-Retry-Key": retry_key or str(uuid.uuid4())},
+            )
+        except LineApiError as error:
+            # 409: a previous attempt with the same retry key was already accepted
+            if error.status != 409:
+                raise
+            logger.info(f"[LINE API] Push to {to} already accepted")
+
+    async def _close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    def close(self) -> None:
+        self.submit(self._close()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
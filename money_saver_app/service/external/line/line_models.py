@@ -1,4 +1,5 @@
-from typing import Any, Callable, Generic, TypeVar
+from typing import Any, Callable, Generic, Optional, TypeVar, Union
+from uuid import UUID
 
 from linebot.models.actions import MessageAction, PostbackAction
 from linebot.models.send_messages import (
@@ -10,6 +11,8 @@ from linebot.models.send_messages import (
 )
 from linebot.models.template import (
     ButtonsTemplate,
+    CarouselColumn,
+    CarouselTemplate,
     ConfirmTemplate,
     TemplateSendMessage,
 )
@@ -21,6 +24,10 @@ T = TypeVar("T")
 class LineSendMessage(SendMessage): ...
 
 
+# a reply or push request carries up to 5 messages
+LineSendMessages = Union[LineSendMessage, list[LineSendMessage]]
+
+
 class LineTextSendMessage(TextSendMessage): ...
 
 
@@ -42,6 +49,12 @@ class LineButtonTemplate(ButtonsTemplate): ...
 class LineConfirmTemplate(ConfirmTemplate): ...
 
 
+class LineCarouselTemplate(CarouselTemplate): ...
+
+
+class LineCarouselColumn(CarouselColumn): ...
+
+
 class LineMessageAction(MessageAction): ...
 
 
@@ -50,12 +63,15 @@ class LinePostBackAction(PostbackAction): ...
 
 class UserProfile(BaseModel):
     display_name: str = Field(alias="displayName")
-    language: str = Field(alias="language")
-    picture_url: str = Field(alias="pictureUrl")
+    # only present when the user set them / allowed sharing them
+    language: Optional[str] = Field(default=None, alias="language")
+    picture_url: Optional[str] = Field(default=None, alias="pictureUrl")
     user_id: str = Field(alias="userId")
 
 
 class MessageContext(BaseModel, Generic[T]):
-    user_profile: UserProfile
+    line_user_id: str
+    user_profile: Optional[UserProfile] = None
     message_content: T
-    reply_message: Callable[[LineSendMessage], Any]
+    reply_message: Callable[[LineSendMessages], Any]
+    event_id: Optional[UUID] = None
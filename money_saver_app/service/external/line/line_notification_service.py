@@ -1,45 +1,116 @@
+import asyncio
 import datetime
-from threading import Thread
 import time
-from typing import Callable
+import uuid
+from concurrent.futures import Future
+from enum import Enum
+from typing import Iterator, NamedTuple, Optional
 from loguru import logger
-import schedule
-from linebot import LineBotApi
-from money_saver_app.repository.models import Platform, UserRead
-from money_saver_app.service.external.line.line_models import (
-    LineTextSendMessage,
-    UserProfile,
+from money_saver_app.repository.models import (
+    DeliveryStatus,
+    NotificationDelivery,
+    Platform,
+    UserRead,
 )
+from money_saver_app.repository.recorder_repository import (
+    NotificationDeliveryRepository,
+)
+from money_saver_app.service.concurrency.token_bucket import AsyncTokenBucket
+from money_saver_app.service.external.line.line_messaging_client import (
+    LineMessagingClient,
+)
+from money_saver_app.service.external.line.line_models import LineTextSendMessage
 from money_saver_app.service.money_saver.transaction_service import (
     TransactionService,
     TransactionSet,
 )
 from money_saver_app.service.money_saver.user_service import UserService
+from money_saver_app.service.scheduler.delivery_slot_scheduler import (
+    DeliverySlot,
+    DeliverySlotConfig,
+    DeliverySlotScheduler,
+)
+from money_saver_app.service.scheduler.leader_election import LeaderElection
+
+
+class DeliveryOutcome(Enum):
+    Delivered = "Delivered"
+    AlreadyDelivered = "AlreadyDelivered"
+    Empty = "Empty"
+    Failed = "Failed"
+    # the delivery could not be recorded because another replica took over the lease
+    Fenced = "Fenced"
+
+
+class NotificationJobSummary(NamedTuple):
+    job_name: str
+    run_key: str
+    slot: int
+    total_users: int
+    delivered: int
+    already_delivered: int
+    empty: int
+    failed: int
+    fenced: int
+    elapsed_seconds: float
 
 
 class LineNotificationService:
+    """
+    Pushes the daily transaction summary to every LINE user.
+
+    Only the replica elected by `leader_election` pushes. Users are sharded by a hash of their id into the delivery slots of a `DeliverySlotScheduler`, the membership is
+    computed once per day when the first slot of the day runs, and each slot only notifies its own shard.
+
+    The pushes fan out on the LINE client loop, with at most `push_concurrency` users in flight and the push rate
+    capped by a token bucket. Transient push errors are retried with backoff by the `LineMessagingClient`.
+    Every push is recorded in the `notification_delivery` table, so a rerun of the same day skips the users who
+    already received it, and the push retry key is derived from the same id so LINE drops duplicated pushes.
+    The delivery rows are written with the fencing token of the lease, so a deposed leader can not overwrite the
+    records of the new one, and it stops its fan-out at the first rejected write.
+    """
+
     def __init__(
         self,
-        line_push_api: LineBotApi,
+        line_client: LineMessagingClient,
         user_service: UserService,
         transaction_service: TransactionService,
+        delivery_repo: NotificationDeliveryRepository,
+        push_concurrency: int,
+        push_rate_per_second: float,
+        push_burst: int,
+        digest_slot_config: DeliverySlotConfig,
+        leader_election: LeaderElection,
     ) -> None:
         self.transaction_service = transaction_service
         self.user_service = user_service
-        self.api = line_push_api
+        self.line_client = line_client
+        self.delivery_repo = delivery_repo
+        self.push_concurrency = push_concurrency
+        self.push_bucket = AsyncTokenBucket(push_rate_per_second, push_burst)
+        self.leader_election = leader_election
+        self.digest_scheduler = DeliverySlotScheduler(
+            "notify_all_users_with_self_transactions",
+            digest_slot_config,
+            self._notify_slot_users_with_self_transactions,
+            leader_election,
+        )
+        self._slot_members_date: Optional[datetime.date] = None
+        self._slot_members: list[list[UserRead]] = []
+        self._scheduler_futures: list[Future[None]] = []
 
     def schedule_auto_push_notification(self) -> None:
-        jobs: list[Callable] = [self._notify_all_users_with_self_transactions]
-        for job in jobs:
-            logger.info(f"[JOB SCHEDULING] Scheduling job: {job.__name__}")
-            schedule.every().day.at("16:58", "UTC").do(job)
-
-        def wrapper() -> None:
-            while True:
-                schedule.run_pending()
-                time.sleep(1)
-                
-        Thread(target=wrapper).start()
+        logger.info(
+            f"[JOB SCHEDULING] Scheduling job: {self.digest_scheduler.name}"
+        )
+        self._scheduler_futures = [
+            self.line_client.submit(self.leader_election.run()),
+            self.line_client.submit(self.digest_scheduler.run()),
+        ]
+
+    def stop_auto_push_notification(self) -> None:
+        for future in self._scheduler_futures:
+            future.cancel()
 
     def _format_transaction_set(
         self, transaction_set: TransactionSet
@@ -51,29 +122,167 @@ class LineNotificationService:
         set_expense = f"總花費: {transaction_set.grouped_transactions.expense.total_amount}"
         return LineTextSendMessage("\n".join([*items_repr, set_expense]))
 
-    def _notify_all_users_with_self_transactions(self) -> None:
-        logger.info("[JOB] Running job: _notify_all_users_with_self_transactions")
+    @staticmethod
+    def _delivery_id(job_name: str, run_key: str, user_id: int) -> uuid.UUID:
+        return uuid.uuid5(uuid.NAMESPACE_URL, f"{job_name}/{run_key}/{user_id}")
 
-        end_date = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
-            hours=8
+    async def _record_delivery(
+        self,
+        delivery_id: uuid.UUID,
+        job_name: str,
+        run_key: str,
+        user_id: int,
+        fencing_token: int,
+        status: DeliveryStatus,
+        last_error: Optional[str] = None,
+    ) -> bool:
+        merged_delivery = await asyncio.to_thread(
+            self.delivery_repo.merge,
+            NotificationDelivery(
+                id=delivery_id,
+                job_name=job_name,
+                run_key=run_key,
+                user_id=user_id,
+                status=status,
+                last_error=last_error,
+            ),
+            self.leader_election.name,
+            fencing_token,
+            datetime.datetime.now(datetime.timezone.utc),
         )
-        start_date = end_date - datetime.timedelta(days=1)
+        return merged_delivery is not None
 
-        for user in self.all_target_users:
-            transaction_set = self.transaction_service.get_all_transactions_by_user_id_within_date_range(
-                user.id,
-                start_date,
-                end_date,
-            )
-            logger.debug(f"[JOB] User: {user.id} has {len(transaction_set.transactions)} transactions")
-            if transaction_set.is_empty_set:
-                continue
-            user_profile = UserProfile.model_validate_json(
-                self.api.get_profile(user.external_id).as_json_string()
+    async def _notify_user(
+        self,
+        job_name: str,
+        run_key: str,
+        user: UserRead,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+    ) -> DeliveryOutcome:
+        transaction_set = await asyncio.to_thread(
+            self.transaction_service.get_all_transactions_by_user_id_within_date_range,
+            user.id,
+            start_date,
+            end_date,
+        )
+        logger.debug(f"[JOB] User: {user.id} has {len(transaction_set.transactions)} transactions")
+        if transaction_set.is_empty_set or user.external_id is None:
+            return DeliveryOutcome.Empty
+
+        delivery_id = self._delivery_id(job_name, run_key, user.id)
+        fencing_token = self.leader_election.fencing_token
+        if fencing_token is None:
+            return DeliveryOutcome.Fenced
+        await self.push_bucket.acquire()
+        try:
+            await self.line_client.push_message(
+                user.external_id,
+                self._format_transaction_set(transaction_set),
+                retry_key=str(delivery_id),
             )
-            self.api.push_message(
-                user.external_id, self._format_transaction_set(transaction_set)
+        except Exception as error:
+            logger.error(f"[JOB] Failed to push to user {user.id}: {error}")
+            if not await self._record_delivery(
+                delivery_id,
+                job_name,
+                run_key,
+                user.id,
+                fencing_token,
+                DeliveryStatus.Failed,
+                repr(error),
+            ):
+                return DeliveryOutcome.Fenced
+            return DeliveryOutcome.Failed
+
+        if not await self._record_delivery(
+            delivery_id, job_name, run_key, user.id, fencing_token, DeliveryStatus.Delivered
+        ):
+            return DeliveryOutcome.Fenced
+        return DeliveryOutcome.Delivered
+
+    async def _fan_out(
+        self,
+        job_name: str,
+        run_key: str,
+        users: list[UserRead],
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+    ) -> list[DeliveryOutcome]:
+        delivered_user_ids = await asyncio.to_thread(
+            self.delivery_repo.find_delivered_user_ids, job_name, run_key
+        )
+        users_to_notify = [user for user in users if user.id not in delivered_user_ids]
+        outcomes = [DeliveryOutcome.AlreadyDelivered] * (len(users) - len(users_to_notify))
+        # a fixed number of workers share one iterator, so 100k users never turn into 100k pending tasks
+        pending_users: Iterator[UserRead] = iter(users_to_notify)
+
+        async def work() -> None:
+            for user in pending_users:
+                # a deposed leader stops right away, the new leader's rerun skips the users already delivered
+                if not self.leader_election.is_leader:
+                    logger.warning(f"[JOB] Lost leadership, stop {job_name} of {run_key}")
+                    return
+                try:
+                    outcome = await self._notify_user(
+                        job_name, run_key, user, start_date, end_date
+                    )
+                except Exception as error:
+                    logger.exception(error)
+                    outcome = DeliveryOutcome.Failed
+                outcomes.append(outcome)
+                if outcome is DeliveryOutcome.Fenced:
+                    logger.warning(
+                        f"[JOB] Fencing token of {job_name} is stale, stop {run_key}"
+                    )
+                    return
+
+        await asyncio.gather(*(work() for _ in range(self.push_concurrency)))
+        return outcomes
+
+    async def _get_slot_members(self, run_date: datetime.date) -> list[list[UserRead]]:
+        if self._slot_members_date != run_date:
+            users = await asyncio.to_thread(lambda: self.all_target_users)
+            slot_members: list[list[UserRead]] = [
+                [] for _ in range(self.digest_scheduler.num_slots)
+            ]
+            for user in users:
+                slot_members[
+                    DeliverySlotScheduler.slot_of(user.id, self.digest_scheduler.num_slots)
+                ].append(user)
+            self._slot_members = slot_members
+            self._slot_members_date = run_date
+            logger.info(
+                f"[JOB] Sharded {len(users)} users into {len(slot_members)} slots for {run_date}"
             )
+        return self._slot_members
+
+    async def _notify_slot_users_with_self_transactions(
+        self, slot: DeliverySlot
+    ) -> None:
+        job_name = self.digest_scheduler.name
+        run_key = slot.run_date.isoformat()
+
+        end_date = slot.at + datetime.timedelta(hours=8)
+        start_date = end_date - datetime.timedelta(days=1)
+
+        started_at = time.perf_counter()
+        users = (await self._get_slot_members(slot.run_date))[slot.index]
+        outcomes = await self._fan_out(job_name, run_key, users, start_date, end_date)
+
+        summary = NotificationJobSummary(
+            job_name=job_name,
+            run_key=run_key,
+            slot=slot.index,
+            total_users=len(users),
+            delivered=outcomes.count(DeliveryOutcome.Delivered),
+            already_delivered=outcomes.count(DeliveryOutcome.AlreadyDelivered),
+            empty=outcomes.count(DeliveryOutcome.Empty),
+            failed=outcomes.count(DeliveryOutcome.Failed),
+            fenced=outcomes.count(DeliveryOutcome.Fenced),
+            elapsed_seconds=time.perf_counter() - started_at,
+        )
+        logger.info(f"[JOB SUMMARY] {summary}")
 
     @property
     def all_target_users(self) -> list[UserRead]:
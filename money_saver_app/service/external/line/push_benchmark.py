@@ -0,0 +1,215 @@
+"""
+Measures the daily digest fan-out of `LineNotificationService` against a local fake LINE push endpoint.
+
+For every `--users` count, a fresh SQLite DB is seeded with that many LINE users. The fan-out then pushes one message to
+each of them through the `LineMessagingClient`, against a `FakeLineApiServer` that answers every push after `--latency`
+seconds. Each run records the delivery rows as in production, and a second run checks that every user is skipped. The
+per-user transaction query is replaced by a fixed one-transaction set, so only the fan-out and the push path are measured.
+
+    python -m money_saver_app.service.external.line.push_benchmark --users 10000 100000 --latency 0.05 --concurrency 32 --rate 1000
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import tempfile
+import time
+from typing import Any, cast
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from money_saver_app.repository.models import (
+    ExternalUser,
+    Platform,
+    Role,
+    TransactionRead,
+    User,
+    UserRead,
+)
+from money_saver_app.repository.recorder_repository import (
+    NotificationDeliveryRepository,
+    SchedulerLeaseRepository,
+)
+from money_saver_app.repository.sql_crud_repository import SQLCrudRepository
+from money_saver_app.service.external.line.fake_line_api_server import (
+    FakeLineApiServer,
+)
+from money_saver_app.service.external.line.line_messaging_client import (
+    LineMessagingClient,
+)
+from money_saver_app.service.external.line.line_notification_service import (
+    DeliveryOutcome,
+    LineNotificationService,
+)
+from money_saver_app.service.money_saver.transaction_service import (
+    TransactionService,
+    TransactionSet,
+)
+from money_saver_app.service.money_saver.user_service import UserService
+from money_saver_app.service.money_saver.view_model_common import (
+    ExpenseCategory,
+    TransactionType,
+)
+from money_saver_app.service.money_saver.views import TransactionItemView
+from money_saver_app.service.scheduler.delivery_slot_scheduler import (
+    DeliverySlotConfig,
+)
+from money_saver_app.service.scheduler.leader_election import LeaderElection
+
+PUSH_PATH = "/v2/bot/message/push"
+JOB_NAME = "push_benchmark"
+
+
+class _FixedTransactionService:
+    def __init__(self) -> None:
+        self.transaction_set = TransactionSet(
+            transactions=[
+                TransactionRead(
+                    id=None,
+                    recorded_date=datetime.date.today(),
+                    transaction_type=TransactionType.Expense,
+                    amount=60,
+                    item=TransactionItemView(
+                        name="咖啡", description="咖啡", item_category=ExpenseCategory.Dining
+                    ),
+                )
+            ]
+        )
+
+    def get_all_transactions_by_user_id_within_date_range(
+        self, user_id: int, start_date: datetime.date, end_date: datetime.date
+    ) -> TransactionSet:
+        return self.transaction_set
+
+
+def _seed_users(url: str, num_users: int) -> list[UserRead]:
+    engine = SQLCrudRepository.create_all_tables(url)
+    with Session(engine) as session:
+        session.execute(
+            insert(User),
+            [
+                {
+                    "id": user_id,
+                    "user_name": f"user-{user_id}",
+                    "email": f"user-{user_id}@example.com",
+                    "hashed_password": "",
+                    "role": Role.User,
+                }
+                for user_id in range(1, num_users + 1)
+            ],
+        )
+        session.execute(
+            insert(ExternalUser),
+            [
+                {"user_id": user_id, "platform": Platform.LINE, "external_id": f"U{user_id}"}
+                for user_id in range(1, num_users + 1)
+            ],
+        )
+        session.commit()
+    engine.dispose()
+    return [
+        UserRead(
+            id=user_id,
+            user_name=f"user-{user_id}",
+            email=f"user-{user_id}@example.com",
+            role=Role.User,
+            platform=Platform.LINE,
+            external_id=f"U{user_id}",
+            hashed_password="",
+        )
+        for user_id in range(1, num_users + 1)
+    ]
+
+
+async def run_push_benchmark(
+    num_users: int,
+    latency_seconds: float,
+    push_concurrency: int,
+    push_rate_per_second: float,
+    push_burst: int,
+) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'push_benchmark.db')}"
+        users = await asyncio.to_thread(_seed_users, url, num_users)
+        engine = SQLCrudRepository.create_all_tables(url)
+        server = FakeLineApiServer(response_delay_seconds=latency_seconds)
+        await server.start()
+        client = LineMessagingClient(
+            "token", api_base_url=server.base_url, data_api_base_url=server.base_url
+        )
+        leader_election = LeaderElection(
+            JOB_NAME,
+            SchedulerLeaseRepository(engine),
+            {"lease_seconds": 3600, "renew_interval_seconds": 600},
+        )
+        await asyncio.to_thread(leader_election._try_hold_lease)
+        service = LineNotificationService(
+            client,
+            cast(UserService, None),
+            cast(TransactionService, _FixedTransactionService()),
+            NotificationDeliveryRepository(engine),
+            push_concurrency,
+            push_rate_per_second,
+            push_burst,
+            DeliverySlotConfig(window_start_utc="16:00", window_minutes=120, num_slots=1),
+            leader_election,
+        )
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        async def fan_out() -> tuple[list[DeliveryOutcome], float]:
+            started_at = time.perf_counter()
+            outcomes = await asyncio.wrap_future(
+                client.submit(
+                    service._fan_out(JOB_NAME, "run", users, now - datetime.timedelta(days=1), now)
+                )
+            )
+            return outcomes, time.perf_counter() - started_at
+
+        try:
+            outcomes, elapsed_seconds = await fan_out()
+            rerun_outcomes, rerun_elapsed_seconds = await fan_out()
+        finally:
+            await asyncio.get_running_loop().run_in_executor(None, client.close)
+            await server.close()
+            engine.dispose()
+
+    return {
+        "users": num_users,
+        "latency_seconds": latency_seconds,
+        "push_concurrency": push_concurrency,
+        "push_rate_per_second": push_rate_per_second,
+        "elapsed_seconds": elapsed_seconds,
+        "pushes_per_second": outcomes.count(DeliveryOutcome.Delivered) / elapsed_seconds,
+        "delivered": outcomes.count(DeliveryOutcome.Delivered),
+        "failed": outcomes.count(DeliveryOutcome.Failed),
+        "push_requests": len(server.requests_to(PUSH_PATH)),
+        "rerun_elapsed_seconds": rerun_elapsed_seconds,
+        "rerun_already_delivered": rerun_outcomes.count(DeliveryOutcome.AlreadyDelivered),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rate", type=float, default=1000)
+    parser.add_argument("--burst", type=int, default=100)
+    args = parser.parse_args()
+
+    reports = [
+        asyncio.run(
+            run_push_benchmark(
+                num_users, args.latency, args.concurrency, args.rate, args.burst
+            )
+        )
+        for num_users in args.users
+    ]
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
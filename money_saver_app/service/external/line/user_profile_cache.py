@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from money_saver_app.service.external.line.line_messaging_client import (
+    LineMessagingClient,
+)
+from money_saver_app.service.external.line.line_models import UserProfile
+from money_saver_app.service.observability.structured_logging import (
+    LogCategory,
+    category_logger,
+)
+
+logger = category_logger(LogCategory.Line)
+
+
+class CachedUserProfile(NamedTuple):
+    user_profile: UserProfile
+    fetched_at: float
+
+
+class ProfileFetchFailure(NamedTuple):
+    failures: int
+    retry_at: float
+
+
+class UserProfileCache:
+    """
+    TTL cache of LINE `UserProfile` keyed by LINE user id, with stale-while-revalidate semantics.
+
+    Profiles younger than `ttl_seconds` are served as is. Older profiles, up to `max_stale_seconds`, are still served
+    while a refresh runs in the background on the LINE client loop; concurrent refreshes of one user are coalesced.
+    `get` never waits on the network, it returns None for unknown users and fetches them in the background,
+    `fetch` waits only when there is no usable profile. At most `max_entries` profiles are kept, least recently used first out.
+
+    Failed fetches are cached too: after a failure no background refresh of that user is attempted for
+    `failure_backoff_seconds`, doubling with every consecutive failure up to `max_failure_backoff_seconds`, so a user
+    whose profile cannot be fetched (blocked the bot, LINE outage) does not cost a request per message.
+    """
+
+    def __init__(
+        self,
+        line_client: LineMessagingClient,
+        ttl_seconds: float = 60 * 60,
+        max_stale_seconds: float = 60 * 60 * 24,
+        max_entries: int = 10000,
+        failure_backoff_seconds: float = 30,
+        max_failure_backoff_seconds: float = 60 * 60,
+    ) -> None:
+        self.line_client = line_client
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.max_entries = max_entries
+        self.failure_backoff_seconds = failure_backoff_seconds
+        self.max_failure_backoff_seconds = max_failure_backoff_seconds
+        self._entries: OrderedDict[str, CachedUserProfile] = OrderedDict()
+        self._failures: OrderedDict[str, ProfileFetchFailure] = OrderedDict()
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+
+    def _lookup(self, user_id: str) -> tuple[Optional[UserProfile], bool]:
+        """
+        Returns the usable cached profile (None when missing or too stale) and whether it needs a refresh.
+        """
+        with self._lock:
+            optional_entry = self._entries.get(user_id)
+            if optional_entry is None:
+                return None, True
+            self._entries.move_to_end(user_id)
+        age_seconds = time.monotonic() - optional_entry.fetched_at
+        if age_seconds > self.max_stale_seconds:
+            return None, True
+        return optional_entry.user_profile, age_seconds > self.ttl_seconds
+
+    def _store(self, user_id: str, user_profile: UserProfile) -> None:
+        with self._lock:
+            self._failures.pop(user_id, None)
+            self._entries[user_id] = CachedUserProfile(user_profile, time.monotonic())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _store_failure(self, user_id: str) -> float:
+        with self._lock:
+            optional_failure = self._failures.pop(user_id, None)
+            failures = 1 if optional_failure is None else optional_failure.failures + 1
+            backoff_seconds = min(
+                self.max_failure_backoff_seconds,
+                self.failure_backoff_seconds * 2 ** (failures - 1),
+            )
+            self._failures[user_id] = ProfileFetchFailure(
+                failures, time.monotonic() + backoff_seconds
+            )
+            while len(self._failures) > self.max_entries:
+                self._failures.popitem(last=False)
+        return backoff_seconds
+
+    async def _refresh(self, user_id: str) -> None:
+        try:
+            self._store(user_id, await self.line_client.get_profile(user_id))
+        except Exception as error:
+            backoff_seconds = self._store_failure(user_id)
+            logger.warning(
+                f"[USER PROFILE CACHE] Refresh of {user_id} failed, next attempt in {backoff_seconds:.0f}s: {error}"
+            )
+        finally:
+            with self._lock:
+                self._refreshing.discard(user_id)
+
+    def _schedule_refresh(self, user_id: str) -> None:
+        with self._lock:
+            if user_id in self._refreshing:
+                return
+            optional_failure = self._failures.get(user_id)
+            if (
+                optional_failure is not None
+                and time.monotonic() < optional_failure.retry_at
+            ):
+                return
+            self._refreshing.add(user_id)
+        self.line_client.submit(self._refresh(user_id))
+
+    def get(self, user_id: str) -> Optional[UserProfile]:
+        optional_user_profile, is_refresh_needed = self._lookup(user_id)
+        if is_refresh_needed:
+            self._schedule_refresh(user_id)
+        return optional_user_profile
+
+    async def fetch(self, user_id: str) -> UserProfile:
+        optional_user_profile, is_refresh_needed = self._lookup(user_id)
+        if optional_user_profile is None:
+            try:
+                user_profile = await self.line_client.get_profile(user_id)
+            except Exception:
+                self._store_failure(user_id)
+                raise
+            self._store(user_id, user_profile)
+            return user_profile
+        if is_refresh_needed:
+            self._schedule_refresh(user_id)
+        return optional_user_profile
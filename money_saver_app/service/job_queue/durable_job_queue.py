@@ -0,0 +1,267 @@
+import datetime
+import os
+import random
+import socket
+import threading
+from typing import Any, Callable, TypedDict
+from uuid import UUID
+
+from loguru import logger
+from typing_extensions import NotRequired
+
+from money_saver_app.repository.models import Job
+from money_saver_app.repository.recorder_repository import JobRepository
+from money_saver_app.service.money_saver.error_code import BackendOverloadedError
+
+
+class DurableJobQueueConfig(TypedDict):
+    num_workers: int
+    lease_seconds: float
+    poll_interval_seconds: float
+    max_attempts: int
+    retry_backoff_seconds: float
+    max_retry_backoff_seconds: float
+    shutdown_timeout_seconds: float
+    max_pending_jobs: NotRequired[int]
+
+
+JobHandler = Callable[[str], None]
+
+
+class DurableJobQueue:
+    """
+    A job queue persisted in the app DB: `enqueue` is a single insert, and `num_workers` threads claim jobs with
+    leases of `lease_seconds`, which a heartbeat extends while the job runs. A job whose worker dies is claimed again
+    once its lease expires, so work survives crashes and restarts (at least once delivery).
+
+    Failed jobs are retried with jittered exponential backoff and moved to `Dead` after `max_attempts`, and so are
+    poison jobs that take their worker down with them: once the lease of their last attempt expires they are buried
+    instead of being claimed again.
+    Handlers are registered per job `kind` with `register_handler` and receive the job payload; they must be
+    idempotent since a job can run again after a crash or a lost lease.
+    With `max_pending_jobs` set, `enqueue` sheds load: it raises `BackendOverloadedError` instead of accepting jobs that
+    would push the unfinished (pending or running) jobs past it, since they would only be handled long after anyone waits for them.
+    `get_metrics` reports the queue wait of the jobs this process claimed, from their enqueue to their first lease
+    (retries and reclaimed jobs are left out, their wait includes the backoff or the lost run).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        repo: JobRepository,
+        config: DurableJobQueueConfig,
+    ) -> None:
+        self.name = name
+        self.repo = repo
+        self.config = config
+        self.handlers: dict[str, JobHandler] = {}
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._lock = threading.Lock()
+        self._running: dict[UUID, str] = {}
+        self._threads: list[threading.Thread] = []
+        self._waited_jobs = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    @staticmethod
+    def _now() -> datetime.datetime:
+        return datetime.datetime.now(datetime.timezone.utc)
+
+    def register_handler(self, kind: str, handler: JobHandler) -> None:
+        self.handlers[kind] = handler
+
+    def enqueue(self, jobs: list[tuple[str, str]]) -> None:
+        """
+        Persists `(kind, payload)` jobs in one insert, see `max_pending_jobs` for when they are rejected.
+        """
+        if not jobs:
+            return
+        optional_max_pending_jobs = self.config.get("max_pending_jobs")
+        if (
+            optional_max_pending_jobs is not None
+            and self.repo.count_unfinished(self.name) + len(jobs)
+            > optional_max_pending_jobs
+        ):
+            logger.warning(
+                f"[JOB QUEUE] {self.name} has {optional_max_pending_jobs} unfinished jobs, rejecting {len(jobs)} jobs"
+            )
+            raise BackendOverloadedError(self.name)
+        self.repo.save_all(
+            [Job(queue=self.name, kind=kind, payload=payload) for kind, payload in jobs]
+        )
+        self._wake_event.set()
+
+    def start(self) -> None:
+        self._threads = [
+            threading.Thread(
+                target=self._work,
+                args=(f"{self._worker_prefix}:{index}",),
+                name=f"{self.name}-worker-{index}",
+                daemon=True,
+            )
+            for index in range(self.config["num_workers"])
+        ]
+        self._threads.append(
+            threading.Thread(
+                target=self._heartbeat, name=f"{self.name}-heartbeat", daemon=True
+            )
+        )
+        for thread in self._threads:
+            thread.start()
+        logger.info(
+            f"[JOB QUEUE] {self.name} started {self.config['num_workers']} workers"
+        )
+
+    def _lease_expires_at(self) -> datetime.datetime:
+        return self._now() + datetime.timedelta(seconds=self.config["lease_seconds"])
+
+    def _heartbeat(self) -> None:
+        # a DB error must not end the loop, the running jobs would lose their leases and run twice
+        while not self._stop_event.wait(self.config["lease_seconds"] / 3):
+            with self._lock:
+                running = list(self._running.items())
+            for job_id, worker_id in running:
+                try:
+                    if not self.repo.extend_lease(
+                        job_id, worker_id, self._lease_expires_at()
+                    ):
+                        logger.warning(
+                            f"[JOB QUEUE] {self.name} lost the lease of job {job_id}"
+                        )
+                except Exception as error:
+                    logger.exception(error)
+            self._bury_expired()
+
+    def _bury_expired(self) -> None:
+        try:
+            buried = self.repo.bury_expired(
+                self.name, self._now(), self.config["max_attempts"]
+            )
+        except Exception as error:
+            logger.exception(error)
+            return
+        if buried > 0:
+            logger.error(
+                f"[JOB QUEUE] {self.name} buried {buried} jobs whose lease expired on all {self.config['max_attempts']} attempts"
+            )
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = self.config["retry_backoff_seconds"] * 2 ** (attempts - 1)
+        return min(self.config["max_retry_backoff_seconds"], delay) * random.uniform(
+            0.5, 1.5
+        )
+
+    def _execute(self, job: Job, worker_id: str) -> None:
+        with self._lock:
+            self._running[job.id] = worker_id
+        try:
+            handler = self.handlers[job.kind]
+            handler(job.payload)
+        except Exception as error:
+            logger.exception(error)
+            if job.attempts >= self.config["max_attempts"]:
+                self.repo.bury(job.id, worker_id, repr(error))
+                logger.error(
+                    f"[JOB QUEUE] {self.name} job {job.id} ({job.kind}) dead after {job.attempts} attempts"
+                )
+                return
+            available_at = self._now() + datetime.timedelta(
+                seconds=self._retry_delay(job.attempts)
+            )
+            self.repo.reschedule(job.id, worker_id, available_at, repr(error))
+            return
+        finally:
+            with self._lock:
+                self._running.pop(job.id, None)
+
+        if not self.repo.complete(job.id, worker_id):
+            logger.warning(
+                f"[JOB QUEUE] {self.name} job {job.id} finished after its lease was taken over"
+            )
+
+    @staticmethod
+    def _as_utc(value: datetime.datetime) -> datetime.datetime:
+        # SQLite returns naive datetimes, which are stored in UTC
+        if value.tzinfo is None:
+            return value.replace(tzinfo=datetime.timezone.utc)
+        return value
+
+    def _record_wait(self, jobs: list[Job], claimed_at: datetime.datetime) -> None:
+        # clamped, the clock of the enqueuing replica may run ahead of this one
+        waits = [
+            max(0.0, (claimed_at - self._as_utc(job.created_at)).total_seconds())
+            for job in jobs
+            if job.attempts == 1
+        ]
+        if not waits:
+            return
+        with self._lock:
+            self._waited_jobs += len(waits)
+            self._total_wait_seconds += sum(waits)
+            self._max_wait_seconds = max(self._max_wait_seconds, *waits)
+
+    def _work(self, worker_id: str) -> None:
+        while not self._stop_event.is_set():
+            claimed_at = self._now()
+            try:
+                jobs = self.repo.claim(
+                    self.name,
+                    worker_id,
+                    claimed_at,
+                    self._lease_expires_at(),
+                    self.config["max_attempts"],
+                )
+            except Exception as error:
+                logger.exception(error)
+                jobs = []
+            self._record_wait(jobs, claimed_at)
+
+            if not jobs:
+                self._wake_event.wait(self.config["poll_interval_seconds"])
+                self._wake_event.clear()
+                continue
+            for job in jobs:
+                try:
+                    self._execute(job, worker_id)
+                except Exception as error:
+                    # failing to record the outcome leaves the job leased, it is claimed again once the lease expires
+                    logger.exception(error)
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self._lock:
+            running = len(self._running)
+            waited_jobs = self._waited_jobs
+            total_wait_seconds = self._total_wait_seconds
+            max_wait_seconds = self._max_wait_seconds
+        return {
+            "name": self.name,
+            "num_workers": self.config["num_workers"],
+            "running_in_process": running,
+            "first_claims_in_process": waited_jobs,
+            "average_queue_wait_seconds": total_wait_seconds / max(1, waited_jobs),
+            "max_queue_wait_seconds": max_wait_seconds,
+            **{
+                status.value.lower(): count
+                for status, count in self.repo.count_by_status(self.name).items()
+            },
+        }
+
+    def shutdown(self) -> None:
+        """
+        Stops claiming new jobs and waits up to `shutdown_timeout_seconds` for the running ones; unfinished jobs are
+        picked up again by another worker once their lease expires.
+        """
+        self._stop_event.set()
+        self._wake_event.set()
+        deadline = self._now() + datetime.timedelta(
+            seconds=self.config["shutdown_timeout_seconds"]
+        )
+        for thread in self._threads:
+            thread.join(max(0.0, (deadline - self._now()).total_seconds()))
+        with self._lock:
+            if self._running:
+                logger.warning(
+                    f"[JOB QUEUE] {self.name} shut down with {len(self._running)} running jobs"
+                )
@@ -1,4 +1,5 @@
 from typing import Literal, Optional, TypedDict
+from uuid import UUID
 
 from fastapi import status
 
@@ -59,6 +60,54 @@ class LanguageResource:
         "en": "Unable to parse transaction, please try it again...",
         "chi": "未能成功解析交易紀錄, 請重新嘗試...",
     }
+    PIPELINE_CHECKPOINT_NOT_FOUND: LanguageDict = {
+        "en": "The record {run_id} has expired or cannot be resumed, please send it again.",
+        "chi": "此紀錄 {run_id} 已過期或無法繼續, 請重新傳送",
+    }
+    AUDIO_TOO_LARGE: LanguageDict = {
+        "en": "The audio file exceeds the maximum size of {max_bytes} bytes.",
+        "chi": "音訊檔案超過大小上限 {max_bytes} bytes",
+    }
+    AUDIO_DECODE_ERROR: LanguageDict = {
+        "en": "Unable to decode the audio, please send it again.",
+        "chi": "無法解析音訊, 請重新傳送",
+    }
+    AUDIO_TOO_LONG: LanguageDict = {
+        "en": "The audio exceeds the maximum duration of {max_duration_seconds} seconds.",
+        "chi": "音訊長度超過上限 {max_duration_seconds} 秒",
+    }
+    NO_SPEECH_DETECTED: LanguageDict = {
+        "en": "No speech was detected in the audio, please record it again.",
+        "chi": "音訊中未偵測到語音, 請重新錄製",
+    }
+    TRANSCRIPTION_QUEUE_FULL: LanguageDict = {
+        "en": "Too many voice messages are being transcribed, please try it again later...",
+        "chi": "語音辨識忙碌中, 請稍後再試...",
+    }
+    TRANSCRIPTION_TIMEOUT: LanguageDict = {
+        "en": "Voice transcription did not finish within {timeout_seconds} seconds, please try it again later...",
+        "chi": "語音辨識逾時 ({timeout_seconds} 秒), 請稍後再試...",
+    }
+    VOICE_RECOGNIZER_NOT_READY: LanguageDict = {
+        "en": "Voice recognition is warming up, please try it again in a moment...",
+        "chi": "語音辨識啟動中, 請稍後再試...",
+    }
+    BACKEND_OVERLOADED: LanguageDict = {
+        "en": "The server is busy ({backend}), please try it again later...",
+        "chi": "系統忙碌中 ({backend}), 請稍後再試...",
+    }
+    PIPELINE_JOB_NOT_FOUND: LanguageDict = {
+        "en": "The job {job_id} does not exist or has expired.",
+        "chi": "此工作 {job_id} 不存在或已過期",
+    }
+    TOO_MANY_PIPELINE_JOBS: LanguageDict = {
+        "en": "You already have {max_jobs} records being processed, please wait for them to finish...",
+        "chi": "您已有 {max_jobs} 筆紀錄處理中, 請等待完成後再試...",
+    }
+    PIPELINE_JOB_CANCELLED: LanguageDict = {
+        "en": "The server shut down before the job {job_id} could run, please send the audio again.",
+        "chi": "系統重啟, 工作 {job_id} 未能執行, 請重新傳送音訊",
+    }
 
 
 class ErrorCodeWithError(Exception):
@@ -168,3 +217,140 @@ class EmailDuplicationError(ErrorCodeWithError):
         super().__init__(
             self.ERROR_CODE, LanguageResource.EMAIL_DUPLICATE[self.LANGUAGE]
         )
+
+
+class BackendOverloadedError(ErrorCodeWithError):
+    ERROR_CODE = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def __init__(self, backend: str) -> None:
+        super().__init__(
+            self.ERROR_CODE,
+            LanguageResource.BACKEND_OVERLOADED[self.LANGUAGE],
+            backend=backend,
+        )
+
+
+class ResumablePipelineError(ErrorCodeWithError):
+    """
+    Raised when a pipeline step fails after its automatic retries, the completed step outputs are checkpointed under `run_id`.
+    """
+
+    def __init__(self, run_id: UUID, error: ErrorCodeWithError) -> None:
+        self.ERROR_CODE = error.ERROR_CODE
+        self.run_id = run_id
+        self.error = error
+        super().__init__(self.ERROR_CODE, "{message}", message=str(error))
+
+
+class PipelineCheckpointNotFoundError(ErrorCodeWithError):
+    ERROR_CODE = status.HTTP_404_NOT_FOUND
+
+    def __init__(self, run_id: UUID) -> None:
+        super().__init__(
+            self.ERROR_CODE,
+            LanguageResource.PIPELINE_CHECKPOINT_NOT_FOUND[self.LANGUAGE],
+            run_id=run_id,
+        )
+
+
+class AudioTooLargeError(ErrorCodeWithError):
+    ERROR_CODE = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(
+            self.ERROR_CODE,
+            LanguageResource.AUDIO_TOO_LARGE[self.LANGUAGE],
+            max_bytes=max_bytes,
+        )
+
+
+class AudioTooLongError(ErrorCodeWithError):
+    ERROR_CODE = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    def __init__(self, max_duration_seconds: float) -> None:
+        super().__init__(
+            self.ERROR_CODE,
+            LanguageResource.AUDIO_TOO_LONG[self.LANGUAGE],
+            max_duration_seconds=max_duration_seconds,
+        )
+
+
+class AudioDecodeError(ErrorCodeWithError):
+    ERROR_CODE = status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def __init__(self) -> None:
+        super().__init__(
+            self.ERROR_CODE, LanguageResource.AUDIO_DECODE_ERROR[self.LANGUAGE]
+        )
+
+
+class NoSpeechDetectedError(ErrorCodeWithError):
+    ERROR_CODE = status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def __init__(self) -> None:
+        super().__init__(
+            self.ERROR_CODE, LanguageResource.NO_SPEECH_DETECTED[self.LANGUAGE]
+        )
+
+
+class TranscriptionQueueFullError(ErrorCodeWithError):
+    ERROR_CODE = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def __init__(self) -> None:
+        super().__init__(
+            self.ERROR_CODE, LanguageResource.TRANSCRIPTION_QUEUE_FULL[self.LANGUAGE]
+        )
+
+
+class TranscriptionTimeoutError(ErrorCodeWithError):
+    ERROR_CODE = status.HTTP_504_GATEWAY_TIMEOUT
+
+    def __init__(self, timeout_seconds: float) -> None:
+        super().__init__(
+            self.ERROR_CODE,
+            LanguageResource.TRANSCRIPTION_TIMEOUT[self.LANGUAGE],
+            timeout_seconds=timeout_seconds,
+        )
+
+
+class VoiceRecognizerNotReadyError(ErrorCodeWithError):
+    ERROR_CODE = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def __init__(self) -> None:
+        super().__init__(
+            self.ERROR_CODE,
+            LanguageResource.VOICE_RECOGNIZER_NOT_READY[self.LANGUAGE],
+        )
+
+
+class PipelineJobNotFoundError(ErrorCodeWithError):
+    ERROR_CODE = status.HTTP_404_NOT_FOUND
+
+    def __init__(self, job_id: UUID) -> None:
+        super().__init__(
+            self.ERROR_CODE,
+            LanguageResource.PIPELINE_JOB_NOT_FOUND[self.LANGUAGE],
+            job_id=job_id,
+        )
+
+
+class TooManyPipelineJobsError(ErrorCodeWithError):
+    ERROR_CODE = status.HTTP_429_TOO_MANY_REQUESTS
+
+    def __init__(self, max_jobs: int) -> None:
+        super().__init__(
+            self.ERROR_CODE,
+            LanguageResource.TOO_MANY_PIPELINE_JOBS[self.LANGUAGE],
+            max_jobs=max_jobs,
+        )
+
+
+class PipelineJobCancelledError(ErrorCodeWithError):
+    ERROR_CODE = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def __init__(self, job_id: UUID) -> None:
+        super().__init__(
+            self.ERROR_CODE,
+            LanguageResource.PIPELINE_JOB_CANCELLED[self.LANGUAGE],
+            job_id=job_id,
+        )
@@ -0,0 +1,219 @@
+import datetime
+import re
+import sys
+import threading
+import unicodedata
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from loguru import logger
+
+from money_saver_app.service.money_saver.view_model_common import (
+    ExpenseCategory,
+    IncomeCategory,
+    TransactionType,
+)
+from money_saver_app.service.money_saver.views import (
+    TransactionItemView,
+    TransactionView,
+)
+
+_ITEM_PATTERN = re.compile(
+    r"\s*(?P<name>[^\d,，、;；]+?)\s*(?:NT\$?|\$)?\s*(?P<amount>\d+)\s*(?:元|塊|块)?[\s,，、;；]*"
+)
+_STRIPPED_CHARACTERS = " \t\r\n。，,.!！?？~～"
+
+
+class ItemCategoryEntry(NamedTuple):
+    transaction_type: TransactionType
+    item_category: str
+    description: str
+
+
+class ItemCategoryHistory(NamedTuple):
+    user_id: int
+    item_name: str
+    transaction_type: TransactionType
+    item_category: str
+    description: str
+    created_at: datetime.datetime
+
+
+def _as_naive_utc(value: datetime.datetime) -> datetime.datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class ItemCategoryMemory:
+    """
+    Keeps the last confirmed `(transaction_type, item_category, description)` of every item a user has logged,
+    so that repeat purchases such as "咖啡60" or "早餐50 咖啡60" can be turned into `TransactionView` objects without asking the LLM.
+
+    Item names are normalized (NFKC, case folded, whitespace and trailing punctuation removed) and every stored
+    string is interned, so identical categories and descriptions across users share one object.
+    `TransactionType` members are singletons, which keeps each entry down to a single small tuple.
+    The memory is usable while it loads: it recalls whatever has been remembered so far and the LLM handles the rest.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[int, dict[str, ItemCategoryEntry]] = {}
+        self._lock = threading.Lock()
+        self._is_loaded = False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._is_loaded
+
+    @staticmethod
+    def normalize_item_name(item_name: str) -> str:
+        normalized = unicodedata.normalize("NFKC", item_name).casefold()
+        return sys.intern("".join(normalized.split()).strip(_STRIPPED_CHARACTERS))
+
+    def load(
+        self,
+        histories: Iterable[ItemCategoryHistory],
+        load_rejections: Callable[[], dict[tuple[int, str], datetime.datetime]],
+    ) -> None:
+        """
+        Builds the memory from transaction history, histories are expected in chronological order so that the latest record wins.
+
+        The history is indexed without holding the lock and merged under the entries remembered meanwhile.
+        An item rejected after its latest history record (see `forget`) is left out. `load_rejections` is only called
+        once the history is consumed, so that feedback persisted during the load is applied as well.
+        """
+        loaded_entries: dict[int, dict[str, ItemCategoryEntry]] = {}
+        loaded_at: dict[tuple[int, str], datetime.datetime] = {}
+        count = 0
+        for history in histories:
+            key = self.normalize_item_name(history.item_name)
+            if not key:
+                continue
+            loaded_entries.setdefault(history.user_id, {})[key] = self._create_entry(
+                history.transaction_type, history.item_category, history.description
+            )
+            loaded_at[(history.user_id, key)] = history.created_at
+            count += 1
+
+        rejected = 0
+        for (user_id, key), rejected_at in load_rejections().items():
+            optional_loaded_at = loaded_at.get((user_id, key))
+            if optional_loaded_at is None or _as_naive_utc(
+                optional_loaded_at
+            ) > _as_naive_utc(rejected_at):
+                continue
+            del loaded_entries[user_id][key]
+            rejected += 1
+
+        with self._lock:
+            for user_id, user_entries in self._entries.items():
+                loaded_entries.setdefault(user_id, {}).update(user_entries)
+            self._entries = {
+                user_id: user_entries
+                for user_id, user_entries in loaded_entries.items()
+                if user_entries
+            }
+            self._is_loaded = True
+        logger.info(
+            f"[ITEM CATEGORY MEMORY] Loaded {count} records for {len(self._entries)} users, {rejected} items rejected"
+        )
+
+    @staticmethod
+    def _create_entry(
+        transaction_type: TransactionType, item_category: str, description: str
+    ) -> ItemCategoryEntry:
+        return ItemCategoryEntry(
+            TransactionType(transaction_type),
+            sys.intern(getattr(item_category, "value", item_category)),
+            sys.intern(description),
+        )
+
+    def remember(
+        self,
+        user_id: int,
+        item_name: str,
+        transaction_type: TransactionType,
+        item_category: str,
+        description: str,
+    ) -> None:
+        key = self.normalize_item_name(item_name)
+        if not key:
+            return
+        entry = self._create_entry(transaction_type, item_category, description)
+        with self._lock:
+            self._entries.setdefault(user_id, {})[key] = entry
+
+    def remember_view(self, user_id: int, view: TransactionView) -> None:
+        self.remember(
+            user_id,
+            view.item.name,
+            view.transaction_type,
+            view.item.item_category.value,
+            view.item.description,
+        )
+
+    def forget(self, user_id: int, item_name: str) -> bool:
+        """
+        Drops an item from the user's memory, used as negative feedback when an auto-filled transaction is deleted.
+        The feedback only lives in memory, `TransactionService.forget_item_category` persists it across restarts.
+        """
+        key = self.normalize_item_name(item_name)
+        with self._lock:
+            user_entries = self._entries.get(user_id)
+            if user_entries is None or key not in user_entries:
+                return False
+            del user_entries[key]
+            if not user_entries:
+                del self._entries[user_id]
+        logger.info(f"[ITEM CATEGORY MEMORY] Forget item {item_name} for user {user_id}")
+        return True
+
+    def _recall_item(
+        self, user_entries: dict[str, ItemCategoryEntry], item_name: str, amount: int
+    ) -> Optional[TransactionView]:
+        entry = user_entries.get(self.normalize_item_name(item_name))
+        if entry is None or amount <= 0:
+            return
+
+        category_enum = (
+            IncomeCategory
+            if entry.transaction_type == TransactionType.Income
+            else ExpenseCategory
+        )
+        try:
+            return TransactionView(
+                transaction_type=entry.transaction_type,
+                amount=amount,
+                item=TransactionItemView(
+                    name=item_name,
+                    description=entry.description,
+                    item_category=category_enum(entry.item_category),
+                ),
+            )
+        except ValueError as error:
+            logger.warning(f"[ITEM CATEGORY MEMORY] Invalid entry {entry}: {error}")
+            return
+
+    def recall(self, user_id: int, source_text: str) -> list[TransactionView]:
+        """
+        Returns the `TransactionView` objects for messages shaped like `<item name> <amount> [<item name> <amount> ...]`
+        when every item is already known for the user, otherwise an empty list so that the LLM handles the message.
+        """
+        user_entries = self._entries.get(user_id)
+        if user_entries is None:
+            return []
+
+        text = unicodedata.normalize("NFKC", source_text).strip(_STRIPPED_CHARACTERS)
+        views: list[TransactionView] = []
+        position = 0
+        while position < len(text):
+            match = _ITEM_PATTERN.match(text, position)
+            if match is None or match.end() == position:
+                return []
+            optional_view = self._recall_item(
+                user_entries, match.group("name").strip(), int(match.group("amount"))
+            )
+            if optional_view is None:
+                return []
+            views.append(optional_view)
+            position = match.end()
+        return views
@@ -1,8 +1,27 @@
+import time
+from typing import Iterable, Optional
+from uuid import UUID
+
 from sqlalchemy import Engine
 from sqlmodel import Session
 
+from money_saver_app.repository.models import ProcessedEvent
+from money_saver_app.repository.recorder_repository import ProcessedEventRepository
+
+from money_saver_app.service.money_saver.error_code import (
+    BackendOverloadedError,
+    PipelineCheckpointNotFoundError,
+    ResumablePipelineError,
+    UnableToParseViewRequestError,
+)
 from money_saver_app.service.money_saver.transaction_service import TransactionService
+from money_saver_app.service.money_saver.transaction_view_parser import (
+    TransactionViewParser,
+)
 from money_saver_app.service.money_saver.user_service import UserService
+from money_saver_app.service.pipeline_service.pipeline_checkpoint_service import (
+    PipelineCheckpointService,
+)
 from money_saver_app.service.pipeline_service.pipeline_impls.pipeline_factory import (
     TextPipelineFactory,
     VoicePipelineFactory,
@@ -11,9 +30,19 @@ from money_saver_app.service.pipeline_service.pipeline_impls.voice_pipeline_step
     MoneySaverPipelineContext,
     VoicePipelineContext,
 )
-from money_saver_app.service.voice_recognizer.voice_recognizer import VoiceRecognizer
+from money_saver_app.service.pipeline_service.pipeline_step import PipelineStep
+from money_saver_app.service.voice_recognizer.voice_recognizer import (
+    AudioSource,
+    VoiceRecognizer,
+)
+from money_saver_app.service.observability.structured_logging import (
+    LogCategory,
+    category_logger,
+)
 from smart_base_model.llm.large_language_model_base import LargeLanguageModelBase
 
+logger = category_logger(LogCategory.Pipeline)
+
 
 class MoneySaverService:
     """
@@ -21,8 +50,20 @@ class MoneySaverService:
     The MoneySaverService class is responsible for orchestrating the various services and components required to execute the voice pipeline, including the voice recognizer, transaction service, and large language model.
     The `execute_pipeline` method is the main entry point for processing user voice input.
     It creates a `VoicePipelineContext` object with the necessary dependencies, and then executes the pipeline steps defined by the `VoicePipelineFactory`.
+    All steps of a run share one pipeline-scoped `Session` (unit of work), which is committed once after the last step succeeds.
+    Retryable step failures are retried with a short, capped exponential backoff; if a retryable failure persists and there is a transcript
+    to resume from, the outputs of the completed steps are checkpointed and a `ResumablePipelineError` carrying the run id is raised,
+    so that `resume_pipeline` can continue from the failed step. Any other error (e.g. an undecodable or silent clip, an unknown user)
+    would fail again on resume and is raised as is.
+    A run given an `event_id` records it as a `ProcessedEvent` in the same commit as its transactions, so that
+    redelivered events can be skipped with `is_event_processed`. Likewise `resume_pipeline` deletes the checkpoint in the
+    commit of its transactions, so a run is saved once however often it is resumed.
     """
 
+    RETRYABLE_ERRORS = (UnableToParseViewRequestError, BackendOverloadedError)
+    # The retries run on the request/job worker, so the total wait must stay well below the client timeouts.
+    MAX_RETRY_DELAY_SECONDS = 2.0
+
     def __init__(
         self,
         engine: Engine,
@@ -31,7 +72,10 @@ class MoneySaverService:
         user_service: UserService,
         transaction_service: TransactionService,
         model_llm: LargeLanguageModelBase,
+        transaction_view_parser: TransactionViewParser,
         voice_recognizer: VoiceRecognizer,
+        checkpoint_service: PipelineCheckpointService,
+        processed_event_repo: ProcessedEventRepository,
     ) -> None:
         self.engine = engine
         self.voice_pipeline_factory = voice_pipeline_factory
@@ -39,37 +83,126 @@ class MoneySaverService:
         self.user_service = user_service
         self.transaction_service = transaction_service
         self.llm = model_llm
+        self.transaction_view_parser = transaction_view_parser
         self.voice_recognizer = voice_recognizer
+        self.checkpoint_service = checkpoint_service
+        self.processed_event_repo = processed_event_repo
+
+    def is_event_processed(self, event_id: UUID) -> bool:
+        return self.processed_event_repo.exists(event_id)
+
+    def _execute_step_with_retry(self, step: PipelineStep) -> None:
+        max_attempts = self.checkpoint_service.config["max_attempts"]
+        backoff_seconds = self.checkpoint_service.config["retry_backoff_seconds"]
+        for attempt in range(1, max_attempts + 1):
+            try:
+                step.execute()
+                return
+            except self.RETRYABLE_ERRORS as error:
+                if attempt >= max_attempts:
+                    raise
+                delay = min(
+                    backoff_seconds * 2 ** (attempt - 1), self.MAX_RETRY_DELAY_SECONDS
+                )
+                logger.warning(
+                    f"[PIPELINE RETRY] {step.__class__.__name__} failed ({error}), attempt {attempt}/{max_attempts}, retrying in {delay}s"
+                )
+                time.sleep(delay)
+
+    def _execute_steps(
+        self,
+        context: MoneySaverPipelineContext,
+        steps: Iterable[PipelineStep],
+        previous_attempts: int = 0,
+    ) -> None:
+        for step in steps:
+            try:
+                self._execute_step_with_retry(step)
+            except self.RETRYABLE_ERRORS as error:
+                if context.source_text is None:
+                    raise
+                self.checkpoint_service.save_checkpoint(
+                    context, step.__class__.__name__, previous_attempts + 1
+                )
+                raise ResumablePipelineError(context.run_id, error) from error
 
     def execute_voice_pipeline(
-        self, voice_bytes: bytes, user_id: int
+        self,
+        voice_audio: AudioSource,
+        user_id: int,
+        event_id: Optional[UUID] = None,
+        source_text: Optional[str] = None,
     ) -> VoicePipelineContext:
-        with Session(self.engine) as session:
+        """
+        A `source_text` already transcribed from `voice_audio` skips the transcription, the audio is then only
+        transcribed again if the transcript cannot be parsed.
+        """
+        with Session(self.engine, expire_on_commit=False) as session:
             context = VoicePipelineContext(
-                voice_bytes=voice_bytes,
+                voice_audio=voice_audio,
                 session=session,
                 user_id=user_id,
                 voice_recognizer=self.voice_recognizer,
                 transaction_service=self.transaction_service,
+                item_category_memory=self.transaction_service.item_category_memory,
                 llm=self.llm,
+                transaction_view_parser=self.transaction_view_parser,
+                source_text=source_text,
             )
             steps = self.voice_pipeline_factory.create_pipeline(context)
-            for step in steps:
-                step.execute()
+            self._execute_steps(context, steps)
+            if event_id is not None:
+                session.add(ProcessedEvent(id=event_id))
+            session.commit()
         return context
 
     def execute_text_pipeline(
-        self, source_text: str, user_id: int
+        self, source_text: str, user_id: int, event_id: Optional[UUID] = None
     ) -> MoneySaverPipelineContext:
-        with Session(self.engine) as session:
+        with Session(self.engine, expire_on_commit=False) as session:
             context = MoneySaverPipelineContext(
                 session=session,
                 user_id=user_id,
                 transaction_service=self.transaction_service,
+                item_category_memory=self.transaction_service.item_category_memory,
                 llm=self.llm,
+                transaction_view_parser=self.transaction_view_parser,
                 source_text=source_text,
             )
             steps = self.text_pipeline_factory.create_pipeline(context)
-            for step in steps:
-                step.execute()
+            self._execute_steps(context, steps)
+            if event_id is not None:
+                # a concurrent run of the same event fails this commit on the primary key, saving nothing
+                session.add(ProcessedEvent(id=event_id))
+            session.commit()
+        return context
+
+    def resume_pipeline(self, run_id: UUID, user_id: int) -> MoneySaverPipelineContext:
+        checkpoint = self.checkpoint_service.load_checkpoint(run_id, user_id)
+        if checkpoint.source_text is None:
+            self.checkpoint_service.delete_checkpoint(run_id)
+            raise PipelineCheckpointNotFoundError(run_id)
+
+        logger.info(
+            f"[PIPELINE RESUME] Run {run_id} resumes from {checkpoint.failed_step}"
+        )
+        with Session(self.engine, expire_on_commit=False) as session:
+            context = MoneySaverPipelineContext(
+                run_id=run_id,
+                session=session,
+                user_id=user_id,
+                transaction_service=self.transaction_service,
+                item_category_memory=self.transaction_service.item_category_memory,
+                llm=self.llm,
+                transaction_view_parser=self.transaction_view_parser,
+                source_text=checkpoint.source_text,
+                views=self.checkpoint_service.load_views(checkpoint),
+            )
+            steps = self.text_pipeline_factory.create_pipeline(context)
+            self._execute_steps(context, steps, checkpoint.attempts)
+            # deleted in the same commit as the transactions, a second resume (e.g. a redelivered postback) finds no row
+            if not self.checkpoint_service.claim_checkpoint(session, run_id):
+                session.rollback()
+                raise PipelineCheckpointNotFoundError(run_id)
+            session.commit()
         return context
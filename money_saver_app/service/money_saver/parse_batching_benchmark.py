@@ -0,0 +1,240 @@
+"""
+Compares the throughput of the `TransactionViewParser` with and without micro batching against a local fake LLM endpoint.
+
+`--requests` distinct messages are parsed from `--concurrency` threads, first with `max_batch_size` 1 (every message is its
+own LLM call) and then with the batch size and wait of the application config. The LLM is the application's `OpenAIModel`,
+pointed at a local OpenAI-compatible chat completion endpoint through `OPENAI_BASE_URL` (and `OPENAI_API_BASE`). The endpoint
+answers every message with one transaction after `--latency` seconds plus `--latency-per-message` seconds per message of the
+prompt, so a batch costs more than one message but less than one call per message, as with a real model.
+
+    python -m money_saver_app.service.money_saver.parse_batching_benchmark --requests 400 --concurrency 32 --latency 0.5 --latency-per-message 0.05
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, cast
+
+import numpy as np
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from money_saver_app.application.money_saver_application_config import (
+    MoneySaverApplicationConfig,
+)
+from money_saver_app.service.concurrency.concurrency_limiter import (
+    ConcurrencyLimitConfig,
+    ConcurrencyLimiter,
+)
+from money_saver_app.service.money_saver.transaction_view_parser import (
+    TransactionViewParser,
+    TransactionViewParserConfig,
+)
+from money_saver_app.service.money_saver.view_model_common import (
+    ExpenseCategory,
+    TransactionType,
+)
+from money_saver_app.service.money_saver.views import (
+    TransactionItemView,
+    TransactionView,
+)
+from smart_base_model.llm.llm_impls.openai_large_language_model import OpenAIModel
+
+BATCH_MARKER = '[{"request_id"'
+
+
+def _config_default(name: str) -> Any:
+    (config_field,) = [
+        field
+        for field in dataclasses.fields(MoneySaverApplicationConfig)
+        if field.name == name
+    ]
+    return cast(Callable[[], Any], config_field.default_factory)()
+
+
+def _transaction(text: str) -> dict[str, Any]:
+    return TransactionView(
+        transaction_type=TransactionType.Expense,
+        amount=60,
+        item=TransactionItemView(
+            name=text, description=text, item_category=ExpenseCategory.Dining
+        ),
+    ).model_dump(mode="json")
+
+
+def _find_batch(prompt: str) -> Optional[list[dict[str, str]]]:
+    """
+    The last JSON array of `{request_id, text}` objects in the prompt, the schema description may hold an example before it.
+    """
+    decoder = json.JSONDecoder()
+    index = prompt.rfind(BATCH_MARKER)
+    while index >= 0:
+        try:
+            batch, _ = decoder.raw_decode(prompt, index)
+            return batch
+        except ValueError:
+            index = prompt.rfind(BATCH_MARKER, 0, index)
+    return None
+
+
+class FakeChatCompletionServer:
+    """
+    A local stand-in for the OpenAI chat completion endpoint, answering a `TransactionViewBatch` for batched prompts
+    and a `TransactionListView` otherwise.
+    """
+
+    def __init__(self, latency_seconds: float, latency_per_message_seconds: float) -> None:
+        self.latency_seconds = latency_seconds
+        self.latency_per_message_seconds = latency_per_message_seconds
+        self.num_calls = 0
+        self.num_messages = 0
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._handle)
+        self._server = TestServer(app)
+
+    @property
+    def base_url(self) -> str:
+        return str(self._server.make_url("/v1"))
+
+    async def start(self) -> None:
+        await self._server.start_server()
+
+    async def close(self) -> None:
+        await self._server.close()
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        prompt = "\n".join(str(message.get("content", "")) for message in body["messages"])
+        optional_batch = _find_batch(prompt)
+        if optional_batch is None:
+            num_messages = 1
+            answer: dict[str, Any] = {"transactions": [_transaction("咖啡")]}
+        else:
+            num_messages = len(optional_batch)
+            answer = {
+                "results": [
+                    {
+                        "request_id": message["request_id"],
+                        "transactions": [_transaction(message["text"])],
+                    }
+                    for message in optional_batch
+                ]
+            }
+        self.num_calls += 1
+        self.num_messages += num_messages
+        await asyncio.sleep(
+            self.latency_seconds + self.latency_per_message_seconds * num_messages
+        )
+        return web.json_response(
+            {
+                "id": f"chatcmpl-{self.num_calls}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {
+                            "role": "assistant",
+                            "content": json.dumps(answer, ensure_ascii=False),
+                        },
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }
+        )
+
+
+async def run_parse_batching_benchmark(
+    mode: str,
+    parser_config: TransactionViewParserConfig,
+    llm_concurrency_config: ConcurrencyLimitConfig,
+    num_requests: int,
+    concurrency: int,
+    latency_seconds: float,
+    latency_per_message_seconds: float,
+) -> dict[str, Any]:
+    server = FakeChatCompletionServer(latency_seconds, latency_per_message_seconds)
+    await server.start()
+    os.environ["OPENAI_BASE_URL"] = os.environ["OPENAI_API_BASE"] = server.base_url
+    parser = TransactionViewParser(
+        OpenAIModel({"api_key": "benchmark", "model_name": "fake", "mode": "json"}),
+        parser_config,
+        ConcurrencyLimiter("LLM", llm_concurrency_config),
+    )
+    # distinct texts, so identical messages are not shared by the single flight
+    pending_texts = iter([f"咖啡{index}" for index in range(num_requests)])
+    latencies: list[float] = []
+    parsed: list[bool] = []
+
+    def send() -> None:
+        for text in pending_texts:
+            started_at = time.perf_counter()
+            parsed.append(bool(parser.parse(text)))
+            latencies.append(time.perf_counter() - started_at)
+
+    loop = asyncio.get_running_loop()
+    try:
+        with ThreadPoolExecutor(concurrency) as executor:
+            started_at = time.perf_counter()
+            await asyncio.gather(
+                *(loop.run_in_executor(executor, send) for _ in range(concurrency))
+            )
+            elapsed_seconds = time.perf_counter() - started_at
+    finally:
+        await server.close()
+
+    return {
+        "mode": mode,
+        "max_batch_size": parser_config["max_batch_size"],
+        "max_wait_ms": parser_config["max_wait_ms"],
+        "requests": num_requests,
+        "concurrency": concurrency,
+        "parsed": parsed.count(True),
+        "llm_calls": server.num_calls,
+        "average_batch_size": server.num_messages / max(1, server.num_calls),
+        "requests_per_second": num_requests / elapsed_seconds,
+        "p50_latency_seconds": float(np.percentile(latencies, 50)),
+        "p95_latency_seconds": float(np.percentile(latencies, 95)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--latency-per-message", type=float, default=0.05)
+    args = parser.parse_args()
+
+    batched_config: TransactionViewParserConfig = _config_default(
+        "transaction_view_parser_config"
+    )
+    modes = {
+        "unbatched": TransactionViewParserConfig(max_batch_size=1, max_wait_ms=0),
+        "batched": batched_config,
+    }
+    reports = [
+        asyncio.run(
+            run_parse_batching_benchmark(
+                mode,
+                parser_config,
+                _config_default("llm_concurrency_config"),
+                args.requests,
+                args.concurrency,
+                args.latency,
+                args.latency_per_message,
+            )
+        )
+        for mode, parser_config in modes.items()
+    ]
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,31 @@
 import datetime
+import threading
+from contextlib import nullcontext
 from typing import Any, Iterable, Optional
 from uuid import UUID
 
-
+from loguru import logger
 from pydantic import BaseModel, Field, computed_field
-from sqlalchemy import Engine
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session
 
 from money_saver_app.repository.models import (
+    ItemCategoryRejection,
     Transaction,
     TransactionItem,
     TransactionRead,
 )
 from money_saver_app.repository.recorder_repository import (
+    ItemCategoryRejectionRepository,
     TransactionRepository,
     UserRepository,
 )
 from money_saver_app.service.money_saver.error_code import UserNotFoundError
+from money_saver_app.service.money_saver.item_category_memory import (
+    ItemCategoryHistory,
+    ItemCategoryMemory,
+)
 from money_saver_app.service.money_saver.view_model_common import TransactionType
 from money_saver_app.service.money_saver.views import TransactionView
 
@@ -96,6 +105,8 @@ class TransactionService:
         sql_engine (Engine): The SQLAlchemy engine used for database connections.
         user_repo (UserRepository): The repository for managing user data.
         transaction_repo (TransactionRepository): The repository for managing transaction data.
+        item_category_memory (ItemCategoryMemory): The per-user item memory updated on every saved transaction.
+        item_category_rejection_repo (ItemCategoryRejectionRepository): The persisted negative feedback of the item memory.
 
     Raises:
         UserNotFoundError: If the user associated with the transaction is not found.
@@ -109,35 +120,104 @@ class TransactionService:
         sql_engine: Engine,
         user_repo: UserRepository,
         transaction_repo: TransactionRepository,
+        item_category_memory: ItemCategoryMemory,
+        item_category_rejection_repo: ItemCategoryRejectionRepository,
     ) -> None:
         self.engine = sql_engine
         self.user_repo = user_repo
         self.transaction_repo = transaction_repo
+        self.item_category_memory = item_category_memory
+        self.item_category_rejection_repo = item_category_rejection_repo
+
+    def load_item_category_memory(self) -> None:
+        self.item_category_memory.load(
+            (
+                ItemCategoryHistory._make(history)
+                for history in self.transaction_repo.iterate_all_item_histories()
+            ),
+            self.item_category_rejection_repo.find_latest_rejections,
+        )
 
-    def save_transaction_view(
-        self, user_id: int, view: TransactionView
-    ) -> Optional[TransactionRead]:
-        with Session(self.engine) as session:
-            user = self.user_repo.find_by_id(user_id, session)
-            if user is None:
-                raise UserNotFoundError(user_id)
-            item = TransactionItem(
-                name=view.item.name,
-                description=view.item.description,
-                item_category=view.item.item_category,
+    def load_item_category_memory_in_background(self) -> threading.Thread:
+        """
+        Loads the item memory on a daemon thread so that startup does not wait on the whole transaction history.
+        """
+
+        def load() -> None:
+            try:
+                self.load_item_category_memory()
+            except Exception as error:
+                logger.exception(error)
+
+        thread = threading.Thread(target=load, name="item-category-memory", daemon=True)
+        thread.start()
+        return thread
+
+    def forget_item_category(self, user_id: int, item_name: str) -> bool:
+        """
+        Drops the item from the user's memory and persists the rejection, so it is not rebuilt from history on restart.
+        """
+        self.item_category_rejection_repo.save(
+            ItemCategoryRejection(
+                user_id=user_id,
+                item_name=ItemCategoryMemory.normalize_item_name(item_name),
             )
-            transaction = Transaction(
+        )
+        return self.item_category_memory.forget(user_id, item_name)
+
+    def save_transaction_views(
+        self,
+        user_id: int,
+        views: list[TransactionView],
+        session: Optional[Session] = None,
+        is_commit: bool = True,
+    ) -> list[TransactionRead]:
+        """
+        Persists all transaction views of one message with one batched insert per table.
+
+        The user is referenced by id without being loaded (the foreign key, enforced on SQLite as well, guards its existence), and every column is
+        generated client side, so the returned reads are built from the inserted rows without a refresh round trip.
+        When a pipeline-scoped `session` is given, the caller owns the commit and the item memory is updated once it commits.
+        """
+        transactions = [
+            Transaction(
                 transaction_type=view.transaction_type,
                 amount=view.amount,
-                user=user,
-                item=item,
+                user_id=user_id,
+                item=TransactionItem(
+                    name=view.item.name,
+                    description=view.item.description,
+                    item_category=view.item.item_category,
+                ),
             )
-
-            session.add(transaction)
-            session.commit()
-            session.refresh(transaction)
-
-            return transaction.as_read()
+            for view in views
+        ]
+
+        def remember_views(*_: Any) -> None:
+            for view in views:
+                self.item_category_memory.remember_view(user_id, view)
+
+        with (
+            Session(self.engine, expire_on_commit=False)
+            if session is None
+            else nullcontext(session)
+        ) as session:
+            try:
+                session.add_all(transactions)
+                session.flush()
+            except IntegrityError as error:
+                session.rollback()
+                if "foreign key" not in str(error.orig).lower():
+                    raise
+                raise UserNotFoundError(user_id) from error
+
+            if is_commit:
+                session.commit()
+                remember_views()
+            else:
+                event.listen(session, "after_commit", remember_views, once=True)
+
+            return [transaction.as_read() for transaction in transactions]
 
     def _convert_to_transaction_set(
         self, transactions: Iterable[Transaction]
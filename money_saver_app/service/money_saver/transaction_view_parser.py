@@ -0,0 +1,137 @@
+import json
+import uuid
+from collections import Counter
+from typing import TypedDict, Union
+
+from loguru import logger
+
+from money_saver_app.service.concurrency.concurrency_limiter import ConcurrencyLimiter
+from money_saver_app.service.concurrency.micro_batcher import MicroBatcher
+from money_saver_app.service.concurrency.single_flight import SingleFlight
+from money_saver_app.service.money_saver.error_code import ErrorCodeWithError
+from money_saver_app.service.money_saver.views import (
+    TransactionListView,
+    TransactionView,
+    TransactionViewBatch,
+)
+from smart_base_model.llm.large_language_model_base import LargeLanguageModelBase
+
+
+class TransactionViewParserConfig(TypedDict):
+    max_batch_size: int
+    max_wait_ms: int
+
+
+class TransactionViewParser:
+    """
+    Parses source texts into lists of `TransactionView` objects (one message may hold several transactions),
+    batching concurrent requests into a single LLM call. An empty list means the message could not be parsed.
+
+    Requests arriving within `max_wait_ms` of each other (up to `max_batch_size`) are sent as one prompt holding a JSON
+    array of `{request_id, text}` objects, and the LLM answers with a `TransactionViewBatch` keyed by those ids.
+    Request ids are random per batch and JSON escaping keeps a message inside its own object, so that the text of one
+    user can neither spoof nor leak into the result of another.
+    Any message missing from the batch answer or answered more than once, or the whole batch when it cannot be parsed,
+    is retried with an individual `TransactionListView.model_ask` call so that one bad element never fails its neighbours.
+    Identical texts parsed concurrently share one result, and every LLM call goes through the `llm_limiter`.
+    An `ErrorCodeWithError` (e.g. the limiter shedding a call) only fails the request it happened to.
+    """
+
+    def __init__(
+        self,
+        model_llm: LargeLanguageModelBase,
+        config: TransactionViewParserConfig,
+        llm_limiter: ConcurrencyLimiter,
+    ) -> None:
+        self.llm = model_llm
+        self.llm_limiter = llm_limiter
+        self.single_flight = SingleFlight[list[TransactionView]](
+            "transaction-view-parser"
+        )
+        self.batcher = MicroBatcher[str, Union[list[TransactionView], ErrorCodeWithError]](
+            "transaction-view-parser",
+            self._parse_batch,
+            config["max_batch_size"],
+            config["max_wait_ms"],
+        )
+
+    def _parse_in_batch(self, source_text: str) -> list[TransactionView]:
+        result = self.batcher.execute(source_text)
+        if isinstance(result, ErrorCodeWithError):
+            raise result
+        return result
+
+    def parse(self, source_text: str) -> list[TransactionView]:
+        return self.single_flight.do(
+            SingleFlight.hash_key(source_text),
+            lambda: self._parse_in_batch(source_text),
+        )
+
+    def _parse_single(self, source_text: str) -> list[TransactionView]:
+        try:
+            with self.llm_limiter.acquire():
+                optional_list_view = TransactionListView.model_ask(
+                    source_text, self.llm
+                )
+        except ErrorCodeWithError:
+            raise
+        except Exception as error:
+            logger.exception(error)
+            return []
+
+        if optional_list_view is None:
+            return []
+        return optional_list_view.transactions
+
+    def _parse_single_or_error(
+        self, source_text: str
+    ) -> Union[list[TransactionView], ErrorCodeWithError]:
+        try:
+            return self._parse_single(source_text)
+        except ErrorCodeWithError as error:
+            return error
+
+    def _parse_batch(
+        self, source_texts: list[str]
+    ) -> list[Union[list[TransactionView], ErrorCodeWithError]]:
+        if len(source_texts) == 1:
+            return [self._parse_single_or_error(source_texts[0])]
+
+        request_ids = [uuid.uuid4().hex[:8] for _ in source_texts]
+        prompt = json.dumps(
+            [
+                {"request_id": request_id, "text": source_text}
+                for request_id, source_text in zip(request_ids, source_texts)
+            ],
+            ensure_ascii=False,
+        )
+        try:
+            with self.llm_limiter.acquire():
+                optional_batch = TransactionViewBatch.model_ask(prompt, self.llm)
+        except Exception as error:
+            logger.exception(error)
+            optional_batch = None
+
+        views_by_request_id: dict[str, list[TransactionView]] = {}
+        if optional_batch is not None:
+            id_counts = Counter(result.request_id for result in optional_batch.results)
+            if set(id_counts) != set(request_ids) or len(optional_batch.results) != len(
+                request_ids
+            ):
+                logger.warning(
+                    f"[LLM BATCH] Answer ids {dict(id_counts)} do not match the {len(request_ids)} requests"
+                )
+            # only ids answered exactly once are trusted, the rest is parsed on its own
+            views_by_request_id = {
+                result.request_id: result.transactions
+                for result in optional_batch.results
+                if result.transactions and id_counts[result.request_id] == 1
+            }
+        logger.info(
+            f"[LLM BATCH] Parsed {len(views_by_request_id)}/{len(source_texts)} messages in one request"
+        )
+
+        return [
+            views_by_request_id.get(request_id) or self._parse_single_or_error(source_text)
+            for request_id, source_text in zip(request_ids, source_texts)
+        ]
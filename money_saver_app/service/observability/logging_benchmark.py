@@ -0,0 +1,222 @@
+"""
+Measures the requests/sec of the LINE webhook callback with logging off, with the production logging config and with every category unsampled at DEBUG.
+
+The real `LineController` callback is served in-process: the body is a signed webhook with `--events` text messages, and
+the events are enqueued into a `DurableJobQueue` on a fresh SQLite DB per mode. The queue is not started, so only the
+webhook path is measured, including the SQL statements of the enqueue, which are logged in the unsampled mode.
+`--requests` requests are sent from `--concurrency` concurrent clients through an ASGI transport, so no socket is involved.
+
+    python -m money_saver_app.service.observability.logging_benchmark --requests 2000 --concurrency 32 --events 1
+"""
+
+import argparse
+import asyncio
+import base64
+import dataclasses
+import hashlib
+import hmac
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Callable, Optional, Union, cast
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from linebot import WebhookParser
+from loguru import logger
+
+from money_saver_app.application.money_saver_application_config import (
+    MoneySaverApplicationConfig,
+)
+from money_saver_app.controller.external.line.line_controller import LineController
+from money_saver_app.repository.recorder_repository import JobRepository
+from money_saver_app.repository.sql_crud_repository import SQLCrudRepository
+from money_saver_app.service.external.line.line_models import MessageContext
+from money_saver_app.service.job_queue.durable_job_queue import (
+    DurableJobQueue,
+    DurableJobQueueConfig,
+)
+from money_saver_app.service.observability.structured_logging import (
+    LoggingConfig,
+    configure_logging,
+)
+from smart_base_model.messaging.behavior_subject import BehaviorSubject
+
+CHANNEL_SECRET = "benchmark-secret"
+CALLBACK_PATH = "/api/public/line/callback"
+
+
+def _production_logging_config(directory: str) -> LoggingConfig:
+    (logging_field,) = [
+        field
+        for field in dataclasses.fields(MoneySaverApplicationConfig)
+        if field.name == "logging_config"
+    ]
+    config = cast(Callable[[], LoggingConfig], logging_field.default_factory)()
+    config["file_path"] = os.path.join(directory, "server.log")
+    return config
+
+
+def _unsampled_logging_config(directory: str) -> LoggingConfig:
+    return LoggingConfig(
+        level="DEBUG",
+        file_path=os.path.join(directory, "server.log"),
+        rotation="1 day",
+        retention="1 day",
+        category_levels={"sql": "INFO", "line": "DEBUG", "pipeline": "DEBUG"},
+        sample_rates={},
+    )
+
+
+def _disable_logging() -> None:
+    logger.remove()
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+
+def _create_webhook_body(num_events: int) -> bytes:
+    return json.dumps(
+        {
+            "destination": "Ubenchmark",
+            "events": [
+                {
+                    "type": "message",
+                    "mode": "active",
+                    "timestamp": 1700000000000,
+                    "webhookEventId": f"event-{index}",
+                    "deliveryContext": {"isRedelivery": False},
+                    "replyToken": f"reply-token-{index}",
+                    "source": {"type": "user", "userId": f"U{index}"},
+                    "message": {"type": "text", "id": str(index), "text": "咖啡60"},
+                }
+                for index in range(num_events)
+            ],
+        }
+    ).encode("utf-8")
+
+
+def _sign(body: bytes) -> str:
+    digest = hmac.new(CHANNEL_SECRET.encode("utf-8"), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode("utf-8")
+
+
+def _create_app(directory: str) -> FastAPI:
+    engine = SQLCrudRepository.create_all_tables(
+        f"sqlite:///{os.path.join(directory, 'logging_benchmark.db')}"
+    )
+    job_queue = DurableJobQueue(
+        "line",
+        JobRepository(engine),
+        DurableJobQueueConfig(
+            num_workers=1,
+            lease_seconds=60,
+            poll_interval_seconds=1,
+            max_attempts=1,
+            retry_backoff_seconds=1,
+            max_retry_backoff_seconds=1,
+            shutdown_timeout_seconds=1,
+        ),
+    )
+    # only the webhook parser and the job queue are used by the callback
+    unused: Any = None
+    controller = LineController(
+        unused,
+        unused,
+        unused,
+        "/api/public/line",
+        unused,
+        unused,
+        unused,
+        unused,
+        unused,
+        WebhookParser(CHANNEL_SECRET),
+        BehaviorSubject[MessageContext[Union[str, bytes]]](),
+        job_queue,
+    )
+    app = FastAPI()
+    app.include_router(controller.register_routes())
+    return app
+
+
+async def _send_requests(
+    app: FastAPI, body: bytes, num_requests: int, concurrency: int
+) -> tuple[float, list[float]]:
+    headers = {"X-Line-Signature": _sign(body), "Content-Type": "application/json"}
+    pending_requests = iter(range(num_requests))
+    latencies: list[float] = []
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://benchmark"
+    ) as client:
+
+        async def send() -> None:
+            for _ in pending_requests:
+                started_at = time.perf_counter()
+                response = await client.post(CALLBACK_PATH, content=body, headers=headers)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started_at)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(send() for _ in range(concurrency)))
+        elapsed_seconds = time.perf_counter() - started_at
+    return elapsed_seconds, latencies
+
+
+def run_logging_benchmark(
+    mode: str,
+    create_logging_config: Optional[Callable[[str], LoggingConfig]],
+    num_requests: int,
+    concurrency: int,
+    num_events: int,
+) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        if create_logging_config is None:
+            _disable_logging()
+        else:
+            configure_logging(create_logging_config(directory))
+        app = _create_app(directory)
+        body = _create_webhook_body(num_events)
+        try:
+            elapsed_seconds, latencies = asyncio.run(
+                _send_requests(app, body, num_requests, concurrency)
+            )
+        finally:
+            # waits for the enqueued sinks to drain before the directory is removed
+            _disable_logging()
+
+    return {
+        "mode": mode,
+        "requests": num_requests,
+        "concurrency": concurrency,
+        "events_per_request": num_events,
+        "requests_per_second": num_requests / elapsed_seconds,
+        "p50_latency_seconds": float(np.percentile(latencies, 50)),
+        "p95_latency_seconds": float(np.percentile(latencies, 95)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--events", type=int, default=1)
+    args = parser.parse_args()
+
+    modes: dict[str, Optional[Callable[[str], LoggingConfig]]] = {
+        "off": None,
+        "production": _production_logging_config,
+        "unsampled": _unsampled_logging_config,
+    }
+    reports = [
+        run_logging_benchmark(
+            mode, create_logging_config, args.requests, args.concurrency, args.events
+        )
+        for mode, create_logging_config in modes.items()
+    ]
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import logging
+import random
+import sys
+from enum import Enum
+from typing import TYPE_CHECKING, Any, TypedDict
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from loguru import Logger, Record
+
+
+class LogCategory(str, Enum):
+    App = "app"
+    SQL = "sql"
+    Line = "line"
+    Pipeline = "pipeline"
+
+
+class LoggingConfig(TypedDict):
+    level: str
+    file_path: str
+    rotation: str
+    retention: str
+    category_levels: dict[str, str]
+    sample_rates: dict[str, float]
+
+
+def category_logger(category: LogCategory) -> "Logger":
+    """
+    A logger whose records carry `category`, so that `configure_logging` can apply the category level and sampling rate.
+    """
+    return logger.bind(category=category.value)
+
+
+class _InterceptHandler(logging.Handler):
+    """
+    Forwards standard `logging` records (SQLAlchemy) to loguru under the SQL category.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._logger = category_logger(LogCategory.SQL)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            level: Any = self._logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        self._logger.opt(exception=record.exc_info).log(level, record.getMessage())
+
+
+def configure_logging(config: LoggingConfig) -> None:
+    """
+    Replaces the default loguru sink with a console sink and a JSON file sink, both enqueued so that callers never wait
+    on I/O. Records are filtered by the level of their category (`config["level"]` for the rest) and records below
+    WARNING of a category with a sampling rate are only kept with that probability.
+    Use `logger.opt(lazy=True)` with callables as arguments for expensive messages: they are only evaluated when a sink
+    accepts the level.
+    """
+    default_level_no = logger.level(config["level"]).no
+    category_level_nos = {
+        category: logger.level(level).no
+        for category, level in config["category_levels"].items()
+    }
+    sample_rates = config["sample_rates"]
+    warning_level_no = logger.level("WARNING").no
+
+    def filter_record(record: "Record") -> bool:
+        category = record["extra"].get("category", LogCategory.App.value)
+        level_no = record["level"].no
+        if level_no < category_level_nos.get(category, default_level_no):
+            return False
+        sample_rate = sample_rates.get(category)
+        if sample_rate is None or level_no >= warning_level_no:
+            return True
+        return random.random() < sample_rate
+
+    min_level_no = min([default_level_no, *category_level_nos.values()])
+    logger.remove()
+    logger.add(sys.stderr, level=min_level_no, filter=filter_record, enqueue=True)
+    logger.add(
+        config["file_path"],
+        level=min_level_no,
+        filter=filter_record,
+        serialize=True,
+        enqueue=True,
+        rotation=config["rotation"],
+        retention=config["retention"],
+    )
+
+    # SQLAlchemy logs statements at INFO, below the SQL level they are never formatted
+    sql_level_no = category_level_nos.get(LogCategory.SQL.value, default_level_no)
+    sqlalchemy_logger = logging.getLogger("sqlalchemy.engine")
+    sqlalchemy_logger.handlers = [_InterceptHandler()]
+    sqlalchemy_logger.propagate = False
+    sqlalchemy_logger.setLevel(
+        logging.INFO if sql_level_no <= logger.level("INFO").no else logging.WARNING
+    )
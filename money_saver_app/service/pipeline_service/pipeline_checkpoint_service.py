@@ -0,0 +1,97 @@
+import datetime
+from typing import TypedDict
+from uuid import UUID
+
+from pydantic import TypeAdapter
+from sqlmodel import Session
+
+from money_saver_app.repository.models import PipelineCheckpoint
+from money_saver_app.repository.recorder_repository import (
+    PipelineCheckpointRepository,
+)
+from money_saver_app.service.money_saver.error_code import (
+    PipelineCheckpointNotFoundError,
+)
+from money_saver_app.service.money_saver.views import TransactionView
+from money_saver_app.service.observability.structured_logging import (
+    LogCategory,
+    category_logger,
+)
+from money_saver_app.service.pipeline_service.pipeline_impls.voice_pipeline_step import (
+    MoneySaverPipelineContext,
+)
+
+logger = category_logger(LogCategory.Pipeline)
+
+
+class PipelineCheckpointConfig(TypedDict):
+    ttl_seconds: int
+    max_attempts: int
+    retry_backoff_seconds: float
+
+
+_TRANSACTION_VIEWS_ADAPTER = TypeAdapter(list[TransactionView])
+
+
+class PipelineCheckpointService:
+    """
+    Stores the outputs of the completed steps (transcript, views) of failed pipeline runs, keyed by run id,
+    so that a retry can resume from the first failed step instead of transcribing the audio again.
+    Checkpoints expire after `ttl_seconds` and expired rows are purged whenever a new checkpoint is written.
+    A resume claims its checkpoint with `claim_checkpoint` in the session that saves its transactions, so only one
+    of several concurrent or repeated resumes of a run commits.
+    """
+
+    def __init__(
+        self,
+        checkpoint_repo: PipelineCheckpointRepository,
+        config: PipelineCheckpointConfig,
+    ) -> None:
+        self.checkpoint_repo = checkpoint_repo
+        self.config = config
+
+    def _now(self) -> datetime.datetime:
+        return datetime.datetime.now(datetime.timezone.utc)
+
+    def save_checkpoint(
+        self, context: MoneySaverPipelineContext, failed_step: str, attempts: int
+    ) -> PipelineCheckpoint:
+        self.purge_expired()
+        checkpoint = PipelineCheckpoint(
+            id=context.run_id,
+            user_id=context.user_id,
+            source_text=context.source_text,
+            views_json=_TRANSACTION_VIEWS_ADAPTER.dump_json(context.views).decode()
+            if context.views
+            else None,
+            failed_step=failed_step,
+            attempts=attempts,
+            expires_at=self._now()
+            + datetime.timedelta(seconds=self.config["ttl_seconds"]),
+        )
+        logger.info(
+            f"[PIPELINE CHECKPOINT] Run {context.run_id} failed at {failed_step}, attempts: {attempts}"
+        )
+        return self.checkpoint_repo.merge(checkpoint)
+
+    def load_checkpoint(self, run_id: UUID, user_id: int) -> PipelineCheckpoint:
+        optional_checkpoint = self.checkpoint_repo.find_unexpired_checkpoint_by_id(
+            run_id, self._now()
+        )
+        if optional_checkpoint is None or optional_checkpoint.user_id != user_id:
+            raise PipelineCheckpointNotFoundError(run_id)
+        return optional_checkpoint
+
+    def load_views(self, checkpoint: PipelineCheckpoint) -> list[TransactionView]:
+        if checkpoint.views_json is None:
+            return []
+        return _TRANSACTION_VIEWS_ADAPTER.validate_json(checkpoint.views_json)
+
+    def claim_checkpoint(self, session: Session, run_id: UUID) -> bool:
+        return self.checkpoint_repo.claim(session, run_id)
+
+    def delete_checkpoint(self, run_id: UUID) -> bool:
+        return self.checkpoint_repo.delete_by_id(run_id)
+
+    def purge_expired(self) -> int:
+        return self.checkpoint_repo.delete_all_expired(self._now())
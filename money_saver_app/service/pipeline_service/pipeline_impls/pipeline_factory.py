@@ -3,9 +3,11 @@ from typing import Iterable
 
 from money_saver_app.service.pipeline_service.pipeline_impls.voice_pipeline_step import (
     MoneySaverPipelineContext,
-    StepTextToTransactionView,
-    StepTransactionVivePersistence,
+    StepItemCategoryRecall,
+    StepTextToTransactionListView,
+    StepTransactionListViewPersistence,
     StepVoiceParsing,
+    StepVoiceTextToTransactionListView,
     VoicePipelineContext,
 )
 from money_saver_app.service.pipeline_service.pipeline_step import (
@@ -23,8 +25,9 @@ class VoicePipelineFactory(PipelineFactory):
     def create_pipeline(self, context: VoicePipelineContext) -> Iterable[PipelineStep]:
         return [
             StepVoiceParsing(context),
-            StepTextToTransactionView(context),
-            StepTransactionVivePersistence(context),
+            StepItemCategoryRecall(context),
+            StepVoiceTextToTransactionListView(context),
+            StepTransactionListViewPersistence(context),
         ]
 
 
@@ -33,8 +36,9 @@ class TextPipelineFactory(PipelineFactory):
         self, context: MoneySaverPipelineContext
     ) -> Iterable[PipelineStep]:
         return [
-            StepTextToTransactionView(context),
-            StepTransactionVivePersistence(context),
+            StepItemCategoryRecall(context),
+            StepTextToTransactionListView(context),
+            StepTransactionListViewPersistence(context),
         ]
 
 
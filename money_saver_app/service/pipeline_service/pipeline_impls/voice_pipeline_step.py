@@ -1,6 +1,7 @@
 from typing import Optional
+from uuid import UUID, uuid4
 
-from pydantic import Field
+from pydantic import Field, SkipValidation
 from sqlmodel import Session
 
 from money_saver_app.repository.models import TransactionRead
@@ -9,13 +10,20 @@ from money_saver_app.service.money_saver.error_code import (
     TransactionViewNotFoundError,
     UnableToParseViewRequestError,
 )
+from money_saver_app.service.money_saver.item_category_memory import ItemCategoryMemory
 from money_saver_app.service.money_saver.transaction_service import TransactionService
+from money_saver_app.service.money_saver.transaction_view_parser import (
+    TransactionViewParser,
+)
 from money_saver_app.service.money_saver.views import TransactionView
 from money_saver_app.service.pipeline_service.pipeline_step import (
     PipelineContext,
     PipelineStep,
 )
-from money_saver_app.service.voice_recognizer.voice_recognizer import VoiceRecognizer
+from money_saver_app.service.voice_recognizer.voice_recognizer import (
+    AudioSource,
+    VoiceRecognizer,
+)
 from smart_base_model.llm.large_language_model_base import LargeLanguageModelBase
 
 
@@ -24,14 +32,20 @@ class MoneySaverPipelineContext(PipelineContext):
     Represents the base context for a pipeline step in the money saver application.
     """
 
+    run_id: UUID = Field(default_factory=uuid4)
     user_id: int
     session: Session = Field(exclude=True)
     llm: LargeLanguageModelBase = Field(exclude=True)
+    transaction_view_parser: TransactionViewParser = Field(exclude=True)
     transaction_service: TransactionService = Field(exclude=True)
-    view: Optional[TransactionView] = None
+    item_category_memory: ItemCategoryMemory = Field(exclude=True)
+    views: list[TransactionView] = Field(default_factory=list)
+    is_recalled: bool = False
     is_saved: bool = False
     source_text: Optional[str] = None
-    transaction_read: Optional[TransactionRead] = Field(default=None, exclude=True)
+    transaction_reads: list[TransactionRead] = Field(
+        default_factory=list, exclude=True
+    )
 
 
 class VoicePipelineContext(MoneySaverPipelineContext):
@@ -39,17 +53,18 @@ class VoicePipelineContext(MoneySaverPipelineContext):
     Represents the context for a voice pipeline step in the money saver application.
 
     Attributes:
-        voice_bytes (bytes): The bytes of the voice data.
+        voice_audio (AudioSource): The voice data, raw bytes or a seekable buffer that is passed through without copying.
         session (Session): The SQLModel session for the database.
         user_id (Optional[int]): The optional user ID associated with the voice data.
         source_text (Optional[str]): The optional transcribed text from the voice data.
     """
 
-    voice_bytes: bytes = Field(exclude=True)
+    voice_audio: SkipValidation[AudioSource] = Field(exclude=True)
     voice_recognizer: VoiceRecognizer = Field(exclude=True)
+    is_escalated: bool = False
 
     def __str__(self) -> str:
-        return f"VoicePipelineContext(user_id={self.user_id}, source_text={self.source_text}, is_saved={self.is_saved}, view={self.view}, llm={self.llm.__class__.__name__}, voice_recognizer={self.voice_recognizer.__class__.__name__})"
+        return f"VoicePipelineContext(user_id={self.user_id}, source_text={self.source_text}, is_saved={self.is_saved}, views={self.views}, llm={self.llm.__class__.__name__}, voice_recognizer={self.voice_recognizer.__class__.__name__})"
 
 
 class StepVoiceParsing(PipelineStep[VoicePipelineContext]):
@@ -58,6 +73,7 @@ class StepVoiceParsing(PipelineStep[VoicePipelineContext]):
 
     This step takes the voice data from the `VoicePipelineContext` and uses a `VoiceRecognizer` to transcribe the audio to text.
     The transcribed text is then stored in the `VoicePipelineContext` for use in subsequent pipeline steps.
+    A context that already holds the transcript (e.g. a LINE voice message transcribed to pick the assistant action) is not transcribed again.
 
     Args:
         context (VoicePipelineContext): The context for the voice pipeline step.
@@ -72,54 +88,130 @@ class StepVoiceParsing(PipelineStep[VoicePipelineContext]):
         self.voice_recognizer = context.voice_recognizer
 
     def execute(self) -> None:
-        voice_bytes = self.context.voice_bytes
-        text = self.voice_recognizer.recognize(voice_bytes)
+        if self.context.source_text is not None:
+            return
+        text = self.voice_recognizer.recognize(self.context.voice_audio)
         self.context.source_text = text
 
 
-class StepTextToTransactionView(PipelineStep[MoneySaverPipelineContext]):
+class StepItemCategoryRecall(PipelineStep[MoneySaverPipelineContext]):
     """
-    Represents a pipeline step that generates a transaction view from the transcribed voice data.
+    Represents a pipeline step that fills the transaction views from the user's item memory.
 
-    This step takes the transcribed text from the `VoicePipelineContext` and uses a large language model (LLM) to generate a `TransactionView` object. The generated `TransactionView` is then stored in the `VoicePipelineContext` for use in subsequent pipeline steps.
+    When the source text only holds repeat purchases (`<item name> <amount>` with items the user has logged before),
+    the `TransactionView` objects are built from the `ItemCategoryMemory` and the LLM is skipped by the next step.
 
     Args:
-        context (VoicePipelineContext): The context for the voice pipeline step.
-        llm (LargeLanguageModelBase): The large language model to use for generating the transaction view.
+        context (MoneySaverPipelineContext): The context for the pipeline step.
+
+    Raises:
+        None
+    """
+
+    def __init__(self, context: MoneySaverPipelineContext) -> None:
+        self.context = context
+        self.item_category_memory = context.item_category_memory
+
+    def execute(self) -> None:
+        optional_text = self.context.source_text
+        if optional_text is None or self.context.views:
+            return
+
+        views = self.item_category_memory.recall(self.context.user_id, optional_text)
+        if not views:
+            return
+
+        self.context.views = views
+        self.context.is_recalled = True
+
+
+class StepTextToTransactionListView(PipelineStep[MoneySaverPipelineContext]):
+    """
+    Represents a pipeline step that extracts every transaction mentioned in the transcribed voice data or text.
+
+    This step takes the source text from the `MoneySaverPipelineContext` and uses a large language model (LLM) to generate a list of `TransactionView` objects in one pass,
+    so that an utterance such as "早餐50 午餐120 飲料45" yields three transactions. The views are then stored in the context for use in subsequent pipeline steps.
+    Requests go through the `TransactionViewParser`, which batches concurrent messages into one LLM call.
+
+    Args:
+        context (MoneySaverPipelineContext): The context for the pipeline step.
+        transaction_view_parser (TransactionViewParser): The parser to use for generating the transaction views.
     Raises:
         OptionalTextMissingError: If the transcribed text is not available in the context.
-        TransactionViewNotFoundError: If the LLM fails to generate a valid transaction view.
+        UnableToParseViewRequestError: If the LLM fails to generate any valid transaction view.
     """
 
     def __init__(self, context: MoneySaverPipelineContext) -> None:
         self.context = context
-        self.llm = context.llm
+        self.transaction_view_parser = context.transaction_view_parser
 
     def execute(self) -> None:
+        if self.context.views:
+            return
+
         optional_text = self.context.source_text
         if optional_text is None:
             raise OptionalTextMissingError()
 
-        optional_view = TransactionView.model_ask(optional_text, self.llm)
-        if optional_view is None:
+        views = self.transaction_view_parser.parse(optional_text)
+        if not views:
             raise UnableToParseViewRequestError(optional_text)
 
-        self.context.view = optional_view
+        self.context.views = views
 
 
-class StepTransactionVivePersistence(PipelineStep[MoneySaverPipelineContext]):
+class StepVoiceTextToTransactionListView(StepTextToTransactionListView):
     """
-    Represents a pipeline step that persists the transaction view generated from the transcribed voice data.
+    Represents the `StepTextToTransactionListView` of the voice pipeline, which escalates the transcription once when parsing fails.
 
-    This step takes the transaction view from the `VoicePipelineContext` and saves it to the `MoneySaverService`.
-    The user ID is retrieved from the token in the context.
+    When no transaction can be parsed from the transcript, the audio is transcribed again with a bigger model
+    (`VoiceRecognizer.recognize_escalated`) and the new transcript is parsed. Recognizers without a bigger model return None,
+    in which case the original `UnableToParseViewRequestError` is raised.
 
     Args:
         context (VoicePipelineContext): The context for the voice pipeline step.
-        money_saver_service (MoneySaverService): The service to use for saving the transaction view.
 
     Raises:
-        None
+        OptionalTextMissingError: If the transcribed text is not available in the context.
+        UnableToParseViewRequestError: If neither transcript yields any valid transaction view.
+    """
+
+    def __init__(self, context: VoicePipelineContext) -> None:
+        super().__init__(context)
+        self.context: VoicePipelineContext = context
+
+    def execute(self) -> None:
+        try:
+            super().execute()
+            return
+        except UnableToParseViewRequestError:
+            if self.context.is_escalated:
+                raise
+            self.context.is_escalated = True
+            optional_text = self.context.voice_recognizer.recognize_escalated(
+                self.context.voice_audio
+            )
+            if optional_text is None or optional_text == self.context.source_text:
+                raise
+
+        self.context.source_text = optional_text
+        super().execute()
+
+
+class StepTransactionListViewPersistence(PipelineStep[MoneySaverPipelineContext]):
+    """
+    Represents a pipeline step that persists all transaction views generated from the source text.
+
+    This step takes the transaction views from the `MoneySaverPipelineContext` and saves them through the `TransactionService` in a single batched insert.
+    The insert runs on the pipeline-scoped session of the context, which is committed by the `MoneySaverService` once every step succeeded.
+    The user ID is retrieved from the token in the context.
+
+    Args:
+        context (MoneySaverPipelineContext): The context for the pipeline step.
+        transaction_service (TransactionService): The service to use for saving the transaction views.
+
+    Raises:
+        TransactionViewNotFoundError: If there is no transaction view to persist.
     """
 
     def __init__(self, context: MoneySaverPipelineContext) -> None:
@@ -127,13 +219,15 @@ class StepTransactionVivePersistence(PipelineStep[MoneySaverPipelineContext]):
         self.transaction_service = context.transaction_service
 
     def execute(self) -> None:
-        optional_view = self.context.view
-        if optional_view is None:
+        if not self.context.views:
             raise TransactionViewNotFoundError()
 
-        transaction_read = self.transaction_service.save_transaction_view(
-            self.context.user_id, optional_view
+        transaction_reads = self.transaction_service.save_transaction_views(
+            self.context.user_id,
+            self.context.views,
+            session=self.context.session,
+            is_commit=False,
         )
 
-        self.context.is_saved = transaction_read is not None
-        self.context.transaction_read = transaction_read
+        self.context.is_saved = len(transaction_reads) > 0
+        self.context.transaction_reads = transaction_reads
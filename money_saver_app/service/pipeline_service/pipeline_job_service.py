@@ -0,0 +1,221 @@
+import asyncio
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from enum import Enum
+from typing import Any, BinaryIO, Optional, TypedDict
+from uuid import UUID, uuid4
+
+from loguru import logger
+from pydantic import BaseModel
+
+from money_saver_app.service.concurrency.bounded_executor import (
+    BoundedExecutor,
+    BoundedExecutorConfig,
+)
+from money_saver_app.service.money_saver.error_code import (
+    ErrorCodeWithError,
+    PipelineJobCancelledError,
+    PipelineJobNotFoundError,
+    ResumablePipelineError,
+    TooManyPipelineJobsError,
+)
+from money_saver_app.service.money_saver.money_saver_service import MoneySaverService
+
+
+class PipelineJobConfig(TypedDict):
+    executor: BoundedExecutorConfig
+    max_jobs_per_user: int
+    result_ttl_seconds: float
+
+
+class PipelineJobStatus(str, Enum):
+    Pending = "Pending"
+    Running = "Running"
+    Succeeded = "Succeeded"
+    Failed = "Failed"
+
+
+class PipelineJobView(BaseModel):
+    id: UUID
+    status: PipelineJobStatus
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    run_id: Optional[UUID] = None
+    created_at: datetime.datetime
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (PipelineJobStatus.Succeeded, PipelineJobStatus.Failed)
+
+
+class PipelineJob:
+    def __init__(self, user_id: int) -> None:
+        self.user_id = user_id
+        self.view = PipelineJobView(
+            id=uuid4(),
+            status=PipelineJobStatus.Pending,
+            created_at=datetime.datetime.now(datetime.timezone.utc),
+        )
+        self.finished_at: Optional[float] = None
+        self.waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+
+class PipelineJobService:
+    """
+    Runs voice pipelines in the background so that the HTTP request returns right away with a job id.
+
+    Jobs run on a dedicated `BoundedExecutor`, separate from the request threadpool, and every user has at most
+    `max_jobs_per_user` unfinished jobs. The finished job keeps its `VoicePipelineContext` dump (or its error) for
+    `result_ttl_seconds`, clients poll it with `get_job` or wait for its next update with `wait_for_update`.
+    Jobs are kept in memory: a restart drops them and the client falls back to sending the audio again.
+    Jobs still queued when `shutdown` cancels them never run, they fail with `PipelineJobCancelledError` and their audio is closed.
+    """
+
+    def __init__(
+        self, money_saver_service: MoneySaverService, config: PipelineJobConfig
+    ) -> None:
+        self.money_saver_service = money_saver_service
+        self.max_jobs_per_user = config["max_jobs_per_user"]
+        self.result_ttl_seconds = config["result_ttl_seconds"]
+        self.executor = BoundedExecutor("pipeline-job", config["executor"])
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[UUID, PipelineJob] = OrderedDict()
+        self._unfinished_jobs_per_user: dict[int, int] = {}
+
+    def _evict_expired_jobs(self) -> None:
+        deadline = time.monotonic() - self.result_ttl_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < deadline:
+                del self._jobs[job_id]
+
+    def submit_voice_job(self, audio_buffer: BinaryIO, user_id: int) -> PipelineJobView:
+        """
+        Takes ownership of `audio_buffer`, which is closed once the job finishes.
+        """
+        job = PipelineJob(user_id)
+        with self._lock:
+            self._evict_expired_jobs()
+            unfinished_jobs = self._unfinished_jobs_per_user.get(user_id, 0)
+            if unfinished_jobs >= self.max_jobs_per_user:
+                audio_buffer.close()
+                raise TooManyPipelineJobsError(self.max_jobs_per_user)
+            self._unfinished_jobs_per_user[user_id] = unfinished_jobs + 1
+            self._jobs[job.view.id] = job
+
+        try:
+            future = self.executor.submit(self._run_voice_job, job, audio_buffer)
+        except ErrorCodeWithError:
+            audio_buffer.close()
+            with self._lock:
+                del self._jobs[job.view.id]
+                self._release_user_slot(user_id)
+            raise
+        future.add_done_callback(
+            lambda future: self._fail_if_cancelled(future, job, audio_buffer)
+        )
+        logger.info(f"[PIPELINE JOB] User {user_id} submitted job {job.view.id}")
+        return job.view
+
+    def _fail_if_cancelled(
+        self, future: Future, job: PipelineJob, audio_buffer: BinaryIO
+    ) -> None:
+        if not future.cancelled():
+            return
+        audio_buffer.close()
+        logger.warning(f"[PIPELINE JOB] Job {job.view.id} cancelled by shutdown")
+        self._update(
+            job,
+            status=PipelineJobStatus.Failed,
+            error=str(PipelineJobCancelledError(job.view.id)),
+        )
+
+    def _release_user_slot(self, user_id: int) -> None:
+        unfinished_jobs = self._unfinished_jobs_per_user[user_id] - 1
+        if unfinished_jobs:
+            self._unfinished_jobs_per_user[user_id] = unfinished_jobs
+        else:
+            del self._unfinished_jobs_per_user[user_id]
+
+    def _update(self, job: PipelineJob, **values: Any) -> None:
+        with self._lock:
+            job.view = job.view.model_copy(update=values)
+            if job.view.is_finished:
+                job.finished_at = time.monotonic()
+                self._release_user_slot(job.user_id)
+            waiters, job.waiters = job.waiters, []
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def _run_voice_job(self, job: PipelineJob, audio_buffer: BinaryIO) -> None:
+        self._update(job, status=PipelineJobStatus.Running)
+        try:
+            context = self.money_saver_service.execute_voice_pipeline(
+                audio_buffer, job.user_id
+            )
+        except ErrorCodeWithError as error:
+            self._update(
+                job,
+                status=PipelineJobStatus.Failed,
+                error=str(error),
+                run_id=error.run_id if isinstance(error, ResumablePipelineError) else None,
+            )
+            return
+        except Exception as error:
+            logger.exception(error)
+            self._update(job, status=PipelineJobStatus.Failed, error=repr(error))
+            return
+        finally:
+            audio_buffer.close()
+
+        self._update(
+            job,
+            status=PipelineJobStatus.Succeeded,
+            result=context.model_dump(mode="json"),
+            run_id=context.run_id,
+        )
+
+    def _get_job(self, job_id: UUID, user_id: int) -> PipelineJob:
+        with self._lock:
+            optional_job = self._jobs.get(job_id)
+        if optional_job is None or optional_job.user_id != user_id:
+            raise PipelineJobNotFoundError(job_id)
+        return optional_job
+
+    def get_job(self, job_id: UUID, user_id: int) -> PipelineJobView:
+        return self._get_job(job_id, user_id).view
+
+    async def wait_for_update(
+        self,
+        job_id: UUID,
+        user_id: int,
+        last_status: Optional[PipelineJobStatus],
+        timeout_seconds: float,
+    ) -> PipelineJobView:
+        """
+        Returns the job as soon as its status differs from `last_status`, or as it is after `timeout_seconds`.
+        """
+        job = self._get_job(job_id, user_id)
+        event = asyncio.Event()
+        with self._lock:
+            if job.view.status != last_status:
+                return job.view
+            job.waiters.append((asyncio.get_running_loop(), event))
+        try:
+            await asyncio.wait_for(event.wait(), timeout_seconds)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if (asyncio.get_running_loop(), event) in job.waiters:
+                    job.waiters.remove((asyncio.get_running_loop(), event))
+        return job.view
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self._lock:
+            jobs = len(self._jobs)
+            users = len(self._unfinished_jobs_per_user)
+        return {"jobs": jobs, "users_with_unfinished_jobs": users, **self.executor.get_metrics()}
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
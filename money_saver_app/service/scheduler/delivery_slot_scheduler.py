@@ -0,0 +1,141 @@
+import asyncio
+import datetime
+import hashlib
+from typing import Awaitable, Callable, NamedTuple, Optional, TypedDict
+
+from loguru import logger
+
+from money_saver_app.service.scheduler.leader_election import LeaderElection
+
+
+class DeliverySlotConfig(TypedDict):
+    window_start_utc: str
+    window_minutes: int
+    num_slots: int
+
+
+class DeliverySlot(NamedTuple):
+    run_date: datetime.date
+    index: int
+    at: datetime.datetime
+
+
+class DeliverySlotScheduler:
+    """
+    Runs a daily job split into `num_slots` slots spread evenly over a window of `window_minutes` starting at
+    `window_start_utc` ("HH:MM"). `run_slot` is awaited once per slot with the date the window started on and the slot
+    index, so each slot only handles its own shard of the work (see `slot_of`) and the daily peak becomes a flat load.
+
+    The scheduler is a coroutine sleeping until the next slot, it runs on the caller's event loop instead of a polling thread.
+    With a `leader_election`, every replica keeps the schedule but only the current leader runs the slots.
+    A slot whose time passed while no process led (a restart, a deploy or a failover) is not lost: when the scheduler starts,
+    or when its replica takes over the lease, the past slots of the last window are run again at once (see `past_slots`).
+    `run_slot` must therefore be idempotent, e.g. skip the users a previous run of the slot already delivered to.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: DeliverySlotConfig,
+        run_slot: Callable[[DeliverySlot], Awaitable[None]],
+        leader_election: Optional[LeaderElection] = None,
+    ) -> None:
+        self.name = name
+        self.num_slots = max(1, config["num_slots"])
+        hour, minute = (int(part) for part in config["window_start_utc"].split(":"))
+        self.window_start = datetime.time(hour, minute, tzinfo=datetime.timezone.utc)
+        self.slot_interval = datetime.timedelta(
+            minutes=config["window_minutes"] / self.num_slots
+        )
+        self.run_slot = run_slot
+        self.leader_election = leader_election
+
+    @staticmethod
+    def slot_of(key: object, num_slots: int) -> int:
+        """
+        A stable slot for `key` (e.g. a user id), independent of the process hash seed.
+        """
+        digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % num_slots
+
+    def _slots_of(self, run_date: datetime.date) -> list[DeliverySlot]:
+        window_start = datetime.datetime.combine(run_date, self.window_start)
+        return [
+            DeliverySlot(run_date, index, window_start + self.slot_interval * index)
+            for index in range(self.num_slots)
+        ]
+
+    def next_slot(self, now: datetime.datetime) -> DeliverySlot:
+        for run_date in (now.date() - datetime.timedelta(days=1), now.date()):
+            for slot in self._slots_of(run_date):
+                if slot.at > now:
+                    return slot
+        return self._slots_of(now.date() + datetime.timedelta(days=1))[0]
+
+    def past_slots(self, now: datetime.datetime) -> list[DeliverySlot]:
+        """
+        The slots of the window that started last (today's, or yesterday's before today's starts) whose time has passed.
+        """
+        for run_date in (now.date(), now.date() - datetime.timedelta(days=1)):
+            slots = [slot for slot in self._slots_of(run_date) if slot.at <= now]
+            if slots:
+                return slots
+        return []
+
+    async def _is_leader(self) -> bool:
+        return self.leader_election is None or await self.leader_election.is_current()
+
+    async def _run_slot(self, slot: DeliverySlot) -> None:
+        logger.info(
+            f"[JOB] Running {self.name} slot {slot.index + 1}/{self.num_slots} of {slot.run_date}"
+        )
+        try:
+            await self.run_slot(slot)
+        except Exception as error:
+            logger.exception(error)
+
+    async def _catch_up(self, now: datetime.datetime) -> None:
+        slots = self.past_slots(now)
+        if slots:
+            logger.info(
+                f"[JOB] Catching up {len(slots)} past slots of {self.name} of {slots[0].run_date}"
+            )
+        for slot in slots:
+            await self._run_slot(slot)
+
+    async def run(self) -> None:
+        logger.info(
+            f"[JOB SCHEDULING] {self.name} runs {self.num_slots} slots every {self.slot_interval} from {self.window_start}"
+        )
+        # a follower wakes up every renewal to notice when it takes over the lease
+        check_interval_seconds = (
+            float("inf")
+            if self.leader_election is None
+            else self.leader_election.renew_interval_seconds
+        )
+        was_leader = False
+        last_slot_at = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+        while True:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            is_leader = self.leader_election is None or self.leader_election.is_leader
+            if is_leader and not was_leader:
+                is_leader = await self._is_leader()
+                if is_leader:
+                    await self._catch_up(now)
+                    last_slot_at = max(last_slot_at, now)
+            was_leader = is_leader
+
+            # never before the last slot run, the loop clock may wake the sleep slightly early
+            slot = self.next_slot(max(now, last_slot_at))
+            delay = (slot.at - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+            if delay > check_interval_seconds:
+                await asyncio.sleep(check_interval_seconds)
+                continue
+            await asyncio.sleep(max(0.0, delay))
+            last_slot_at = slot.at
+            if not await self._is_leader():
+                logger.debug(
+                    f"[JOB] Skip {self.name} slot {slot.index + 1}/{self.num_slots}, not the leader"
+                )
+                continue
+            await self._run_slot(slot)
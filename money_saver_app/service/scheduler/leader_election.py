@@ -0,0 +1,106 @@
+import asyncio
+import datetime
+import os
+import socket
+import time
+import uuid
+from typing import Optional, TypedDict
+
+from loguru import logger
+
+from money_saver_app.repository.recorder_repository import SchedulerLeaseRepository
+
+
+class LeaderElectionConfig(TypedDict):
+    lease_seconds: float
+    renew_interval_seconds: float
+
+
+class LeaderElection:
+    """
+    Elects one replica as the runner of a scheduled job through a lease row in the app DB.
+
+    Every replica runs `run`, which tries to take the lease when it is free or expired and renews it every
+    `renew_interval_seconds` while holding it. A replica that dies stops renewing, so another one takes over once
+    `lease_seconds` have passed. Each takeover increments the fencing token: `fencing_token` is only returned while
+    the lease is believed to be held (measured on the local monotonic clock from before the DB write), and
+    `is_current` checks the token against the DB before work that must not be done twice.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        repo: SchedulerLeaseRepository,
+        config: LeaderElectionConfig,
+    ) -> None:
+        self.name = name
+        self.repo = repo
+        self.lease_seconds = config["lease_seconds"]
+        self.renew_interval_seconds = config["renew_interval_seconds"]
+        # unique per instance, so several applications in one process elect among themselves as well
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._fencing_token: Optional[int] = None
+        self._lease_deadline = 0.0
+
+    @property
+    def fencing_token(self) -> Optional[int]:
+        if self._fencing_token is None or time.monotonic() >= self._lease_deadline:
+            return None
+        return self._fencing_token
+
+    @property
+    def is_leader(self) -> bool:
+        return self.fencing_token is not None
+
+    def _try_hold_lease(self) -> None:
+        started_at = time.monotonic()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        expires_at = now + datetime.timedelta(seconds=self.lease_seconds)
+
+        if self._fencing_token is not None and self.repo.renew(
+            self.name, self.owner, self._fencing_token, expires_at
+        ):
+            self._lease_deadline = started_at + self.lease_seconds
+            return
+
+        was_leader = self._fencing_token is not None
+        self._fencing_token = self.repo.try_acquire(self.name, self.owner, now, expires_at)
+        if self._fencing_token is None:
+            if was_leader:
+                logger.warning(f"[LEADER ELECTION] {self.owner} lost the lease of {self.name}")
+            return
+        self._lease_deadline = started_at + self.lease_seconds
+        logger.info(
+            f"[LEADER ELECTION] {self.owner} leads {self.name} with fencing token {self._fencing_token}"
+        )
+
+    async def is_current(self) -> bool:
+        fencing_token = self.fencing_token
+        if fencing_token is None:
+            return False
+        return await asyncio.to_thread(
+            self.repo.is_current,
+            self.name,
+            fencing_token,
+            datetime.datetime.now(datetime.timezone.utc),
+        )
+
+    async def run(self) -> None:
+        try:
+            while True:
+                try:
+                    await asyncio.to_thread(self._try_hold_lease)
+                except Exception as error:
+                    logger.exception(error)
+                await asyncio.sleep(self.renew_interval_seconds)
+        finally:
+            self.release()
+
+    def release(self) -> None:
+        if self._fencing_token is None:
+            return
+        fencing_token, self._fencing_token = self._fencing_token, None
+        try:
+            self.repo.release(self.name, self.owner, fencing_token)
+        except Exception as error:
+            logger.exception(error)
@@ -0,0 +1,66 @@
+import io
+from typing import Optional
+
+import av
+import numpy as np
+import numpy.typing as npt
+
+from money_saver_app.service.money_saver.error_code import (
+    AudioDecodeError,
+    AudioTooLongError,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer import (
+    PCM_SAMPLE_RATE,
+    AudioSource,
+)
+
+WHISPER_SAMPLE_RATE = PCM_SAMPLE_RATE
+
+
+def decode_audio(
+    audio: AudioSource,
+    sample_rate: int = WHISPER_SAMPLE_RATE,
+    max_duration_seconds: Optional[float] = None,
+) -> npt.NDArray[np.float32]:
+    """
+    Decodes any container/codec FFmpeg understands (m4a/aac from LINE, mp3, wav, webm...) in process with PyAV,
+    resampling straight to mono float32 PCM at `sample_rate`, the input format expected by `whisper.transcribe`.
+
+    The audio is decoded once, frame by frame, without spawning an ffmpeg process or writing to the filesystem.
+    Decoding stops with `AudioTooLongError` as soon as `max_duration_seconds` is exceeded.
+    Seekable streams are rewound first, so a stream that was already consumed is still decoded from the start.
+    """
+    source = io.BytesIO(audio) if isinstance(audio, bytes) else audio
+    # The same stream may already have been read (hashed for the cache, sniffed, decoded by a previous attempt).
+    if source.seekable():
+        source.seek(0)
+    resampler = av.AudioResampler(format="flt", layout="mono", rate=sample_rate)
+    max_samples = (
+        int(max_duration_seconds * sample_rate)
+        if max_duration_seconds is not None
+        else None
+    )
+    chunks: list[npt.NDArray[np.float32]] = []
+    total_samples = 0
+
+    try:
+        with av.open(source, mode="r", metadata_errors="ignore") as container:
+            if not container.streams.audio:
+                raise AudioDecodeError()
+            stream = container.streams.audio[0]
+            for frame in container.decode(stream):
+                frame.pts = None
+                for resampled_frame in resampler.resample(frame):
+                    samples = resampled_frame.to_ndarray().reshape(-1)
+                    chunks.append(samples)
+                    total_samples += samples.shape[0]
+                if max_samples is not None and total_samples > max_samples:
+                    raise AudioTooLongError(max_duration_seconds or 0)
+            for resampled_frame in resampler.resample(None):
+                chunks.append(resampled_frame.to_ndarray().reshape(-1))
+    except av.error.FFmpegError as error:
+        raise AudioDecodeError() from error
+
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks).astype(np.float32, copy=False)
@@ -0,0 +1,110 @@
+"""
+Compares the throughput of the OpenAI Whisper recognizer with and without micro batching under concurrent short clips.
+
+Every clip of the corpus is decoded once and submitted `--requests` times from `--concurrency` threads, first with
+`max_batch_size` 1 (every clip is its own worker job) and then with the configured batch size. The transcription cache
+is disabled, so every request reaches the worker pool. Only clips of at most 30 seconds are used, longer ones are never batched.
+
+    python -m money_saver_app.service.voice_recognizer.batching_benchmark --config whisper.json --corpus ./fixtures --concurrency 8
+
+where the config is an `OpenAIWhisperConfig`, e.g. {"model_name": "tiny", "model_directory": "./models", "max_batch_size": 4}.
+"""
+
+import argparse
+import copy
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from money_saver_app.service.voice_recognizer.audio_decoder import decode_audio
+from money_saver_app.service.voice_recognizer.benchmark import load_corpus
+from money_saver_app.service.voice_recognizer.voice_recognizer_impl.openai_whisper_voice_recognizer import (
+    DEFAULT_MAX_BATCH_SIZE,
+    OpenAIWhisperConfig,
+    OpenAIWhisperVoiceRecognizer,
+)
+
+
+def _wait_until_ready(
+    recognizer: OpenAIWhisperVoiceRecognizer, timeout_seconds: float
+) -> None:
+    deadline = time.monotonic() + timeout_seconds
+    while not recognizer.is_ready():
+        if time.monotonic() > deadline:
+            raise TimeoutError("[BENCHMARK] Whisper workers were not ready in time")
+        time.sleep(0.5)
+
+
+def run_throughput_benchmark(
+    config: OpenAIWhisperConfig,
+    clips: list[npt.NDArray[np.float32]],
+    num_requests: int,
+    concurrency: int,
+    ready_timeout_seconds: float = 600,
+) -> dict[str, Any]:
+    config = copy.deepcopy(config)
+    config["transcription_cache"] = {"max_memory_entries": 0}
+    recognizer = OpenAIWhisperVoiceRecognizer(config)
+    _wait_until_ready(recognizer, ready_timeout_seconds)
+
+    def transcribe(index: int) -> float:
+        started_at = time.perf_counter()
+        recognizer.recognize_samples(clips[index % len(clips)])
+        return time.perf_counter() - started_at
+
+    try:
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(transcribe, range(num_requests)))
+        elapsed_seconds = time.perf_counter() - started_at
+        metrics = recognizer.get_metrics()
+    finally:
+        recognizer.shutdown()
+
+    return {
+        "max_batch_size": config.get("max_batch_size", DEFAULT_MAX_BATCH_SIZE),
+        "requests": num_requests,
+        "concurrency": concurrency,
+        "clips_per_second": num_requests / elapsed_seconds,
+        "p50_latency_seconds": float(np.percentile(latencies, 50)),
+        "p95_latency_seconds": float(np.percentile(latencies, 95)),
+        "average_batch_size": metrics["average_batch_size"],
+        "rejected": metrics["rejected"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--config", required=True)
+    parser.add_argument("--corpus", required=True)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as file:
+        config: OpenAIWhisperConfig = json.load(file)
+    clips = [
+        samples
+        for samples in (decode_audio(sample.audio) for sample in load_corpus(args.corpus))
+        if samples.shape[0] <= OpenAIWhisperVoiceRecognizer.BATCH_MAX_SAMPLES
+    ]
+    if not clips:
+        raise ValueError(f"[BENCHMARK] No clips of at most 30s found in {args.corpus}")
+
+    reports = {
+        "unbatched": run_throughput_benchmark(
+            {**config, "max_batch_size": 1}, clips, args.requests, args.concurrency
+        ),
+        "batched": run_throughput_benchmark(
+            config, clips, args.requests, args.concurrency
+        ),
+    }
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmarks voice recognizer backends over a local fixture corpus.
+
+The corpus is a directory of audio files, each optionally paired with a `<name>.txt` reference transcript.
+The config is a JSON object mapping a benchmark name to a `VoiceRecognizerConfig`, e.g.
+
+    {
+        "openai-whisper-base": {"backend": "openai-whisper", "openai_whisper": {"model_name": "base", "model_directory": "./models"}},
+        "faster-whisper-base-int8": {"backend": "faster-whisper", "faster_whisper": {"model_name": "base-ct2", "model_directory": "./models"}}
+    }
+
+Run one backend per process so that its peak memory is not mixed with another backend's:
+
+    python -m money_saver_app.service.voice_recognizer.benchmark --config bench.json --corpus ./fixtures --backend faster-whisper-base-int8
+"""
+
+import argparse
+import copy
+import json
+import os
+import resource
+import time
+import unicodedata
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+from loguru import logger
+
+from money_saver_app.service.voice_recognizer.audio_decoder import (
+    WHISPER_SAMPLE_RATE,
+    decode_audio,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer_registry import (
+    VoiceRecognizerConfig,
+    create_voice_recognizer,
+)
+
+AUDIO_EXTENSIONS = (".mp3", ".m4a", ".aac", ".wav", ".ogg", ".webm", ".flac")
+
+
+class BenchmarkSample(NamedTuple):
+    name: str
+    audio: bytes
+    duration_seconds: float
+    reference: Optional[str]
+
+
+def _normalize_for_cer(text: str) -> str:
+    normalized = unicodedata.normalize("NFKC", text).casefold()
+    return "".join(
+        character
+        for character in normalized
+        if not unicodedata.category(character).startswith(("P", "Z", "C"))
+    )
+
+
+def character_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    Levenshtein distance between the normalized transcripts (punctuation and whitespace removed), divided by the reference length.
+    """
+    reference, hypothesis = _normalize_for_cer(reference), _normalize_for_cer(hypothesis)
+    if not reference:
+        return float(bool(hypothesis))
+    previous_row = list(range(len(hypothesis) + 1))
+    for row_index, reference_character in enumerate(reference, start=1):
+        current_row = [row_index]
+        for column_index, hypothesis_character in enumerate(hypothesis, start=1):
+            current_row.append(
+                min(
+                    previous_row[column_index] + 1,
+                    current_row[column_index - 1] + 1,
+                    previous_row[column_index - 1]
+                    + (reference_character != hypothesis_character),
+                )
+            )
+        previous_row = current_row
+    return previous_row[-1] / len(reference)
+
+
+def load_corpus(corpus_directory: str) -> list[BenchmarkSample]:
+    samples: list[BenchmarkSample] = []
+    for file_name in sorted(os.listdir(corpus_directory)):
+        name, extension = os.path.splitext(file_name)
+        if extension.lower() not in AUDIO_EXTENSIONS:
+            continue
+        with open(os.path.join(corpus_directory, file_name), "rb") as file:
+            audio = file.read()
+        reference_path = os.path.join(corpus_directory, f"{name}.txt")
+        reference = None
+        if os.path.isfile(reference_path):
+            with open(reference_path, "r", encoding="utf-8") as file:
+                reference = file.read().strip()
+        duration_seconds = decode_audio(audio).shape[0] / WHISPER_SAMPLE_RATE
+        samples.append(BenchmarkSample(file_name, audio, duration_seconds, reference))
+    return samples
+
+
+def _disable_cache(config: VoiceRecognizerConfig) -> None:
+    optional_routed_config = config.get("duration_routed")
+    if optional_routed_config is not None:
+        for route in optional_routed_config["routes"]:
+            _disable_cache(route["recognizer"])
+    for name, section in config.items():
+        if name != "duration_routed" and isinstance(section, dict):
+            section["transcription_cache"] = {"max_memory_entries": 0}
+
+
+def _without_cache(config: VoiceRecognizerConfig) -> VoiceRecognizerConfig:
+    """
+    Disables the transcription cache of the backend and, for routed backends, of every route's recognizer,
+    so that repeated samples are transcribed every time.
+    """
+    config = copy.deepcopy(config)
+    _disable_cache(config)
+    return config
+
+
+def _peak_memory_mb(who: int) -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def run_benchmark(
+    config: VoiceRecognizerConfig,
+    corpus: list[BenchmarkSample],
+    repeat: int = 1,
+    ready_timeout_seconds: float = 600,
+) -> dict[str, Any]:
+    recognizer = create_voice_recognizer(_without_cache(config))
+    deadline = time.monotonic() + ready_timeout_seconds
+    while not recognizer.is_ready():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"[BENCHMARK] {config['backend']} was not ready in time")
+        time.sleep(0.5)
+
+    latencies: list[float] = []
+    error_rates: list[float] = []
+    total_audio_seconds = 0.0
+    for _ in range(repeat):
+        for sample in corpus:
+            started_at = time.perf_counter()
+            text = recognizer.recognize(sample.audio)
+            latency = time.perf_counter() - started_at
+            latencies.append(latency)
+            total_audio_seconds += sample.duration_seconds
+            if sample.reference is not None:
+                error_rates.append(character_error_rate(sample.reference, text))
+            logger.info(f"[BENCHMARK] {sample.name} ({latency:.2f}s): {text}")
+    recognizer.shutdown()
+
+    return {
+        "backend": config["backend"],
+        "samples": len(latencies),
+        "real_time_factor": sum(latencies) / max(total_audio_seconds, 1e-9),
+        "p50_latency_seconds": float(np.percentile(latencies, 50)),
+        "p95_latency_seconds": float(np.percentile(latencies, 95)),
+        "peak_memory_mb": _peak_memory_mb(resource.RUSAGE_SELF),
+        "peak_worker_memory_mb": _peak_memory_mb(resource.RUSAGE_CHILDREN),
+        "character_error_rate": (
+            sum(error_rates) / len(error_rates) if error_rates else None
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--config", required=True)
+    parser.add_argument("--corpus", required=True)
+    parser.add_argument("--backend", action="append", default=None)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as file:
+        configs: dict[str, VoiceRecognizerConfig] = json.load(file)
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        raise ValueError(f"[BENCHMARK] No audio files found in {args.corpus}")
+
+    reports = {
+        name: run_benchmark(configs[name], corpus, args.repeat)
+        for name in (args.backend or list(configs))
+    }
+    print(json.dumps(reports, indent=2, ensure_ascii=False))
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(reports, file, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
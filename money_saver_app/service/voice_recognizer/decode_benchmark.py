@@ -0,0 +1,106 @@
+"""
+Compares the decode latency of the in-process PyAV decoder with the legacy pydub path over a local fixture corpus.
+
+The legacy path is what `OpenAIWhisperVoiceRecognizer` did before `decode_audio`: pydub decodes the clip (one ffmpeg
+process), exports it to a temporary wav file, and Whisper's `load_audio` runs ffmpeg a second time to resample it to
+16 kHz mono float32. pydub is no longer a dependency, install it (and an ffmpeg binary) only to run this comparison:
+
+    pip install pydub==0.25.1
+    python -m money_saver_app.service.voice_recognizer.decode_benchmark --corpus ./fixtures --repeat 5
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable
+
+import numpy as np
+import numpy.typing as npt
+
+from money_saver_app.service.voice_recognizer.audio_decoder import (
+    WHISPER_SAMPLE_RATE,
+    decode_audio,
+)
+from money_saver_app.service.voice_recognizer.benchmark import (
+    BenchmarkSample,
+    load_corpus,
+)
+
+
+def decode_audio_with_pydub(audio: bytes) -> npt.NDArray[np.float32]:
+    from pydub import AudioSegment
+
+    segment: AudioSegment = AudioSegment.from_file(io.BytesIO(audio))
+    with tempfile.TemporaryDirectory() as directory:
+        wav_path = os.path.join(directory, "audio.wav")
+        segment.export(wav_path, format="wav")
+        # same command as `whisper.audio.load_audio`
+        output = subprocess.run(
+            [
+                "ffmpeg",
+                "-nostdin",
+                "-threads",
+                "0",
+                "-i",
+                wav_path,
+                "-f",
+                "s16le",
+                "-ac",
+                "1",
+                "-acodec",
+                "pcm_s16le",
+                "-ar",
+                str(WHISPER_SAMPLE_RATE),
+                "-",
+            ],
+            capture_output=True,
+            check=True,
+        ).stdout
+    return np.frombuffer(output, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def _measure(
+    decode: Callable[[bytes], npt.NDArray[np.float32]],
+    corpus: list[BenchmarkSample],
+    repeat: int,
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    for _ in range(repeat):
+        for sample in corpus:
+            started_at = time.perf_counter()
+            decode(sample.audio)
+            latencies.append(time.perf_counter() - started_at)
+    total_audio_seconds = repeat * sum(sample.duration_seconds for sample in corpus)
+    return {
+        "samples": len(latencies),
+        "p50_latency_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p95_latency_ms": float(np.percentile(latencies, 95)) * 1000,
+        "audio_seconds_per_second": total_audio_seconds / max(sum(latencies), 1e-9),
+    }
+
+
+def run_decode_benchmark(corpus: list[BenchmarkSample], repeat: int) -> dict[str, Any]:
+    return {
+        "pyav": _measure(decode_audio, corpus, repeat),
+        "pydub": _measure(decode_audio_with_pydub, corpus, repeat),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", required=True)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        raise ValueError(f"[BENCHMARK] No audio files found in {args.corpus}")
+    print(json.dumps(run_decode_benchmark(corpus, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
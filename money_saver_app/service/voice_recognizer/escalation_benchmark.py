@@ -0,0 +1,179 @@
+"""
+Compares voice recognizer routing policies by transcription CPU time and transaction parse success over a local fixture corpus.
+
+The corpus is the one of `benchmark`, and the config is a JSON object mapping a policy name to a `VoiceRecognizerConfig`, e.g.
+a single model against the duration-routed recognizer that starts short clips on a small model:
+
+    {
+        "base-only": {"backend": "openai-whisper", "openai_whisper": {"model_name": "base"}},
+        "tiny-then-base": {"backend": "duration-routed", "duration_routed": {"max_duration_seconds": 120, "routes": [
+            {"max_duration_seconds": 8, "recognizer": {"backend": "openai-whisper", "openai_whisper": {"model_name": "tiny"}}},
+            {"max_duration_seconds": 120, "recognizer": {"backend": "openai-whisper", "openai_whisper": {"model_name": "base"}}}
+        ]}}
+    }
+
+Every clip goes through the same steps as a LINE voice message: it is transcribed, the transcript is parsed by the
+`TransactionViewParser`, and when no transaction is found the clip is escalated with `recognize_escalated` and parsed again.
+The parser calls the OpenAI model of `OPENAI_API_KEY` and `OPENAI_MODEL_NAME`, as the application does. The CPU time is the
+one the Whisper worker processes report, so it is only available for the `openai-whisper` backend.
+
+    python -m money_saver_app.service.voice_recognizer.escalation_benchmark --config policies.json --corpus ./fixtures
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Optional
+
+import numpy as np
+from loguru import logger
+
+from money_saver_app.service.concurrency.concurrency_limiter import ConcurrencyLimiter
+from money_saver_app.service.money_saver.error_code import ErrorCodeWithError
+from money_saver_app.service.money_saver.transaction_view_parser import (
+    TransactionViewParser,
+)
+from money_saver_app.service.voice_recognizer.benchmark import (
+    BenchmarkSample,
+    _without_cache,
+    character_error_rate,
+    load_corpus,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer import VoiceRecognizer
+from money_saver_app.service.voice_recognizer.voice_recognizer_registry import (
+    VoiceRecognizerConfig,
+    create_voice_recognizer,
+)
+from smart_base_model.llm.llm_impls.openai_large_language_model import OpenAIModel
+
+
+def _create_transaction_view_parser() -> TransactionViewParser:
+    llm = OpenAIModel(
+        {
+            "api_key": os.environ["OPENAI_API_KEY"],
+            "model_name": os.environ["OPENAI_MODEL_NAME"],
+            "mode": "json",
+        }
+    )
+    # one clip at a time, so every text is parsed on its own
+    return TransactionViewParser(
+        llm,
+        {"max_batch_size": 1, "max_wait_ms": 0},
+        ConcurrencyLimiter("LLM", {"max_concurrency": 1, "queue_timeout_seconds": 60}),
+    )
+
+
+def _worker_cpu_seconds(metrics: Any) -> float:
+    """
+    Sums the CPU time of every worker pool in the metrics, of each route for routed backends.
+    """
+    if isinstance(metrics, list):
+        return sum(_worker_cpu_seconds(item) for item in metrics)
+    if not isinstance(metrics, dict):
+        return 0.0
+    total = sum(_worker_cpu_seconds(value) for value in metrics.values())
+    if "average_cpu_seconds" in metrics:
+        total += metrics["average_cpu_seconds"] * metrics["completed"]
+    return total
+
+
+def _is_parsed(parser: TransactionViewParser, text: str) -> bool:
+    try:
+        return bool(text) and bool(parser.parse(text))
+    except ErrorCodeWithError as error:
+        logger.warning(f"[BENCHMARK] Parsing failed: {error}")
+        return False
+
+
+def _wait_until_ready(
+    recognizer: VoiceRecognizer, name: str, ready_timeout_seconds: float
+) -> None:
+    deadline = time.monotonic() + ready_timeout_seconds
+    while not recognizer.is_ready():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"[BENCHMARK] {name} was not ready in time")
+        time.sleep(0.5)
+
+
+def run_escalation_benchmark(
+    name: str,
+    config: VoiceRecognizerConfig,
+    corpus: list[BenchmarkSample],
+    parser: TransactionViewParser,
+    ready_timeout_seconds: float = 600,
+) -> dict[str, Any]:
+    recognizer = create_voice_recognizer(_without_cache(config))
+    _wait_until_ready(recognizer, name, ready_timeout_seconds)
+
+    latencies: list[float] = []
+    error_rates: list[float] = []
+    parsed_first, parsed, escalated = 0, 0, 0
+    try:
+        for sample in corpus:
+            started_at = time.perf_counter()
+            text = recognizer.recognize(sample.audio)
+            is_parsed = _is_parsed(parser, text)
+            parsed_first += is_parsed
+            if not is_parsed:
+                optional_text: Optional[str] = recognizer.recognize_escalated(
+                    sample.audio
+                )
+                if optional_text is not None:
+                    escalated += 1
+                    text = optional_text
+                    is_parsed = _is_parsed(parser, text)
+            parsed += is_parsed
+            latencies.append(time.perf_counter() - started_at)
+            if sample.reference is not None:
+                error_rates.append(character_error_rate(sample.reference, text))
+            logger.info(f"[BENCHMARK] {name} {sample.name} (parsed={is_parsed}): {text}")
+        cpu_seconds = _worker_cpu_seconds(recognizer.get_metrics())
+    finally:
+        recognizer.shutdown()
+
+    return {
+        "policy": name,
+        "samples": len(corpus),
+        "average_cpu_seconds": cpu_seconds / len(corpus) if cpu_seconds else None,
+        "parse_success_rate_before_escalation": parsed_first / len(corpus),
+        "parse_success_rate": parsed / len(corpus),
+        "escalated": escalated,
+        "escalation_rate": escalated / len(corpus),
+        "p50_latency_seconds": float(np.percentile(latencies, 50)),
+        "p95_latency_seconds": float(np.percentile(latencies, 95)),
+        "character_error_rate": (
+            sum(error_rates) / len(error_rates) if error_rates else None
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--config", required=True)
+    parser.add_argument("--corpus", required=True)
+    parser.add_argument("--policy", action="append", default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as file:
+        configs: dict[str, VoiceRecognizerConfig] = json.load(file)
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        raise ValueError(f"[BENCHMARK] No audio files found in {args.corpus}")
+
+    transaction_view_parser = _create_transaction_view_parser()
+    reports = [
+        run_escalation_benchmark(
+            name, configs[name], corpus, transaction_view_parser
+        )
+        for name in (args.policy or list(configs))
+    ]
+    print(json.dumps(reports, indent=2, ensure_ascii=False))
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(reports, file, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
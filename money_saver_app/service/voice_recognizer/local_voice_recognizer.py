@@ -0,0 +1,98 @@
+import os
+import time
+from abc import abstractmethod
+from typing import Any, TypedDict
+
+import numpy as np
+import numpy.typing as npt
+from loguru import logger
+from typing_extensions import NotRequired
+
+from money_saver_app.service.voice_recognizer.audio_decoder import decode_audio
+from money_saver_app.service.voice_recognizer.transcription_cache import (
+    TranscriptionCache,
+    TranscriptionCacheConfig,
+)
+from money_saver_app.service.voice_recognizer.voice_activity import (
+    DEFAULT_VOICE_ACTIVITY_CONFIG,
+    VoiceActivityConfig,
+    trim_silence,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer import (
+    AudioSource,
+    VoiceRecognizer,
+)
+
+
+class LocalVoiceRecognizerConfig(TypedDict):
+    model_name: str
+    model_directory: NotRequired[str]
+    max_duration_seconds: NotRequired[float]
+    voice_activity: NotRequired[VoiceActivityConfig]
+    transcription_cache: NotRequired[TranscriptionCacheConfig]
+
+
+DEFAULT_TRANSCRIPTION_CACHE_CONFIG = TranscriptionCacheConfig(max_memory_entries=512)
+
+
+class LocalVoiceRecognizer(VoiceRecognizer):
+    """
+    Base class of the recognizers running a speech model on this machine.
+    The audio is decoded in process to a 16 kHz mono float32 array, looked up in a `TranscriptionCache` keyed by a hash
+    of the samples and the backend/model, trimmed to its speech by `trim_silence`, and only then handed to `_transcribe`.
+    Partial windows of a stream go straight to `_transcribe`: they are never seen again, so caching them would only
+    evict real entries, and a window that is still silent must yield an empty partial rather than an error.
+
+    When `model_directory` is set the weights are loaded from there and nothing is downloaded at runtime.
+    """
+
+    def __init__(self, config: LocalVoiceRecognizerConfig) -> None:
+        self.model_name = config["model_name"]
+        self.model_directory = config.get("model_directory")
+        self.max_duration_seconds = config.get("max_duration_seconds")
+        self.voice_activity_config = config.get(
+            "voice_activity", DEFAULT_VOICE_ACTIVITY_CONFIG
+        )
+        self.transcription_cache = TranscriptionCache(
+            config.get("transcription_cache", DEFAULT_TRANSCRIPTION_CACHE_CONFIG)
+        )
+
+    def _resolve_model_path(self, file_name: str) -> str:
+        if self.model_directory is None:
+            return self.model_name
+        model_path = os.path.join(self.model_directory, file_name)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"[VOICE RECOGNIZER] Model {self.model_name} not found at {model_path}"
+            )
+        return model_path
+
+    @abstractmethod
+    def _transcribe(self, samples: npt.NDArray[np.float32]) -> str: ...
+
+    def recognize(self, audio: AudioSource) -> str:
+        samples = decode_audio(audio, max_duration_seconds=self.max_duration_seconds)
+        logger.info(f"[AUDIO DECODE] Decoded {samples.shape[0]} samples")
+        return self.recognize_samples(samples)
+
+    def recognize_samples(self, samples: npt.NDArray[np.float32]) -> str:
+        cache_key = TranscriptionCache.hash_samples(
+            samples, f"{self.__class__.__name__}:{self.model_name}"
+        )
+        optional_text = self.transcription_cache.get(cache_key)
+        if optional_text is not None:
+            logger.info(f"[TRANSCRIPTION CACHE] Hit: {cache_key}")
+            return optional_text
+
+        started_at = time.perf_counter()
+        text = self._transcribe(trim_silence(samples, self.voice_activity_config))
+        self.transcription_cache.put(
+            cache_key, text, time.perf_counter() - started_at
+        )
+        return text
+
+    def recognize_partial(self, samples: npt.NDArray[np.float32]) -> str:
+        return self._transcribe(samples)
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {"transcription_cache": self.transcription_cache.get_stats()}
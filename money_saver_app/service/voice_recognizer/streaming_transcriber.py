@@ -0,0 +1,126 @@
+import threading
+from typing import TypedDict
+
+import numpy as np
+import numpy.typing as npt
+from loguru import logger
+
+from money_saver_app.service.money_saver.error_code import (
+    AudioTooLongError,
+    NoSpeechDetectedError,
+)
+from money_saver_app.service.voice_recognizer.audio_decoder import WHISPER_SAMPLE_RATE
+from money_saver_app.service.voice_recognizer.voice_recognizer import VoiceRecognizer
+
+
+class StreamingTranscriptionConfig(TypedDict):
+    partial_interval_seconds: float
+    window_seconds: float
+    max_duration_seconds: float
+
+
+class StreamingTranscriber:
+    """
+    Transcribes a stream of 16 kHz mono PCM16 (little endian) chunks incrementally with `VoiceRecognizer.recognize_samples`,
+    interim windows with `VoiceRecognizer.recognize_partial` so that they bypass the transcription cache and silence trimming.
+
+    Audio not yet committed forms the current window; every `partial_interval_seconds` of new audio the window is
+    transcribed again and `committed text + window text` is emitted as a partial transcript. Once the window grows past
+    `window_seconds` its transcript is committed and a new window starts, so each partial costs at most one window.
+    `finish` transcribes the last window and returns the final transcript.
+    """
+
+    BYTES_PER_SAMPLE = 2
+
+    def __init__(
+        self, voice_recognizer: VoiceRecognizer, config: StreamingTranscriptionConfig
+    ) -> None:
+        self.voice_recognizer = voice_recognizer
+        self.config = config
+        self._lock = threading.Lock()
+        self._chunks: list[npt.NDArray[np.float32]] = []
+        self._pending_bytes = b""
+        self._window_samples = 0
+        self._total_samples = 0
+        self._samples_at_last_partial = 0
+        self._committed_texts: list[str] = []
+
+    @property
+    def duration_seconds(self) -> float:
+        return self._total_samples / WHISPER_SAMPLE_RATE
+
+    def append(self, pcm16_chunk: bytes) -> None:
+        with self._lock:
+            data = self._pending_bytes + pcm16_chunk
+            usable_bytes = len(data) - len(data) % self.BYTES_PER_SAMPLE
+            self._pending_bytes = data[usable_bytes:]
+            if usable_bytes == 0:
+                return
+            samples = (
+                np.frombuffer(data[:usable_bytes], dtype="<i2").astype(np.float32)
+                / 32768.0
+            )
+            self._chunks.append(samples)
+            self._window_samples += samples.shape[0]
+            self._total_samples += samples.shape[0]
+            if self.duration_seconds > self.config["max_duration_seconds"]:
+                raise AudioTooLongError(self.config["max_duration_seconds"])
+
+    def should_emit_partial(self) -> bool:
+        with self._lock:
+            new_samples = self._total_samples - self._samples_at_last_partial
+        return (
+            new_samples >= self.config["partial_interval_seconds"] * WHISPER_SAMPLE_RATE
+        )
+
+    def _take_window(
+        self, is_final: bool
+    ) -> tuple[npt.NDArray[np.float32], bool]:
+        with self._lock:
+            window = (
+                np.concatenate(self._chunks)
+                if self._chunks
+                else np.zeros(0, dtype=np.float32)
+            )
+            is_commit = is_final or self._window_samples >= (
+                self.config["window_seconds"] * WHISPER_SAMPLE_RATE
+            )
+            self._samples_at_last_partial = self._total_samples
+            if is_commit:
+                self._chunks = []
+                self._window_samples = 0
+            else:
+                self._chunks = [window]
+        return window, is_commit
+
+    def _transcribe(self, window: npt.NDArray[np.float32], is_partial: bool) -> str:
+        if window.shape[0] == 0:
+            return ""
+        try:
+            if is_partial:
+                return self.voice_recognizer.recognize_partial(window).strip()
+            return self.voice_recognizer.recognize_samples(window).strip()
+        except NoSpeechDetectedError:
+            return ""
+
+    def _join(self, texts: list[str]) -> str:
+        return " ".join(text for text in texts if text)
+
+    def transcribe_partial(self) -> str:
+        window, is_commit = self._take_window(False)
+        text = self._transcribe(window, not is_commit)
+        if is_commit:
+            self._committed_texts.append(text)
+            return self._join(self._committed_texts)
+        return self._join([*self._committed_texts, text])
+
+    def finish(self) -> str:
+        window, _ = self._take_window(True)
+        self._committed_texts.append(self._transcribe(window, False))
+        final_text = self._join(self._committed_texts)
+        logger.info(
+            f"[STREAMING TRANSCRIPTION] Final transcript of {self.duration_seconds:.2f}s: {final_text}"
+        )
+        if not final_text:
+            raise NoSpeechDetectedError()
+        return final_text
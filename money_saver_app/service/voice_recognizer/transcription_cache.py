@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional, TypedDict
+
+import numpy as np
+import numpy.typing as npt
+from loguru import logger
+from typing_extensions import NotRequired
+
+
+class TranscriptionCacheConfig(TypedDict):
+    max_memory_entries: int
+    disk_directory: NotRequired[str]
+    max_disk_bytes: NotRequired[int]
+
+
+class CachedTranscription(NamedTuple):
+    text: str
+    compute_seconds: float
+
+
+class TranscriptionCache:
+    """
+    Content addressed cache of transcripts, keyed by a hash of the decoded PCM samples and the model name,
+    so the same voice note re-encoded into another container still hits.
+
+    Entries live in a bounded in-memory LRU of `max_memory_entries` (0 disables it) and, when `disk_directory` is set, in one JSON file
+    per key on disk, where the least recently used files are evicted once they take more than `max_disk_bytes`.
+    Every hit adds the seconds the original transcription took to `seconds_saved`.
+    """
+
+    DEFAULT_MAX_DISK_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, config: TranscriptionCacheConfig) -> None:
+        self.max_memory_entries = max(0, config["max_memory_entries"])
+        self.disk_directory = config.get("disk_directory")
+        self.max_disk_bytes = config.get("max_disk_bytes", self.DEFAULT_MAX_DISK_BYTES)
+        self._memory: OrderedDict[str, CachedTranscription] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._seconds_saved = 0.0
+
+        if self.disk_directory is not None:
+            os.makedirs(self.disk_directory, exist_ok=True)
+            self._disk_bytes = sum(
+                entry.stat().st_size
+                for entry in os.scandir(self.disk_directory)
+                if entry.name.endswith(".json")
+            )
+
+    @staticmethod
+    def hash_samples(samples: npt.NDArray[np.float32], model_name: str) -> str:
+        digest = hashlib.blake2b(model_name.encode("utf-8"), digest_size=16)
+        digest.update(np.ascontiguousarray(samples).data)
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_directory or "", f"{key}.json")
+
+    def _remember_in_memory(self, key: str, transcription: CachedTranscription) -> None:
+        self._memory[key] = transcription
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_from_disk(self, key: str) -> Optional[CachedTranscription]:
+        if self.disk_directory is None:
+            return
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                content = json.load(file)
+            os.utime(path)
+            return CachedTranscription(content["text"], content["compute_seconds"])
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as error:
+            logger.warning(f"[TRANSCRIPTION CACHE] Unreadable entry {path}: {error}")
+            return
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+    def _write_to_disk(self, key: str, transcription: CachedTranscription) -> None:
+        if self.disk_directory is None:
+            return
+        path = self._disk_path(key)
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(transcription._asdict(), file, ensure_ascii=False)
+            # the same key may already be on disk (another replica or a retry), its size is replaced, not added
+            previous_size = self._file_size(path)
+            os.replace(temp_path, path)
+            with self._lock:
+                self._disk_bytes += os.path.getsize(path) - previous_size
+        except OSError as error:
+            logger.warning(f"[TRANSCRIPTION CACHE] Unable to write {path}: {error}")
+            return
+        self._evict_from_disk()
+
+    def _evict_from_disk(self) -> None:
+        if self._disk_bytes <= self.max_disk_bytes or self.disk_directory is None:
+            return
+        entries = sorted(
+            (
+                entry
+                for entry in os.scandir(self.disk_directory)
+                if entry.name.endswith(".json")
+            ),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        total_bytes = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total_bytes <= self.max_disk_bytes:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+        with self._lock:
+            self._disk_bytes = total_bytes
+        logger.info(
+            f"[TRANSCRIPTION CACHE] Evicted disk entries down to {total_bytes} bytes"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            optional_transcription = self._memory.get(key)
+            if optional_transcription is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                self._seconds_saved += optional_transcription.compute_seconds
+                return optional_transcription.text
+
+        optional_transcription = self._read_from_disk(key)
+        with self._lock:
+            if optional_transcription is None:
+                self._misses += 1
+                return
+            self._remember_in_memory(key, optional_transcription)
+            self._disk_hits += 1
+            self._seconds_saved += optional_transcription.compute_seconds
+        return optional_transcription.text
+
+    def put(self, key: str, text: str, compute_seconds: float) -> None:
+        transcription = CachedTranscription(text, compute_seconds)
+        with self._lock:
+            self._remember_in_memory(key, transcription)
+        self._write_to_disk(key, transcription)
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "seconds_saved": self._seconds_saved,
+            }
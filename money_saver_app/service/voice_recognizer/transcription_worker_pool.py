@@ -0,0 +1,373 @@
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, TypedDict, TypeVar
+
+import numpy as np
+import numpy.typing as npt
+from loguru import logger
+from typing_extensions import NotRequired
+
+from money_saver_app.service.money_saver.error_code import (
+    TranscriptionQueueFullError,
+    TranscriptionTimeoutError,
+    VoiceRecognizerNotReadyError,
+)
+
+T = TypeVar("T")
+
+
+class TranscriptionWorkerPoolConfig(TypedDict):
+    num_workers: int
+    torch_num_threads: int
+    max_queue_size: int
+    job_timeout_seconds: float
+    ready_wait_seconds: NotRequired[float]
+    idle_unload_minutes: NotRequired[float]
+
+
+_worker_model: Optional[Any] = None
+_worker_warm_up_barrier: Optional[Any] = None
+
+
+def _initialize_worker(
+    model_name: str, torch_num_threads: int, warm_up_barrier: Any
+) -> None:
+    global _worker_model, _worker_warm_up_barrier
+    _worker_warm_up_barrier = warm_up_barrier
+    import torch
+    import whisper
+
+    torch.set_num_threads(torch_num_threads)
+    torch.set_num_interop_threads(1)
+    _worker_model = whisper.load_model(model_name)
+    logger.info(
+        f"[TRANSCRIPTION WORKER] Loaded model {model_name} with {torch_num_threads} torch threads"
+    )
+
+
+def _warm_up_worker(timeout_seconds: float) -> Optional[int]:
+    """
+    Blocks until every worker runs one warm-up task, so no worker can take two of them, and reports its pid.
+    The initializer runs before any task, so a returned pid means that worker's model is loaded.
+    """
+    if _worker_warm_up_barrier is not None:
+        _worker_warm_up_barrier.wait(timeout_seconds)
+    return os.getpid() if _worker_model is not None else None
+
+
+def _transcribe_in_worker(
+    samples: npt.NDArray[np.float32], deadline: float
+) -> Optional[tuple[str, float, float]]:
+    started_at = time.time()
+    if started_at > deadline or _worker_model is None:
+        return
+    cpu_started_at = time.process_time()
+    result = _worker_model.transcribe(samples, fp16=False)
+    return str(result["text"]), started_at, time.process_time() - cpu_started_at
+
+
+def _transcribe_batch_in_worker(
+    batch: list[npt.NDArray[np.float32]], deadline: float
+) -> Optional[tuple[list[str], float, float]]:
+    """
+    Decodes clips of at most 30 seconds as one batch: every clip is padded to the 30 second mel window anyway,
+    so stacking them runs the encoder and decoder once for the whole batch instead of once per clip.
+    """
+    started_at = time.time()
+    if started_at > deadline or _worker_model is None:
+        return
+    import torch
+    import whisper
+
+    cpu_started_at = time.process_time()
+    mels = torch.stack(
+        [
+            whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(torch.from_numpy(samples)),
+                _worker_model.dims.n_mels,
+            )
+            for samples in batch
+        ]
+    ).to(_worker_model.device)
+    results = whisper.decode(
+        _worker_model, mels, whisper.DecodingOptions(fp16=False, without_timestamps=True)
+    )
+    return (
+        [result.text for result in results],
+        started_at,
+        time.process_time() - cpu_started_at,
+    )
+
+
+class TranscriptionWorkerPool:
+    """
+    Runs Whisper transcriptions in `num_workers` worker processes, each holding its own model and pinned to
+    `torch_num_threads` intra-op threads so that concurrent transcriptions neither contend on one model nor oversubscribe the CPU.
+
+    At most `num_workers + max_queue_size` jobs are accepted at once; beyond that `transcribe` fails fast with
+    `TranscriptionQueueFullError`. Every job carries a deadline of `job_timeout_seconds`: jobs still queued when it passes are
+    skipped by the worker and the caller gets a `TranscriptionTimeoutError`. A job keeps its slot until it is done in the worker,
+    not until its caller gives up, so timed-out jobs still running cannot let more work in than the workers can take.
+
+    Workers are started and their models loaded in the background (`start`), so constructing the pool never blocks.
+    Jobs arriving before the workers are ready wait up to `ready_wait_seconds` and then fail fast with `VoiceRecognizerNotReadyError`.
+    With `idle_unload_minutes` set, the workers are shut down after that long without a job, freeing the model memory,
+    and started again on the next job.
+    A worker process that dies (e.g. killed by the OOM killer) breaks the whole executor, so it is replaced and warmed up
+    again in the background; the job that was running fails with `VoiceRecognizerNotReadyError` instead of being retried,
+    since it may be what took the worker down.
+    """
+
+    IDLE_CHECK_INTERVAL_SECONDS = 30
+    WARM_UP_TIMEOUT_SECONDS = 600
+
+    def __init__(self, model_name: str, config: TranscriptionWorkerPoolConfig) -> None:
+        self.model_name = model_name
+        self.config = config
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._ready_event = threading.Event()
+        self._slots = threading.BoundedSemaphore(
+            config["num_workers"] + config["max_queue_size"]
+        )
+        self._lock = threading.Lock()
+        self._last_used_at = time.monotonic()
+        self._pending = 0
+        self._submitted = 0
+        self._completed = 0
+        self._clips = 0
+        self._rejected = 0
+        self._expired = 0
+        self._failed = 0
+        self._not_ready = 0
+        self._restarts = 0
+        self._total_wait_seconds = 0.0
+        self._total_cpu_seconds = 0.0
+        self._last_load_seconds: Optional[float] = None
+
+        if config.get("idle_unload_minutes") is not None:
+            threading.Thread(
+                target=self._unload_idle_workers,
+                name="transcription-idle-unload",
+                daemon=True,
+            ).start()
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready_event.is_set()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._ready_event.clear()
+            mp_context = multiprocessing.get_context("spawn")
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.config["num_workers"],
+                mp_context=mp_context,
+                initializer=_initialize_worker,
+                initargs=(
+                    self.model_name,
+                    self.config["torch_num_threads"],
+                    mp_context.Barrier(self.config["num_workers"]),
+                ),
+            )
+            self._executor = executor
+
+        logger.info(f"[TRANSCRIPTION POOL] Loading model {self.model_name} in background")
+        threading.Thread(
+            target=self._warm_up,
+            args=(executor,),
+            name="transcription-warm-up",
+            daemon=True,
+        ).start()
+
+    def _warm_up(self, executor: concurrent.futures.ProcessPoolExecutor) -> None:
+        started_at = time.monotonic()
+        try:
+            futures = [
+                executor.submit(_warm_up_worker, self.WARM_UP_TIMEOUT_SECONDS)
+                for _ in range(self.config["num_workers"])
+            ]
+            worker_pids = {future.result() for future in futures}
+            if None in worker_pids or len(worker_pids) != self.config["num_workers"]:
+                raise RuntimeError(
+                    f"[TRANSCRIPTION POOL] Only {len(worker_pids - {None})}/{self.config['num_workers']} workers loaded the model"
+                )
+        except Exception as error:
+            logger.exception(error)
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            return
+
+        with self._lock:
+            self._last_load_seconds = time.monotonic() - started_at
+            self._last_used_at = time.monotonic()
+        self._ready_event.set()
+        logger.info(
+            f"[TRANSCRIPTION POOL] {self.config['num_workers']} workers ready in {self._last_load_seconds:.1f}s"
+        )
+
+    def _unload_idle_workers(self) -> None:
+        idle_seconds = self.config.get("idle_unload_minutes", 0) * 60
+        while True:
+            time.sleep(self.IDLE_CHECK_INTERVAL_SECONDS)
+            with self._lock:
+                executor = self._executor
+                if (
+                    executor is None
+                    or not self._ready_event.is_set()
+                    or self._pending > 0
+                    or time.monotonic() - self._last_used_at < idle_seconds
+                ):
+                    continue
+                self._executor = None
+                self._ready_event.clear()
+            executor.shutdown(wait=False, cancel_futures=True)
+            logger.info(
+                f"[TRANSCRIPTION POOL] Unloaded model {self.model_name} after {idle_seconds}s without voice traffic"
+            )
+
+    def _acquire_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        if not self._ready_event.is_set():
+            self.start()
+            self._ready_event.wait(self.config.get("ready_wait_seconds", 0))
+
+        with self._lock:
+            executor = self._executor
+            if executor is None or not self._ready_event.is_set():
+                self._not_ready += 1
+                raise VoiceRecognizerNotReadyError()
+            self._pending += 1
+            self._submitted += 1
+            self._last_used_at = time.monotonic()
+            return executor
+
+    def _record(self, **increments: float) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self, f"_{name}", getattr(self, f"_{name}") + value)
+
+    def _run_job(
+        self,
+        worker_func: Callable[..., Optional[tuple[T, float, float]]],
+        payload: Any,
+        num_clips: int,
+    ) -> T:
+        if not self._slots.acquire(blocking=False):
+            self._record(rejected=1)
+            logger.warning("[TRANSCRIPTION POOL] Queue full, rejecting job")
+            raise TranscriptionQueueFullError()
+
+        try:
+            executor = self._acquire_executor()
+        except VoiceRecognizerNotReadyError:
+            self._slots.release()
+            raise
+
+        timeout = self.config["job_timeout_seconds"]
+        submitted_at = time.time()
+        try:
+            future = executor.submit(worker_func, payload, submitted_at + timeout)
+        except BrokenProcessPool as error:
+            self._release_slot()
+            self._record(failed=1)
+            raise self._restart_broken_executor(executor) from error
+        except Exception:
+            self._release_slot()
+            raise
+        # a job that timed out may still be running in a worker, its slot is only freed once it finishes
+        future.add_done_callback(self._release_slot)
+
+        try:
+            optional_result = future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            optional_result = None
+        except BrokenProcessPool as error:
+            self._record(failed=1)
+            raise self._restart_broken_executor(executor) from error
+        except Exception:
+            self._record(failed=1)
+            raise
+
+        if optional_result is None:
+            self._record(expired=1)
+            raise TranscriptionTimeoutError(timeout)
+
+        result, started_at, cpu_seconds = optional_result
+        self._record(
+            completed=1,
+            clips=num_clips,
+            total_wait_seconds=max(0.0, started_at - submitted_at),
+            total_cpu_seconds=cpu_seconds,
+        )
+        return result
+
+    def _restart_broken_executor(
+        self, executor: concurrent.futures.ProcessPoolExecutor
+    ) -> VoiceRecognizerNotReadyError:
+        with self._lock:
+            # the jobs running on the broken executor all fail, only the first one replaces it
+            if self._executor is not executor:
+                return VoiceRecognizerNotReadyError()
+            self._executor = None
+            self._ready_event.clear()
+            self._restarts += 1
+        logger.error(
+            f"[TRANSCRIPTION POOL] A worker process died, restarting the workers of {self.model_name}"
+        )
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.start()
+        return VoiceRecognizerNotReadyError()
+
+    def _release_slot(self, _: Optional[concurrent.futures.Future] = None) -> None:
+        self._record(pending=-1)
+        self._slots.release()
+
+    def transcribe(self, samples: npt.NDArray[np.float32]) -> str:
+        return self._run_job(_transcribe_in_worker, samples, 1)
+
+    def transcribe_batch(self, batch: list[npt.NDArray[np.float32]]) -> list[str]:
+        """
+        Transcribes clips of at most 30 seconds as one job, see `_transcribe_batch_in_worker`.
+        """
+        return self._run_job(_transcribe_batch_in_worker, batch, len(batch))
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "model_name": self.model_name,
+                "is_ready": self._ready_event.is_set(),
+                "is_loaded": self._executor is not None,
+                "last_load_seconds": self._last_load_seconds,
+                "num_workers": self.config["num_workers"],
+                "max_queue_size": self.config["max_queue_size"],
+                "pending": self._pending,
+                "queued": max(0, self._pending - self.config["num_workers"]),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "clips": self._clips,
+                "average_batch_size": self._clips / max(1, self._completed),
+                "rejected": self._rejected,
+                "not_ready": self._not_ready,
+                "expired": self._expired,
+                "failed": self._failed,
+                "restarts": self._restarts,
+                "average_queue_wait_seconds": self._total_wait_seconds
+                / max(1, self._completed),
+                "average_cpu_seconds": self._total_cpu_seconds / max(1, self._completed),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+            self._ready_event.clear()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
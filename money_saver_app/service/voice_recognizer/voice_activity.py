@@ -0,0 +1,111 @@
+from typing import TypedDict
+
+import numpy as np
+import numpy.typing as npt
+from loguru import logger
+from typing_extensions import NotRequired
+
+from money_saver_app.service.money_saver.error_code import NoSpeechDetectedError
+from money_saver_app.service.voice_recognizer.audio_decoder import WHISPER_SAMPLE_RATE
+
+
+class VoiceActivityConfig(TypedDict):
+    frame_ms: int
+    min_energy_db: float
+    noise_margin_db: float
+    min_speech_ms: int
+    padding_ms: int
+    max_pause_ms: int
+    min_voiced_ms: NotRequired[int]
+    min_dynamic_range_db: NotRequired[float]
+
+
+DEFAULT_VOICE_ACTIVITY_CONFIG = VoiceActivityConfig(
+    frame_ms=30,
+    min_energy_db=-45,
+    noise_margin_db=10,
+    min_speech_ms=120,
+    padding_ms=200,
+    max_pause_ms=500,
+    min_voiced_ms=250,
+    min_dynamic_range_db=12,
+)
+
+
+def _find_runs(mask: npt.NDArray[np.bool_]) -> list[tuple[int, int]]:
+    """
+    Returns the `[start, end)` frame ranges where `mask` is True.
+    """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def trim_silence(
+    samples: npt.NDArray[np.float32],
+    config: VoiceActivityConfig = DEFAULT_VOICE_ACTIVITY_CONFIG,
+    sample_rate: int = WHISPER_SAMPLE_RATE,
+) -> npt.NDArray[np.float32]:
+    """
+    Energy based voice activity detection on mono float32 PCM.
+
+    Frames of `frame_ms` are marked as speech when their RMS level is above both `min_energy_db` (dBFS) and the
+    clip's own noise floor (10th percentile) plus `noise_margin_db`, the latter capped at `noise_margin_db` below the
+    loudest frame so that clips without any silence are kept whole. Speech runs shorter than `min_speech_ms` are
+    dropped as clicks. Leading and trailing silence is trimmed down to `padding_ms`, and internal pauses longer than
+    `max_pause_ms` are collapsed to `max_pause_ms`. Raises `NoSpeechDetectedError` when no speech is found, so the recognizer is never invoked for it.
+
+    Because of that cap, a clip of steady noise or hum would have its loudest frames marked as speech. A clip is
+    therefore rejected when its loudest frame is less than `min_dynamic_range_db` above the noise floor (speech
+    always has quieter gaps between syllables), or when its speech runs add up to less than `min_voiced_ms`.
+    """
+    frame_length = max(1, sample_rate * config["frame_ms"] // 1000)
+    num_frames = int(np.ceil(samples.shape[0] / frame_length))
+    if num_frames == 0:
+        raise NoSpeechDetectedError()
+
+    padded = np.zeros(num_frames * frame_length, dtype=np.float32)
+    padded[: samples.shape[0]] = samples
+    frames = padded.reshape(num_frames, frame_length)
+    energy_db = 10 * np.log10(np.mean(np.square(frames), axis=1) + 1e-10)
+    noise_floor_db = float(np.percentile(energy_db, 10))
+    peak_db = float(np.max(energy_db))
+    if peak_db - noise_floor_db < config.get("min_dynamic_range_db", 0):
+        raise NoSpeechDetectedError()
+    threshold_db = max(
+        config["min_energy_db"],
+        min(
+            noise_floor_db + config["noise_margin_db"],
+            peak_db - config["noise_margin_db"],
+        ),
+    )
+
+    min_speech_frames = max(1, config["min_speech_ms"] // config["frame_ms"])
+    speech_runs = [
+        (start, end)
+        for start, end in _find_runs(energy_db > threshold_db)
+        if end - start >= min_speech_frames
+    ]
+    voiced_ms = sum(end - start for start, end in speech_runs) * config["frame_ms"]
+    if not speech_runs or voiced_ms < config.get("min_voiced_ms", 0):
+        raise NoSpeechDetectedError()
+
+    padding_frames = config["padding_ms"] // config["frame_ms"]
+    max_pause_frames = config["max_pause_ms"] // config["frame_ms"]
+    keep = np.zeros(num_frames, dtype=np.bool_)
+    for start, end in speech_runs:
+        keep[start:end] = True
+    first_start, last_end = speech_runs[0][0], speech_runs[-1][1]
+    keep[max(0, first_start - padding_frames) : first_start] = True
+    keep[last_end : last_end + padding_frames] = True
+    for (_, previous_end), (next_start, _) in zip(speech_runs, speech_runs[1:]):
+        if next_start - previous_end <= max_pause_frames:
+            keep[previous_end:next_start] = True
+            continue
+        keep[previous_end : previous_end + max_pause_frames // 2] = True
+        keep[next_start - max_pause_frames // 2 : next_start] = True
+
+    trimmed = frames[keep].reshape(-1)
+    logger.info(
+        f"[VOICE ACTIVITY] Trimmed {samples.shape[0] / sample_rate:.2f}s to {trimmed.shape[0] / sample_rate:.2f}s"
+    )
+    return trimmed
@@ -1,12 +1,76 @@
+import hashlib
+import io
+import wave
 from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+AudioSource = Union[bytes, BinaryIO]
+
+PCM_SAMPLE_RATE = 16000
+
+
+def hash_audio_source(audio: AudioSource, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Hashes raw audio bytes or a seekable binary stream without loading the stream into memory, the stream is rewound afterwards.
+    """
+    if isinstance(audio, bytes):
+        return hashlib.blake2b(audio, digest_size=16).hexdigest()
+
+    hasher = hashlib.blake2b(digest_size=16)
+    position = audio.tell()
+    while chunk := audio.read(chunk_size):
+        hasher.update(chunk)
+    audio.seek(position)
+    return hasher.hexdigest()
+
+
+def encode_wav(samples: npt.NDArray[np.float32], sample_rate: int = PCM_SAMPLE_RATE) -> bytes:
+    """
+    Encodes mono float32 PCM as a 16 bit wav file, so decoded samples can be handed to recognizers that only take audio files.
+    """
+    pcm16 = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm16.tobytes())
+    return buffer.getvalue()
 
 
 class VoiceRecognizer(ABC):
     """
     Defines an abstract base class for voice recognition services.
     The `VoiceRecognizer` class provides an abstract interface for recognizing speech from audio input and returning the recognized text as a string.
+    The audio is either raw bytes or a seekable binary stream (e.g. a spooled upload buffer), so large uploads are never copied into memory.
     Concrete subclasses must implement the `recognize()` method to provide the actual voice recognition functionality.
+    `recognize_samples()` transcribes already decoded 16 kHz mono float32 PCM; by default it is wrapped into a wav file
+    and passed to `recognize()`, recognizers that run on decoded samples natively override it.
+    `recognize_partial()` transcribes an interim window of a stream, whose transcript is shown once and then superseded.
     """
 
     @abstractmethod
-    def recognize(self, audio_bytes: bytes) -> str: ...
+    def recognize(self, audio: AudioSource) -> str: ...
+
+    def recognize_samples(self, samples: npt.NDArray[np.float32]) -> str:
+        return self.recognize(encode_wav(samples))
+
+    def recognize_partial(self, samples: npt.NDArray[np.float32]) -> str:
+        return self.recognize_samples(samples)
+
+    def recognize_escalated(self, audio: AudioSource) -> Optional[str]:
+        """
+        Transcribes the audio again with a bigger model, None when there is no bigger model to escalate to.
+        """
+        return
+
+    def is_ready(self) -> bool:
+        return True
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {}
+
+    def shutdown(self) -> None: ...
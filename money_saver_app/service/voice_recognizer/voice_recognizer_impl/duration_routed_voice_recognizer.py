@@ -0,0 +1,105 @@
+import threading
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+import numpy.typing as npt
+from loguru import logger
+
+from money_saver_app.service.voice_recognizer.audio_decoder import (
+    WHISPER_SAMPLE_RATE,
+    decode_audio,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer import (
+    AudioSource,
+    VoiceRecognizer,
+)
+
+
+class ModelRoute(NamedTuple):
+    max_duration_seconds: float
+    voice_recognizer: VoiceRecognizer
+
+
+class DurationRoutedVoiceRecognizer(VoiceRecognizer):
+    """
+    Routes each clip by its duration to one of several recognizers, e.g. `tiny` for short "item + amount" notes and `base` for longer ones.
+
+    Routes are ordered by `max_duration_seconds`; a clip goes to the first route it fits in, clips longer than every
+    route go to the last one. `recognize_escalated` transcribes the clip again with the next bigger route, which the
+    voice pipeline uses when the first transcript cannot be parsed into a transaction.
+    Per route metrics report how many clips were routed to it and how many of them had to be escalated. The escalation rate
+    is not a parse success rate: the last route has nothing to escalate to, so its parse failures are not counted.
+    """
+
+    def __init__(
+        self, routes: list[ModelRoute], max_duration_seconds: Optional[float] = None
+    ) -> None:
+        if not routes:
+            raise ValueError("[VOICE RECOGNIZER] At least one model route is required")
+        self.routes = sorted(routes, key=lambda route: route.max_duration_seconds)
+        self.max_duration_seconds = max_duration_seconds
+        self._lock = threading.Lock()
+        self._routed = [0] * len(self.routes)
+        self._escalated = [0] * len(self.routes)
+
+    def _decode(self, audio: AudioSource) -> npt.NDArray[np.float32]:
+        if not isinstance(audio, bytes):
+            audio.seek(0)
+        return decode_audio(audio, max_duration_seconds=self.max_duration_seconds)
+
+    def _route_index(self, samples: npt.NDArray[np.float32]) -> int:
+        duration_seconds = samples.shape[0] / WHISPER_SAMPLE_RATE
+        for index, route in enumerate(self.routes):
+            if duration_seconds <= route.max_duration_seconds:
+                return index
+        return len(self.routes) - 1
+
+    def recognize_samples(self, samples: npt.NDArray[np.float32]) -> str:
+        index = self._route_index(samples)
+        with self._lock:
+            self._routed[index] += 1
+        return self.routes[index].voice_recognizer.recognize_samples(samples)
+
+    def recognize_partial(self, samples: npt.NDArray[np.float32]) -> str:
+        # partials are not clips, they are left out of the per route metrics
+        return self.routes[self._route_index(samples)].voice_recognizer.recognize_partial(
+            samples
+        )
+
+    def recognize(self, audio: AudioSource) -> str:
+        return self.recognize_samples(self._decode(audio))
+
+    def recognize_escalated(self, audio: AudioSource) -> Optional[str]:
+        samples = self._decode(audio)
+        index = self._route_index(samples)
+        if index + 1 >= len(self.routes):
+            return
+        with self._lock:
+            self._escalated[index] += 1
+        logger.info(
+            f"[VOICE RECOGNIZER] Escalating clip from route {index} to route {index + 1}"
+        )
+        return self.routes[index + 1].voice_recognizer.recognize_samples(samples)
+
+    def is_ready(self) -> bool:
+        return all(route.voice_recognizer.is_ready() for route in self.routes)
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self._lock:
+            routed, escalated = list(self._routed), list(self._escalated)
+        return {
+            "routes": [
+                {
+                    "max_duration_seconds": route.max_duration_seconds,
+                    "routed": routed[index],
+                    "escalated": escalated[index],
+                    "escalation_rate": escalated[index] / max(1, routed[index]),
+                    **route.voice_recognizer.get_metrics(),
+                }
+                for index, route in enumerate(self.routes)
+            ]
+        }
+
+    def shutdown(self) -> None:
+        for route in self.routes:
+            route.voice_recognizer.shutdown()
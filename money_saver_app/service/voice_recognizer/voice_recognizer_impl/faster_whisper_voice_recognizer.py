@@ -0,0 +1,79 @@
+import threading
+from typing import Any, Optional
+
+import numpy as np
+import numpy.typing as npt
+from loguru import logger
+from typing_extensions import NotRequired
+
+from money_saver_app.service.money_saver.error_code import (
+    VoiceRecognizerNotReadyError,
+)
+from money_saver_app.service.voice_recognizer.local_voice_recognizer import (
+    LocalVoiceRecognizer,
+    LocalVoiceRecognizerConfig,
+)
+
+
+class FasterWhisperConfig(LocalVoiceRecognizerConfig):
+    compute_type: NotRequired[str]
+    cpu_threads: NotRequired[int]
+    num_workers: NotRequired[int]
+    beam_size: NotRequired[int]
+    language: NotRequired[str]
+    ready_wait_seconds: NotRequired[float]
+
+
+class FasterWhisperVoiceRecognizer(LocalVoiceRecognizer):
+    """
+    Transcribes audio with a CTranslate2 conversion of Whisper through the optional `faster-whisper` package,
+    int8 quantized on CPU by default. CTranslate2 releases the GIL and runs up to `num_workers` transcriptions in
+    parallel on one model, so no process pool is needed.
+
+    The converted model is loaded from `<model_directory>/<model_name>` in the background, never downloaded.
+    """
+
+    def __init__(self, model_config: FasterWhisperConfig) -> None:
+        super().__init__(model_config)
+        if self.model_directory is None:
+            raise ValueError(
+                "[VOICE RECOGNIZER] faster-whisper requires a local model_directory"
+            )
+        self.model_config = model_config
+        self.model_path = self._resolve_model_path(self.model_name)
+        self._model: Optional[Any] = None
+        self._ready_event = threading.Event()
+        threading.Thread(
+            target=self._load_model, name="faster-whisper-load", daemon=True
+        ).start()
+
+    def _load_model(self) -> None:
+        try:
+            from faster_whisper import WhisperModel
+
+            self._model = WhisperModel(
+                self.model_path,
+                device="cpu",
+                compute_type=self.model_config.get("compute_type", "int8"),
+                cpu_threads=self.model_config.get("cpu_threads", 4),
+                num_workers=self.model_config.get("num_workers", 2),
+                local_files_only=True,
+            )
+        except Exception as error:
+            logger.exception(error)
+            return
+        self._ready_event.set()
+        logger.info(f"[VOICE RECOGNIZER] Loaded faster-whisper model {self.model_path}")
+
+    def _transcribe(self, samples: npt.NDArray[np.float32]) -> str:
+        if not self._ready_event.wait(self.model_config.get("ready_wait_seconds", 1)):
+            raise VoiceRecognizerNotReadyError()
+        segments, _ = self._model.transcribe(
+            samples,
+            beam_size=self.model_config.get("beam_size", 1),
+            language=self.model_config.get("language"),
+        )
+        return "".join(segment.text for segment in segments)
+
+    def is_ready(self) -> bool:
+        return self._ready_event.is_set()
@@ -0,0 +1,75 @@
+from contextlib import nullcontext
+from typing import Any, ContextManager, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from money_saver_app.service.concurrency.concurrency_limiter import ConcurrencyLimiter
+from money_saver_app.service.concurrency.single_flight import SingleFlight
+from money_saver_app.service.voice_recognizer.voice_recognizer import (
+    AudioSource,
+    VoiceRecognizer,
+    hash_audio_source,
+)
+
+
+class GuardedVoiceRecognizer(VoiceRecognizer):
+    """
+    Wraps a `VoiceRecognizer` so that identical audio being transcribed concurrently (double sends, LINE redeliveries)
+    shares a single transcription.
+
+    An optional `ConcurrencyLimiter` caps concurrent transcriptions for backends that have no admission control of
+    their own. Pooled backends already bound their in-flight jobs (and fail fast when full), so stacking a second,
+    smaller limit in front of them would only leave workers idle; pass `None` for those.
+    """
+
+    def __init__(
+        self,
+        voice_recognizer: VoiceRecognizer,
+        limiter: Optional[ConcurrencyLimiter] = None,
+    ) -> None:
+        self.voice_recognizer = voice_recognizer
+        self.limiter = limiter
+        self.single_flight = SingleFlight[str]("voice-recognizer")
+
+    def _acquire(self) -> ContextManager[Any]:
+        if self.limiter is None:
+            return nullcontext()
+        return self.limiter.acquire()
+
+    def _recognize_with_limit(self, audio: AudioSource) -> str:
+        with self._acquire():
+            return self.voice_recognizer.recognize(audio)
+
+    def recognize(self, audio: AudioSource) -> str:
+        return self.single_flight.do(
+            hash_audio_source(audio),
+            lambda: self._recognize_with_limit(audio),
+        )
+
+    def _recognize_samples_with_limit(self, samples: npt.NDArray[np.float32]) -> str:
+        with self._acquire():
+            return self.voice_recognizer.recognize_samples(samples)
+
+    def recognize_samples(self, samples: npt.NDArray[np.float32]) -> str:
+        return self.single_flight.do(
+            SingleFlight.hash_key(np.ascontiguousarray(samples).tobytes()),
+            lambda: self._recognize_samples_with_limit(samples),
+        )
+
+    def recognize_partial(self, samples: npt.NDArray[np.float32]) -> str:
+        with self._acquire():
+            return self.voice_recognizer.recognize_partial(samples)
+
+    def recognize_escalated(self, audio: AudioSource) -> Optional[str]:
+        with self._acquire():
+            return self.voice_recognizer.recognize_escalated(audio)
+
+    def is_ready(self) -> bool:
+        return self.voice_recognizer.is_ready()
+
+    def get_metrics(self) -> dict[str, Any]:
+        return self.voice_recognizer.get_metrics()
+
+    def shutdown(self) -> None:
+        self.voice_recognizer.shutdown()
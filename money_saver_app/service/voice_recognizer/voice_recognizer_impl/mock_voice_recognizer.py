@@ -1,4 +1,10 @@
-from money_saver_app.service.voice_recognizer.voice_recognizer import VoiceRecognizer
+import numpy as np
+import numpy.typing as npt
+
+from money_saver_app.service.voice_recognizer.voice_recognizer import (
+    AudioSource,
+    VoiceRecognizer,
+)
 
 
 class MockVoiceRecognizer(VoiceRecognizer):
@@ -9,5 +15,8 @@ class MockVoiceRecognizer(VoiceRecognizer):
     def __init__(self, text: str) -> None:
         self.text = text
 
-    def recognize(self, audio_bytes: bytes) -> str:
+    def recognize(self, audio: AudioSource) -> str:
+        return self.text
+
+    def recognize_samples(self, samples: npt.NDArray[np.float32]) -> str:
         return self.text
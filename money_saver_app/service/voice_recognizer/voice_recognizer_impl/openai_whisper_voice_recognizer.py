@@ -1,38 +1,81 @@
-import io
-import os
-import uuid
-from typing import TypedDict, cast
+from typing import Any
 
-import whisper
-from loguru import logger
-from pydub import AudioSegment
+import numpy as np
+import numpy.typing as npt
+from typing_extensions import NotRequired
 
-from money_saver_app.service.voice_recognizer.voice_recognizer import VoiceRecognizer
+from money_saver_app.service.concurrency.micro_batcher import MicroBatcher
+from money_saver_app.service.voice_recognizer.audio_decoder import WHISPER_SAMPLE_RATE
+from money_saver_app.service.voice_recognizer.local_voice_recognizer import (
+    LocalVoiceRecognizer,
+    LocalVoiceRecognizerConfig,
+)
+from money_saver_app.service.voice_recognizer.transcription_worker_pool import (
+    TranscriptionWorkerPool,
+    TranscriptionWorkerPoolConfig,
+)
 
 
-class OpenAIWhisperConfig(TypedDict):
-    model_name: str
+class OpenAIWhisperConfig(LocalVoiceRecognizerConfig):
+    worker_pool: NotRequired[TranscriptionWorkerPoolConfig]
+    max_batch_size: NotRequired[int]
+    max_batch_wait_ms: NotRequired[int]
 
 
-class OpenAIWhisperVoiceRecognizer(VoiceRecognizer):
+DEFAULT_WORKER_POOL_CONFIG = TranscriptionWorkerPoolConfig(
+    num_workers=2,
+    torch_num_threads=2,
+    max_queue_size=8,
+    job_timeout_seconds=60,
+    ready_wait_seconds=1,
+)
+DEFAULT_MAX_BATCH_SIZE = 4
+DEFAULT_MAX_BATCH_WAIT_MS = 30
+
+
+class OpenAIWhisperVoiceRecognizer(LocalVoiceRecognizer):
+    """
+    Transcribes audio with the reference OpenAI Whisper models, through a `TranscriptionWorkerPool` whose worker
+    processes each hold their own model, so concurrent calls do not share one model.
+    The models are loaded in the background when the recognizer is created, see `is_ready`.
+    With `model_directory` set, the checkpoint is read from `<model_directory>/<model_name>.pt`.
+
+    Clips that fit in one 30 second Whisper window and arrive within `max_batch_wait_ms` of each other are gathered
+    (up to `max_batch_size`) by a `MicroBatcher` and decoded as one batch by a single worker; longer clips are transcribed on their own.
+    """
+
+    BATCH_MAX_SAMPLES = 30 * WHISPER_SAMPLE_RATE
+
     def __init__(self, model_config: OpenAIWhisperConfig) -> None:
-        self.model = whisper.load_model(model_config["model_name"])
-
-    def recognize(self, audio_bytes: bytes) -> str:
-        file_name = self.__create_temp_file(audio_bytes)
-        result = self.model.transcribe(file_name)
-        text = cast(str, result["text"])
-        self.__delete_temp_file(file_name)
-        return text
-
-    def __create_temp_file(self, audio_bytes: bytes) -> str:
-        audio: AudioSegment = AudioSegment.from_file(io.BytesIO(audio_bytes))
-        temp_file_name = f"{uuid.uuid4()}.wav"
-        audio.export(temp_file_name, format="wav")
-        logger.info(f"[AUDIO EXPORT] Export audio bytes to: {temp_file_name}")
-        return temp_file_name
-
-    def __delete_temp_file(self, file_path: str) -> None:
-        if os.path.exists(file_path):
-            logger.info(f"[FILE REMOVAL] Remove temp file: {file_path}")
-            os.remove(file_path)
+        super().__init__(model_config)
+        worker_pool_config = model_config.get("worker_pool", DEFAULT_WORKER_POOL_CONFIG)
+        self.worker_pool = TranscriptionWorkerPool(
+            self._resolve_model_path(f"{self.model_name}.pt"), worker_pool_config
+        )
+        self.worker_pool.start()
+        self.batcher = MicroBatcher[npt.NDArray[np.float32], str](
+            "whisper-batch",
+            self._transcribe_batch,
+            model_config.get("max_batch_size", DEFAULT_MAX_BATCH_SIZE),
+            model_config.get("max_batch_wait_ms", DEFAULT_MAX_BATCH_WAIT_MS),
+            max_concurrent_batches=worker_pool_config["num_workers"],
+        )
+
+    def _transcribe_batch(self, batch: list[npt.NDArray[np.float32]]) -> list[str]:
+        if len(batch) == 1:
+            return [self.worker_pool.transcribe(batch[0])]
+        return self.worker_pool.transcribe_batch(batch)
+
+    def _transcribe(self, samples: npt.NDArray[np.float32]) -> str:
+        if samples.shape[0] > self.BATCH_MAX_SAMPLES:
+            return self.worker_pool.transcribe(samples)
+        return self.batcher.execute(samples)
+
+    def is_ready(self) -> bool:
+        return self.worker_pool.is_ready
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {**self.worker_pool.get_metrics(), **super().get_metrics()}
+
+    def shutdown(self) -> None:
+        self.worker_pool.shutdown()
@@ -0,0 +1,99 @@
+from typing import Callable, TypedDict
+
+from typing_extensions import NotRequired
+
+from money_saver_app.service.voice_recognizer.voice_recognizer import VoiceRecognizer
+from money_saver_app.service.voice_recognizer.voice_recognizer_impl.duration_routed_voice_recognizer import (
+    DurationRoutedVoiceRecognizer,
+    ModelRoute,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer_impl.faster_whisper_voice_recognizer import (
+    FasterWhisperConfig,
+    FasterWhisperVoiceRecognizer,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer_impl.mock_voice_recognizer import (
+    MockVoiceRecognizer,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer_impl.openai_whisper_voice_recognizer import (
+    OpenAIWhisperConfig,
+    OpenAIWhisperVoiceRecognizer,
+)
+
+
+class VoiceRecognizerConfig(TypedDict):
+    backend: str
+    openai_whisper: NotRequired[OpenAIWhisperConfig]
+    faster_whisper: NotRequired[FasterWhisperConfig]
+    mock_text: NotRequired[str]
+    duration_routed: NotRequired["DurationRoutedConfig"]
+
+
+class ModelRouteConfig(TypedDict):
+    max_duration_seconds: float
+    recognizer: VoiceRecognizerConfig
+
+
+class DurationRoutedConfig(TypedDict):
+    routes: list[ModelRouteConfig]
+    max_duration_seconds: NotRequired[float]
+
+
+VoiceRecognizerFactory = Callable[[VoiceRecognizerConfig], VoiceRecognizer]
+
+_BACKENDS: dict[str, VoiceRecognizerFactory] = {}
+
+
+def register_voice_recognizer_backend(
+    name: str,
+) -> Callable[[VoiceRecognizerFactory], VoiceRecognizerFactory]:
+    def decorator(factory: VoiceRecognizerFactory) -> VoiceRecognizerFactory:
+        _BACKENDS[name] = factory
+        return factory
+
+    return decorator
+
+
+def list_voice_recognizer_backends() -> list[str]:
+    return sorted(_BACKENDS)
+
+
+def create_voice_recognizer(config: VoiceRecognizerConfig) -> VoiceRecognizer:
+    """
+    Creates the `VoiceRecognizer` of the backend named by `config["backend"]`, with that backend's own section of the config.
+    """
+    optional_factory = _BACKENDS.get(config["backend"])
+    if optional_factory is None:
+        raise ValueError(
+            f"[VOICE RECOGNIZER] Unknown backend {config['backend']}, available: {list_voice_recognizer_backends()}"
+        )
+    return optional_factory(config)
+
+
+@register_voice_recognizer_backend("openai-whisper")
+def _create_openai_whisper(config: VoiceRecognizerConfig) -> VoiceRecognizer:
+    return OpenAIWhisperVoiceRecognizer(config["openai_whisper"])
+
+
+@register_voice_recognizer_backend("faster-whisper")
+def _create_faster_whisper(config: VoiceRecognizerConfig) -> VoiceRecognizer:
+    return FasterWhisperVoiceRecognizer(config["faster_whisper"])
+
+
+@register_voice_recognizer_backend("mock")
+def _create_mock(config: VoiceRecognizerConfig) -> VoiceRecognizer:
+    return MockVoiceRecognizer(config.get("mock_text", ""))
+
+
+@register_voice_recognizer_backend("duration-routed")
+def _create_duration_routed(config: VoiceRecognizerConfig) -> VoiceRecognizer:
+    routed_config = config["duration_routed"]
+    return DurationRoutedVoiceRecognizer(
+        [
+            ModelRoute(
+                route["max_duration_seconds"],
+                create_voice_recognizer(route["recognizer"]),
+            )
+            for route in routed_config["routes"]
+        ],
+        routed_config.get("max_duration_seconds"),
+    )
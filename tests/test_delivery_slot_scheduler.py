@@ -0,0 +1,117 @@
+import asyncio
+import datetime
+from pathlib import Path
+
+import pytest
+
+from money_saver_app.repository.recorder_repository import SchedulerLeaseRepository
+from money_saver_app.repository.sql_crud_repository import SQLCrudRepository
+from money_saver_app.service.scheduler.delivery_slot_scheduler import (
+    DeliverySlot,
+    DeliverySlotConfig,
+    DeliverySlotScheduler,
+)
+from money_saver_app.service.scheduler.leader_election import (
+    LeaderElection,
+    LeaderElectionConfig,
+)
+
+JOB_NAME = "digest"
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _utc(*args: int) -> datetime.datetime:
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc)
+
+
+async def _record(ran: list[tuple[datetime.date, int]], slot: DeliverySlot) -> None:
+    ran.append((slot.run_date, slot.index))
+
+
+def _passed_window_config() -> tuple[DeliverySlotConfig, datetime.date]:
+    """
+    A window of two slots that ended half an hour ago, so both slots are past whatever the seconds of the clock.
+    """
+    window_start = _now() - datetime.timedelta(minutes=90)
+    config = DeliverySlotConfig(
+        window_start_utc=window_start.strftime("%H:%M"), window_minutes=60, num_slots=2
+    )
+    return config, window_start.date()
+
+
+async def _run_for(scheduler: DeliverySlotScheduler, seconds: float) -> None:
+    task = asyncio.create_task(scheduler.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+def test_past_slots_are_those_of_the_last_started_window() -> None:
+    scheduler = DeliverySlotScheduler(
+        JOB_NAME,
+        DeliverySlotConfig(window_start_utc="16:00", window_minutes=120, num_slots=4),
+        lambda slot: _record([], slot),
+    )
+
+    during_window = scheduler.past_slots(_utc(2024, 1, 1, 16, 45))
+    assert [(slot.run_date, slot.index) for slot in during_window] == [
+        (datetime.date(2024, 1, 1), 0),
+        (datetime.date(2024, 1, 1), 1),
+    ]
+    # before today's window starts, the last one is yesterday's
+    before_window = scheduler.past_slots(_utc(2024, 1, 2, 3, 0))
+    assert [(slot.run_date, slot.index) for slot in before_window] == [
+        (datetime.date(2024, 1, 1), index) for index in range(4)
+    ]
+
+
+def test_slots_missed_while_down_are_run_on_start() -> None:
+    config, run_date = _passed_window_config()
+    ran: list[tuple[datetime.date, int]] = []
+    scheduler = DeliverySlotScheduler(JOB_NAME, config, lambda slot: _record(ran, slot))
+
+    asyncio.run(_run_for(scheduler, 0.2))
+
+    assert ran == [(run_date, 0), (run_date, 1)]
+
+
+@pytest.fixture
+def lease_repo(tmp_path: Path) -> SchedulerLeaseRepository:
+    return SchedulerLeaseRepository(
+        SQLCrudRepository.create_all_tables(f"sqlite:///{tmp_path / 'app.db'}")
+    )
+
+
+def test_slots_missed_before_a_takeover_are_run_by_the_new_leader(
+    lease_repo: SchedulerLeaseRepository,
+) -> None:
+    config, run_date = _passed_window_config()
+    election = LeaderElection(
+        JOB_NAME,
+        lease_repo,
+        LeaderElectionConfig(lease_seconds=30, renew_interval_seconds=0.05),
+    )
+    ran: list[tuple[datetime.date, int]] = []
+    scheduler = DeliverySlotScheduler(
+        JOB_NAME, config, lambda slot: _record(ran, slot), election
+    )
+
+    async def scenario() -> None:
+        task = asyncio.create_task(scheduler.run())
+        try:
+            await asyncio.sleep(0.2)
+            assert ran == []
+
+            # the previous leader died, this replica takes the lease over
+            await asyncio.to_thread(election._try_hold_lease)
+            await asyncio.sleep(0.2)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert ran == [(run_date, 0), (run_date, 1)]
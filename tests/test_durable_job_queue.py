@@ -0,0 +1,135 @@
+import multiprocessing
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from money_saver_app.repository.recorder_repository import JobRepository
+from money_saver_app.repository.sql_crud_repository import SQLCrudRepository
+from money_saver_app.service.job_queue.durable_job_queue import (
+    DurableJobQueue,
+    DurableJobQueueConfig,
+)
+
+QUEUE_NAME = "test"
+KIND = "record"
+CONFIG = DurableJobQueueConfig(
+    num_workers=1,
+    lease_seconds=0.5,
+    poll_interval_seconds=0.05,
+    max_attempts=3,
+    retry_backoff_seconds=0.05,
+    max_retry_backoff_seconds=0.1,
+    shutdown_timeout_seconds=1,
+)
+
+
+@pytest.fixture
+def url(tmp_path: Path) -> str:
+    return f"sqlite:///{tmp_path / 'jobs.db'}"
+
+
+def _wait_until(condition: Callable[[], bool], timeout_seconds: float = 10) -> None:
+    deadline = time.monotonic() + timeout_seconds
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("condition was not met in time")
+        time.sleep(0.05)
+
+
+def _run_worker_that_hangs(url: str, started: "multiprocessing.synchronize.Event") -> None:
+    """
+    A replica whose only worker takes the job and then never finishes it, until the process is killed.
+    """
+
+    def hang(payload: str) -> None:
+        started.set()
+        threading.Event().wait()
+
+    queue = DurableJobQueue(
+        QUEUE_NAME, JobRepository(SQLCrudRepository.create_all_tables(url)), CONFIG
+    )
+    queue.register_handler(KIND, hang)
+    queue.start()
+    threading.Event().wait()
+
+
+def test_job_of_a_killed_worker_is_reclaimed_and_finished(url: str) -> None:
+    repo = JobRepository(SQLCrudRepository.create_all_tables(url))
+    DurableJobQueue(QUEUE_NAME, repo, CONFIG).enqueue([(KIND, "payload")])
+
+    context = multiprocessing.get_context("spawn")
+    started = context.Event()
+    process = context.Process(target=_run_worker_that_hangs, args=(url, started))
+    process.start()
+    try:
+        assert started.wait(30)
+    finally:
+        process.kill()
+        process.join()
+
+    handled: list[str] = []
+    queue = DurableJobQueue(QUEUE_NAME, repo, CONFIG)
+    queue.register_handler(KIND, handled.append)
+    queue.start()
+    try:
+        _wait_until(lambda: repo.count_unfinished(QUEUE_NAME) == 0)
+    finally:
+        queue.shutdown()
+
+    assert handled == ["payload"]
+
+
+class FlakyJobRepository(JobRepository):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.failed_calls = 0
+
+    def _fail_once(self) -> None:
+        if self.failed_calls < 1:
+            self.failed_calls += 1
+            raise ConnectionError("database is gone")
+
+    def complete(self, id: uuid.UUID, worker_id: str) -> bool:
+        self._fail_once()
+        return super().complete(id, worker_id)
+
+
+def test_worker_survives_a_db_error_and_the_job_is_retried(url: str) -> None:
+    repo = FlakyJobRepository(SQLCrudRepository.create_all_tables(url))
+    handled: list[str] = []
+    queue = DurableJobQueue(QUEUE_NAME, repo, CONFIG)
+    queue.register_handler(KIND, handled.append)
+    queue.start()
+    try:
+        queue.enqueue([(KIND, "payload")])
+        _wait_until(lambda: repo.count_unfinished(QUEUE_NAME) == 0)
+        assert all(thread.is_alive() for thread in queue._threads)
+    finally:
+        queue.shutdown()
+
+    # the first outcome was lost with the DB error, the job ran again once its lease expired
+    assert handled == ["payload", "payload"]
+    assert repo.failed_calls == 1
+
+
+def test_metrics_report_the_wait_from_enqueue_to_lease(url: str) -> None:
+    repo = JobRepository(SQLCrudRepository.create_all_tables(url))
+    queue = DurableJobQueue(QUEUE_NAME, repo, CONFIG)
+    queue.register_handler(KIND, lambda payload: None)
+    queue.enqueue([(KIND, "payload")])
+    time.sleep(0.3)
+
+    queue.start()
+    try:
+        _wait_until(lambda: repo.count_unfinished(QUEUE_NAME) == 0)
+        metrics = queue.get_metrics()
+    finally:
+        queue.shutdown()
+
+    assert metrics["first_claims_in_process"] == 1
+    assert metrics["max_queue_wait_seconds"] >= 0.3
+    assert metrics["average_queue_wait_seconds"] == metrics["max_queue_wait_seconds"]
@@ -0,0 +1,162 @@
+import asyncio
+import datetime
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine
+from sqlmodel import Session
+
+from money_saver_app.repository.models import (
+    DeliveryStatus,
+    NotificationDelivery,
+    Role,
+    User,
+)
+from money_saver_app.repository.recorder_repository import (
+    NotificationDeliveryRepository,
+    SchedulerLeaseRepository,
+)
+from money_saver_app.repository.sql_crud_repository import SQLCrudRepository
+from money_saver_app.service.scheduler.leader_election import (
+    LeaderElection,
+    LeaderElectionConfig,
+)
+
+LEASE_NAME = "notify_all_users_with_self_transactions"
+NUM_INSTANCES = 3
+
+
+@pytest.fixture
+def engines(tmp_path: Path) -> list[Engine]:
+    """
+    One engine per application instance, all on the same SQLite file as replicas sharing one DB.
+    """
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    return [SQLCrudRepository.create_all_tables(url) for _ in range(NUM_INSTANCES)]
+
+
+def _create_elections(
+    engines: list[Engine], lease_seconds: float = 30
+) -> list[LeaderElection]:
+    config = LeaderElectionConfig(
+        lease_seconds=lease_seconds, renew_interval_seconds=0.05
+    )
+    return [
+        LeaderElection(LEASE_NAME, SchedulerLeaseRepository(engine), config)
+        for engine in engines
+    ]
+
+
+def _leaders(elections: list[LeaderElection]) -> list[LeaderElection]:
+    return [election for election in elections if election.is_leader]
+
+
+def _create_user(engine: Engine) -> int:
+    with Session(engine) as session:
+        user = User(
+            user_name="tester",
+            email="tester@example.com",
+            hashed_password="",
+            role=Role.User,
+        )
+        session.add(user)
+        session.commit()
+        assert user.id is not None
+        return user.id
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def test_exactly_one_instance_leads_and_another_takes_over_when_it_stops(
+    engines: list[Engine],
+) -> None:
+    # short enough that a renewal racing the cancellation can only delay the takeover
+    elections = _create_elections(engines, lease_seconds=0.5)
+
+    async def scenario() -> None:
+        tasks = [asyncio.create_task(election.run()) for election in elections]
+        try:
+            await asyncio.sleep(0.3)
+            (leader,) = _leaders(elections)
+            assert leader.fencing_token == 1
+
+            tasks[elections.index(leader)].cancel()
+            await asyncio.sleep(0.8)
+
+            (new_leader,) = _leaders(elections)
+            assert new_leader is not leader
+            assert new_leader.fencing_token == 2
+            assert await new_leader.is_current()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_lease_is_taken_over_once_a_dead_leader_lets_it_expire(
+    engines: list[Engine],
+) -> None:
+    elections = _create_elections(engines, lease_seconds=0.3)
+    for election in elections:
+        election._try_hold_lease()
+    (leader,) = _leaders(elections)
+
+    # the leader dies without releasing the lease, the others only take over once it expired
+    followers = [election for election in elections if election is not leader]
+    followers[0]._try_hold_lease()
+    assert not followers[0].is_leader
+
+    time.sleep(0.4)
+    assert not leader.is_leader
+    for election in followers:
+        election._try_hold_lease()
+
+    (new_leader,) = _leaders(followers)
+    assert new_leader.fencing_token == 2
+
+
+def test_delivery_write_with_a_stale_fencing_token_is_rejected(
+    engines: list[Engine],
+) -> None:
+    user_id = _create_user(engines[0])
+    old_leader, new_leader, _ = _create_elections(engines, lease_seconds=0.3)
+    old_leader._try_hold_lease()
+    old_fencing_token = old_leader.fencing_token
+    time.sleep(0.4)
+    new_leader._try_hold_lease()
+    new_fencing_token = new_leader.fencing_token
+    assert old_fencing_token == 1 and new_fencing_token == 2
+
+    delivery_id = uuid.uuid4()
+
+    def delivery(status: DeliveryStatus) -> NotificationDelivery:
+        return NotificationDelivery(
+            id=delivery_id,
+            job_name=LEASE_NAME,
+            run_key="2024-01-01",
+            user_id=user_id,
+            status=status,
+        )
+
+    new_repo = NotificationDeliveryRepository(engines[1])
+    assert (
+        new_repo.merge(
+            delivery(DeliveryStatus.Delivered), LEASE_NAME, new_fencing_token, _now()
+        )
+        is not None
+    )
+    # a write of the deposed leader that was already in flight when it lost the lease
+    assert (
+        NotificationDeliveryRepository(engines[0]).merge(
+            delivery(DeliveryStatus.Failed), LEASE_NAME, old_fencing_token, _now()
+        )
+        is None
+    )
+
+    assert new_repo.find_delivered_user_ids(LEASE_NAME, "2024-01-01") == {user_id}
@@ -0,0 +1,171 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Coroutine, TypeVar
+
+import pytest
+
+from money_saver_app.service.external.line.fake_line_api_server import (
+    FakeLineApiServer,
+    ScriptedResponse,
+)
+from money_saver_app.service.external.line.line_messaging_client import (
+    LineApiError,
+    LineMessagingClient,
+)
+from money_saver_app.service.external.line.line_models import LineTextSendMessage
+
+T = TypeVar("T")
+
+PUSH_PATH = "/v2/bot/message/push"
+REPLY_PATH = "/v2/bot/message/reply"
+
+
+def _call(client: LineMessagingClient, coroutine: Coroutine[Any, Any, T]) -> Awaitable[T]:
+    return asyncio.wrap_future(client.submit(coroutine))
+
+
+def _run_against_fake_server(
+    test: Callable[[FakeLineApiServer, LineMessagingClient], Awaitable[None]],
+    response_delay_seconds: float = 0,
+    **client_kwargs: Any,
+) -> FakeLineApiServer:
+    """
+    Runs `test` with the fake server on this thread's loop and the client on its own loop thread, as in production.
+    """
+    server = FakeLineApiServer(response_delay_seconds)
+
+    async def run() -> None:
+        await server.start()
+        client = LineMessagingClient(
+            "token",
+            api_base_url=server.base_url,
+            data_api_base_url=server.base_url,
+            retry_backoff_seconds=0.01,
+            **client_kwargs,
+        )
+        try:
+            await test(server, client)
+        finally:
+            await asyncio.get_running_loop().run_in_executor(None, client.close)
+            await server.close()
+
+    asyncio.run(run())
+    return server
+
+
+def test_push_is_retried_on_429_and_5xx_with_the_same_retry_key() -> None:
+    async def test(server: FakeLineApiServer, client: LineMessagingClient) -> None:
+        server.script(PUSH_PATH, ScriptedResponse(429), ScriptedResponse(503))
+        await _call(client, client.push_message("U1", LineTextSendMessage(text="hi")))
+
+    server = _run_against_fake_server(test)
+
+    requests = server.requests_to(PUSH_PATH)
+    assert len(requests) == 3
+    assert len({request.headers["X-Line-Retry-Key"] for request in requests}) == 1
+    assert requests[-1].json == {
+        "to": "U1",
+        "messages": [{"type": "text", "text": "hi"}],
+    }
+
+
+def test_request_fails_after_max_retries() -> None:
+    async def test(server: FakeLineApiServer, client: LineMessagingClient) -> None:
+        server.script(PUSH_PATH, *[ScriptedResponse(500)] * 3)
+        with pytest.raises(LineApiError) as error_info:
+            await _call(client, client.push_message("U1", LineTextSendMessage(text="hi")))
+        assert error_info.value.status == 500
+
+    server = _run_against_fake_server(test, max_retries=2)
+
+    assert len(server.requests_to(PUSH_PATH)) == 3
+
+
+def test_client_errors_are_not_retried() -> None:
+    async def test(server: FakeLineApiServer, client: LineMessagingClient) -> None:
+        server.script(REPLY_PATH, ScriptedResponse(400))
+        with pytest.raises(LineApiError) as error_info:
+            await _call(client, client.reply_message("token", LineTextSendMessage(text="hi")))
+        assert error_info.value.status == 400
+
+    server = _run_against_fake_server(test)
+
+    assert len(server.requests_to(REPLY_PATH)) == 1
+
+
+def test_retry_after_is_honoured() -> None:
+    async def test(server: FakeLineApiServer, client: LineMessagingClient) -> None:
+        server.script(PUSH_PATH, ScriptedResponse(429, headers={"Retry-After": "1"}))
+        await _call(client, client.push_message("U1", LineTextSendMessage(text="hi")))
+
+    server = _run_against_fake_server(test)
+
+    first, second = server.requests_to(PUSH_PATH)
+    assert second.received_at - first.received_at >= 1
+
+
+def test_retry_after_above_the_cap_fails_without_waiting() -> None:
+    async def test(server: FakeLineApiServer, client: LineMessagingClient) -> None:
+        server.script(PUSH_PATH, ScriptedResponse(429, headers={"Retry-After": "3600"}))
+        started_at = time.monotonic()
+        with pytest.raises(LineApiError) as error_info:
+            await _call(client, client.push_message("U1", LineTextSendMessage(text="hi")))
+        assert error_info.value.status == 429
+        assert time.monotonic() - started_at < 5
+
+    server = _run_against_fake_server(test, max_retry_delay_seconds=5)
+
+    assert len(server.requests_to(PUSH_PATH)) == 1
+
+
+def test_push_accepted_by_an_earlier_attempt_is_not_an_error() -> None:
+    async def test(server: FakeLineApiServer, client: LineMessagingClient) -> None:
+        # the first attempt reached LINE but its response was lost, the retry with the same key gets a 409
+        server.script(PUSH_PATH, ScriptedResponse(503), ScriptedResponse(409))
+        await _call(
+            client,
+            client.push_message("U1", LineTextSendMessage(text="hi"), retry_key="key-1"),
+        )
+
+    server = _run_against_fake_server(test)
+
+    assert [
+        request.headers["X-Line-Retry-Key"] for request in server.requests_to(PUSH_PATH)
+    ] == ["key-1", "key-1"]
+
+
+def test_reply_is_not_retried_on_5xx() -> None:
+    async def test(server: FakeLineApiServer, client: LineMessagingClient) -> None:
+        server.script(REPLY_PATH, ScriptedResponse(503))
+        with pytest.raises(LineApiError) as error_info:
+            await _call(client, client.reply_message("token", LineTextSendMessage(text="hi")))
+        assert error_info.value.status == 503
+
+    server = _run_against_fake_server(test)
+
+    assert len(server.requests_to(REPLY_PATH)) == 1
+
+
+def test_reply_is_not_retried_after_a_timeout() -> None:
+    async def test(server: FakeLineApiServer, client: LineMessagingClient) -> None:
+        # the reply may have reached LINE, its token can not be used twice
+        with pytest.raises(asyncio.TimeoutError):
+            await _call(client, client.reply_message("token", LineTextSendMessage(text="hi")))
+
+    server = _run_against_fake_server(test, response_delay_seconds=1, timeout_seconds=0.2)
+
+    assert len(server.requests_to(REPLY_PATH)) == 1
+
+
+def test_push_is_retried_after_a_timeout_with_the_same_retry_key() -> None:
+    async def test(server: FakeLineApiServer, client: LineMessagingClient) -> None:
+        with pytest.raises(asyncio.TimeoutError):
+            await _call(client, client.push_message("U1", LineTextSendMessage(text="hi")))
+
+    server = _run_against_fake_server(
+        test, response_delay_seconds=1, timeout_seconds=0.2, max_retries=2
+    )
+
+    requests = server.requests_to(PUSH_PATH)
+    assert len(requests) == 3
+    assert len({request.headers["X-Line-Retry-Key"] for request in requests}) == 1
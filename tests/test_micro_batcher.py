@@ -0,0 +1,30 @@
+import threading
+from concurrent.futures import Future
+
+from money_saver_app.service.concurrency.micro_batcher import MicroBatcher
+
+
+def test_batches_are_collected_only_when_a_batch_slot_is_free() -> None:
+    release_first_batch = threading.Event()
+    batches: list[list[int]] = []
+
+    def handle_batch(items: list[int]) -> list[int]:
+        batches.append(items)
+        if len(batches) == 1:
+            release_first_batch.wait(10)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher[int, int](
+        "test", handle_batch, max_batch_size=8, max_wait_ms=0, max_concurrent_batches=1
+    )
+    first = batcher.submit(0)
+    while not batches:
+        threading.Event().wait(0.01)
+
+    # queued while the only batch slot is taken, so they are handed over as one batch afterwards
+    backlog: list[Future[int]] = [batcher.submit(item) for item in range(1, 6)]
+    release_first_batch.set()
+
+    assert first.result(10) == 0
+    assert [future.result(10) for future in backlog] == [2, 4, 6, 8, 10]
+    assert batches == [[0], [1, 2, 3, 4, 5]]
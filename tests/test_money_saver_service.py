@@ -0,0 +1,261 @@
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+from unittest.mock import create_autospec
+
+import pytest
+from sqlalchemy import Engine, event
+from sqlmodel import Session
+
+from money_saver_app.repository.models import Role, User
+from money_saver_app.repository.recorder_repository import (
+    ItemCategoryRejectionRepository,
+    PipelineCheckpointRepository,
+    ProcessedEventRepository,
+    TransactionRepository,
+    UserRepository,
+)
+from money_saver_app.repository.sql_crud_repository import SQLCrudRepository
+from money_saver_app.service.money_saver.error_code import (
+    BackendOverloadedError,
+    PipelineCheckpointNotFoundError,
+    ResumablePipelineError,
+)
+from money_saver_app.service.money_saver.item_category_memory import (
+    ItemCategoryMemory,
+)
+from money_saver_app.service.money_saver.money_saver_service import MoneySaverService
+from money_saver_app.service.money_saver.transaction_service import TransactionService
+from money_saver_app.service.money_saver.transaction_view_parser import (
+    TransactionViewParser,
+)
+from money_saver_app.service.money_saver.view_model_common import (
+    ExpenseCategory,
+    TransactionType,
+)
+from money_saver_app.service.money_saver.views import (
+    TransactionItemView,
+    TransactionView,
+)
+from money_saver_app.service.pipeline_service.pipeline_checkpoint_service import (
+    PipelineCheckpointConfig,
+    PipelineCheckpointService,
+)
+from money_saver_app.service.pipeline_service.pipeline_impls.pipeline_factory import (
+    TextPipelineFactory,
+    VoicePipelineFactory,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer_impl.mock_voice_recognizer import (
+    MockVoiceRecognizer,
+)
+from smart_base_model.llm.large_language_model_base import LargeLanguageModelBase
+
+CHECKPOINT_CONFIG = PipelineCheckpointConfig(
+    ttl_seconds=600, max_attempts=2, retry_backoff_seconds=0
+)
+
+ParseResult = Union[list[TransactionView], Exception]
+
+
+class ScriptedTransactionViewParser(TransactionViewParser):
+    """
+    Answers `parse` from a script instead of the LLM; once the script is used up every text parses into one view.
+    """
+
+    def __init__(self, *results: ParseResult) -> None:
+        self.results = list(results)
+        self.calls = 0
+        self.before_parse: Optional[Callable[[], None]] = None
+
+    def parse(self, source_text: str) -> list[TransactionView]:
+        self.calls += 1
+        if self.before_parse is not None:
+            self.before_parse()
+        result = self.results.pop(0) if self.results else _views(source_text)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _views(name: str, count: int = 1) -> list[TransactionView]:
+    return [
+        TransactionView(
+            transaction_type=TransactionType.Expense,
+            amount=60,
+            item=TransactionItemView(
+                name=f"{name}-{index}" if count > 1 else name,
+                description="",
+                item_category=ExpenseCategory.Dining,
+            ),
+        )
+        for index in range(count)
+    ]
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Engine:
+    # a file, so that concurrent sessions see each other's commits and locks as on a real DB
+    return SQLCrudRepository.create_all_tables(f"sqlite:///{tmp_path / 'app.db'}")
+
+
+@pytest.fixture
+def user_id(engine: Engine) -> int:
+    with Session(engine) as session:
+        user = User(
+            user_name="tester",
+            email="tester@example.com",
+            hashed_password="",
+            role=Role.User,
+        )
+        session.add(user)
+        session.commit()
+        assert user.id is not None
+        return user.id
+
+
+@pytest.fixture
+def transaction_service(engine: Engine) -> TransactionService:
+    return TransactionService(
+        engine,
+        UserRepository(engine),
+        TransactionRepository(engine),
+        ItemCategoryMemory(),
+        ItemCategoryRejectionRepository(engine),
+    )
+
+
+def _create_service(
+    engine: Engine,
+    transaction_service: TransactionService,
+    parser: TransactionViewParser,
+) -> MoneySaverService:
+    unused: Any = None
+    return MoneySaverService(
+        engine,
+        VoicePipelineFactory(),
+        TextPipelineFactory(),
+        unused,
+        transaction_service,
+        create_autospec(LargeLanguageModelBase, instance=True),
+        parser,
+        MockVoiceRecognizer(""),
+        PipelineCheckpointService(
+            PipelineCheckpointRepository(engine), CHECKPOINT_CONFIG
+        ),
+        ProcessedEventRepository(engine),
+    )
+
+
+def _fail_into_checkpoint(
+    service: MoneySaverService, user_id: int
+) -> ResumablePipelineError:
+    with pytest.raises(ResumablePipelineError) as error_info:
+        service.execute_text_pipeline("咖啡60", user_id)
+    return error_info.value
+
+
+def _count_statements(engine: Engine) -> list[str]:
+    statements: list[str] = []
+
+    def record(_connection: Any, _cursor: Any, statement: str, *_: Any) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    return statements
+
+
+def _count_transactions(transaction_service: TransactionService, user_id: int) -> int:
+    return len(
+        transaction_service.get_all_transactions_by_user_id(user_id, 100).transactions
+    )
+
+
+def test_failed_run_is_checkpointed_and_resumed_once(
+    engine: Engine, transaction_service: TransactionService, user_id: int
+) -> None:
+    overloaded = BackendOverloadedError("llm")
+    parser = ScriptedTransactionViewParser(overloaded, overloaded)
+    service = _create_service(engine, transaction_service, parser)
+
+    error = _fail_into_checkpoint(service, user_id)
+
+    checkpoint = service.checkpoint_service.load_checkpoint(error.run_id, user_id)
+    assert checkpoint.source_text == "咖啡60"
+    assert checkpoint.attempts == 1
+    assert _count_transactions(transaction_service, user_id) == 0
+
+    context = service.resume_pipeline(error.run_id, user_id)
+
+    assert context.is_saved
+    assert _count_transactions(transaction_service, user_id) == 1
+    with pytest.raises(PipelineCheckpointNotFoundError):
+        service.resume_pipeline(error.run_id, user_id)
+    assert _count_transactions(transaction_service, user_id) == 1
+
+
+def test_checkpoint_of_another_user_is_not_resumed(
+    engine: Engine, transaction_service: TransactionService, user_id: int
+) -> None:
+    overloaded = BackendOverloadedError("llm")
+    service = _create_service(
+        engine,
+        transaction_service,
+        ScriptedTransactionViewParser(overloaded, overloaded),
+    )
+    error = _fail_into_checkpoint(service, user_id)
+
+    with pytest.raises(PipelineCheckpointNotFoundError):
+        service.resume_pipeline(error.run_id, user_id + 1)
+
+
+def test_concurrent_resumes_save_the_transactions_once(
+    engine: Engine, transaction_service: TransactionService, user_id: int
+) -> None:
+    overloaded = BackendOverloadedError("llm")
+    parser = ScriptedTransactionViewParser(overloaded, overloaded)
+    service = _create_service(engine, transaction_service, parser)
+    error = _fail_into_checkpoint(service, user_id)
+
+    # both resumes have loaded the checkpoint and parsed the text before either commits
+    both_parsing = threading.Barrier(2)
+    parser.before_parse = lambda: both_parsing.wait(10)
+    outcomes: list[Union[bool, Exception]] = []
+
+    def resume() -> None:
+        try:
+            outcomes.append(service.resume_pipeline(error.run_id, user_id).is_saved)
+        except Exception as resume_error:
+            outcomes.append(resume_error)
+
+    threads = [threading.Thread(target=resume) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert True in outcomes
+    (failure,) = [outcome for outcome in outcomes if outcome is not True]
+    assert isinstance(failure, PipelineCheckpointNotFoundError)
+    assert _count_transactions(transaction_service, user_id) == 1
+
+
+@pytest.mark.parametrize("count", [1, 5])
+def test_text_pipeline_saves_a_message_in_three_statements(
+    engine: Engine, transaction_service: TransactionService, user_id: int, count: int
+) -> None:
+    service = _create_service(
+        engine,
+        transaction_service,
+        ScriptedTransactionViewParser(_views("咖啡", count)),
+    )
+    event_id = uuid.uuid4()
+    statements = _count_statements(engine)
+
+    context = service.execute_text_pipeline("咖啡60", user_id, event_id=event_id)
+
+    assert len(context.transaction_reads) == count
+    # one batched insert per table: the items, the transactions and the processed event
+    assert len(statements) == 3
+    assert all(statement.startswith("INSERT") for statement in statements)
+    assert service.is_event_processed(event_id)
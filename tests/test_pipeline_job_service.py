@@ -0,0 +1,49 @@
+import io
+import threading
+from typing import Any, cast
+
+from money_saver_app.service.money_saver.money_saver_service import MoneySaverService
+from money_saver_app.service.pipeline_service.pipeline_job_service import (
+    PipelineJobConfig,
+    PipelineJobService,
+    PipelineJobStatus,
+)
+
+USER_ID = 1
+CONFIG = PipelineJobConfig(
+    executor={"max_workers": 1, "max_queue_size": 2, "shutdown_timeout_seconds": 0.1},
+    max_jobs_per_user=3,
+    result_ttl_seconds=60,
+)
+
+
+class BlockingMoneySaverService:
+    def __init__(self) -> None:
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def execute_voice_pipeline(self, voice_audio: Any, user_id: int) -> Any:
+        self.started.set()
+        self.release.wait(10)
+        raise RuntimeError("released")
+
+
+def test_jobs_cancelled_by_shutdown_fail_and_close_their_audio() -> None:
+    money_saver_service = BlockingMoneySaverService()
+    service = PipelineJobService(cast(MoneySaverService, money_saver_service), CONFIG)
+    running_buffer, queued_buffer = io.BytesIO(b"running"), io.BytesIO(b"queued")
+
+    service.submit_voice_job(running_buffer, USER_ID)
+    assert money_saver_service.started.wait(10)
+    queued_job = service.submit_voice_job(queued_buffer, USER_ID)
+    try:
+        service.shutdown()
+
+        cancelled = service.get_job(queued_job.id, USER_ID)
+        assert cancelled.status is PipelineJobStatus.Failed
+        assert cancelled.error is not None and str(queued_job.id) in cancelled.error
+        assert queued_buffer.closed
+        assert service.get_metrics()["users_with_unfinished_jobs"] == 1
+    finally:
+        money_saver_service.release.set()
+
@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import pytest
+
+from money_saver_app.service.concurrency.single_flight import SingleFlight
+
+NUM_CALLERS = 16
+KEY = SingleFlight.hash_key("咖啡60")
+
+
+class CountingBackend:
+    """
+    Blocks every call until `release` is set, so that all callers are in flight at the same time.
+    """
+
+    def __init__(self, error: Optional[Exception] = None) -> None:
+        self.calls = 0
+        self.error = error
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self) -> list[str]:
+        with self._lock:
+            self.calls += 1
+        self.release.wait(10)
+        if self.error is not None:
+            raise self.error
+        return ["咖啡", "60"]
+
+
+def _call_concurrently(
+    single_flight: SingleFlight[list[str]], backend: CountingBackend
+) -> list[object]:
+    arrived = threading.Semaphore(0)
+
+    def call() -> object:
+        arrived.release()
+        try:
+            return single_flight.do(KEY, backend)
+        except Exception as error:
+            return error
+
+    with ThreadPoolExecutor(max_workers=NUM_CALLERS) as executor:
+        futures = [executor.submit(call) for _ in range(NUM_CALLERS)]
+        for _ in range(NUM_CALLERS):
+            arrived.acquire()
+        # every caller has reached `do` while the first call is still blocked in the backend
+        time.sleep(0.2)
+        backend.release.set()
+        return [future.result() for future in futures]
+
+
+def test_concurrent_identical_calls_reach_the_backend_once() -> None:
+    single_flight = SingleFlight[list[str]]("test")
+    backend = CountingBackend()
+
+    results = _call_concurrently(single_flight, backend)
+
+    assert backend.calls == 1
+    assert results == [["咖啡", "60"]] * NUM_CALLERS
+    # the leader's result object is shared by every caller
+    assert len({id(result) for result in results}) == 1
+    assert single_flight._in_flight == {}
+
+
+def test_exception_reaches_every_caller_and_the_key_is_cleared() -> None:
+    single_flight = SingleFlight[list[str]]("test")
+    error = ConnectionError("llm is down")
+    backend = CountingBackend(error)
+
+    results = _call_concurrently(single_flight, backend)
+
+    assert backend.calls == 1
+    assert all(result is error for result in results)
+    assert single_flight._in_flight == {}
+
+    # nothing is cached, the next call reaches the backend again
+    backend.error = None
+    assert single_flight.do(KEY, backend) == ["咖啡", "60"]
+    assert backend.calls == 2
+
+
+def test_calls_with_different_keys_are_not_coalesced() -> None:
+    single_flight = SingleFlight[str]("test")
+
+    assert single_flight.do("a", lambda: "a") == "a"
+    assert single_flight.do("b", lambda: "b") == "b"
+    with pytest.raises(KeyError):
+        single_flight.do("c", lambda: {}["c"])
+    assert single_flight._in_flight == {}
@@ -0,0 +1,139 @@
+import io
+import wave
+
+import numpy as np
+import numpy.typing as npt
+import pytest
+
+from money_saver_app.service.money_saver.error_code import (
+    AudioTooLongError,
+    NoSpeechDetectedError,
+)
+from money_saver_app.service.voice_recognizer.local_voice_recognizer import (
+    LocalVoiceRecognizer,
+)
+from money_saver_app.service.voice_recognizer.streaming_transcriber import (
+    StreamingTranscriber,
+    StreamingTranscriptionConfig,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer import (
+    PCM_SAMPLE_RATE,
+    AudioSource,
+    VoiceRecognizer,
+)
+from money_saver_app.service.voice_recognizer.voice_recognizer_impl.mock_voice_recognizer import (
+    MockVoiceRecognizer,
+)
+
+CONFIG = StreamingTranscriptionConfig(
+    partial_interval_seconds=0.5, window_seconds=2, max_duration_seconds=10
+)
+
+
+class RecordingVoiceRecognizer(MockVoiceRecognizer):
+    def __init__(self, text: str) -> None:
+        super().__init__(text)
+        self.calls: list[tuple[str, npt.NDArray[np.float32]]] = []
+
+    def recognize_samples(self, samples: npt.NDArray[np.float32]) -> str:
+        self.calls.append(("samples", samples))
+        return super().recognize_samples(samples)
+
+    def recognize_partial(self, samples: npt.NDArray[np.float32]) -> str:
+        self.calls.append(("partial", samples))
+        return super().recognize_samples(samples)
+
+
+class CountingLocalVoiceRecognizer(LocalVoiceRecognizer):
+    def __init__(self) -> None:
+        super().__init__({"model_name": "counting"})
+        self.transcribed = 0
+
+    def _transcribe(self, samples: npt.NDArray[np.float32]) -> str:
+        self.transcribed += 1
+        return "partial"
+
+
+def _pcm16(duration_seconds: float) -> tuple[npt.NDArray[np.float32], bytes]:
+    time = np.arange(int(duration_seconds * PCM_SAMPLE_RATE)) / PCM_SAMPLE_RATE
+    pcm16 = (np.sin(2 * np.pi * 220 * time) * 16000).astype("<i2")
+    return pcm16.astype(np.float32) / 32768.0, pcm16.tobytes()
+
+
+def _append_in_chunks(
+    transcriber: StreamingTranscriber, data: bytes, chunk_size: int
+) -> None:
+    for offset in range(0, len(data), chunk_size):
+        transcriber.append(data[offset : offset + chunk_size])
+
+
+def test_chunks_split_inside_a_sample_are_reassembled() -> None:
+    recognizer = RecordingVoiceRecognizer("咖啡60")
+    transcriber = StreamingTranscriber(recognizer, CONFIG)
+    expected_samples, data = _pcm16(1)
+
+    _append_in_chunks(transcriber, data, 333)
+
+    assert transcriber.duration_seconds == pytest.approx(1)
+    assert transcriber.finish() == "咖啡60"
+    (kind, samples), = recognizer.calls
+    assert kind == "samples"
+    np.testing.assert_array_equal(samples, expected_samples)
+
+
+def test_interim_windows_are_transcribed_as_partials() -> None:
+    recognizer = RecordingVoiceRecognizer("咖啡60")
+    transcriber = StreamingTranscriber(recognizer, CONFIG)
+    _, data = _pcm16(0.6)
+
+    _append_in_chunks(transcriber, data, 1024)
+
+    assert transcriber.should_emit_partial()
+    assert transcriber.transcribe_partial() == "咖啡60"
+    assert not transcriber.should_emit_partial()
+    assert [kind for kind, _ in recognizer.calls] == ["partial"]
+
+
+def test_full_windows_are_committed_with_recognize_samples() -> None:
+    recognizer = RecordingVoiceRecognizer("咖啡60")
+    transcriber = StreamingTranscriber(recognizer, CONFIG)
+    _, data = _pcm16(2.5)
+    _append_in_chunks(transcriber, data, 4096)
+
+    assert transcriber.transcribe_partial() == "咖啡60"
+    _append_in_chunks(transcriber, _pcm16(0.5)[1], 4096)
+
+    assert transcriber.finish() == "咖啡60 咖啡60"
+    assert [kind for kind, _ in recognizer.calls] == ["samples", "samples"]
+
+
+def test_streams_longer_than_the_limit_are_rejected() -> None:
+    transcriber = StreamingTranscriber(MockVoiceRecognizer("咖啡60"), CONFIG)
+
+    with pytest.raises(AudioTooLongError):
+        _append_in_chunks(transcriber, _pcm16(11)[1], 32000)
+
+
+def test_partials_bypass_transcription_cache_and_silence_trimming() -> None:
+    recognizer = CountingLocalVoiceRecognizer()
+    silence = np.zeros(PCM_SAMPLE_RATE, dtype=np.float32)
+
+    assert recognizer.recognize_partial(silence) == "partial"
+    assert recognizer.recognize_partial(silence) == "partial"
+
+    assert recognizer.transcribed == 2
+    assert recognizer.transcription_cache.get_stats()["memory_entries"] == 0
+    with pytest.raises(NoSpeechDetectedError):
+        recognizer.recognize_samples(silence)
+
+
+def test_recognize_samples_defaults_to_recognize_with_a_wav_file() -> None:
+    class FileOnlyVoiceRecognizer(VoiceRecognizer):
+        def recognize(self, audio: AudioSource) -> str:
+            assert isinstance(audio, bytes)
+            with wave.open(io.BytesIO(audio), "rb") as wav_file:
+                return f"{wav_file.getframerate()}:{wav_file.getnframes()}"
+
+    samples, _ = _pcm16(0.25)
+
+    assert FileOnlyVoiceRecognizer().recognize_samples(samples) == "16000:4000"
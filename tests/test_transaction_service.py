@@ -0,0 +1,105 @@
+from typing import Any
+
+import pytest
+from sqlalchemy import Engine, event
+from sqlmodel import Session
+
+from money_saver_app.repository.models import Role, User
+from money_saver_app.repository.recorder_repository import (
+    ItemCategoryRejectionRepository,
+    TransactionRepository,
+    UserRepository,
+)
+from money_saver_app.repository.sql_crud_repository import SQLCrudRepository
+from money_saver_app.service.money_saver.error_code import UserNotFoundError
+from money_saver_app.service.money_saver.item_category_memory import (
+    ItemCategoryMemory,
+)
+from money_saver_app.service.money_saver.transaction_service import TransactionService
+from money_saver_app.service.money_saver.view_model_common import (
+    ExpenseCategory,
+    TransactionType,
+)
+from money_saver_app.service.money_saver.views import (
+    TransactionItemView,
+    TransactionView,
+)
+
+
+@pytest.fixture
+def engine() -> Engine:
+    return SQLCrudRepository.create_all_tables("sqlite://")
+
+
+@pytest.fixture
+def transaction_service(engine: Engine) -> TransactionService:
+    return TransactionService(
+        engine,
+        UserRepository(engine),
+        TransactionRepository(engine),
+        ItemCategoryMemory(),
+        ItemCategoryRejectionRepository(engine),
+    )
+
+
+@pytest.fixture
+def user_id(engine: Engine) -> int:
+    with Session(engine) as session:
+        user = User(
+            user_name="tester",
+            email="tester@example.com",
+            hashed_password="",
+            role=Role.User,
+        )
+        session.add(user)
+        session.commit()
+        assert user.id is not None
+        return user.id
+
+
+def _create_views(count: int) -> list[TransactionView]:
+    return [
+        TransactionView(
+            transaction_type=TransactionType.Expense,
+            amount=10 * (index + 1),
+            item=TransactionItemView(
+                name=f"item-{index}",
+                description="",
+                item_category=ExpenseCategory.Dining,
+            ),
+        )
+        for index in range(count)
+    ]
+
+
+def _count_statements(engine: Engine) -> list[str]:
+    statements: list[str] = []
+
+    def record(_connection: Any, _cursor: Any, statement: str, *_: Any) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    return statements
+
+
+@pytest.mark.parametrize("count", [1, 5, 20])
+def test_save_transaction_views_issues_one_insert_per_table(
+    engine: Engine, transaction_service: TransactionService, user_id: int, count: int
+) -> None:
+    statements = _count_statements(engine)
+
+    reads = transaction_service.save_transaction_views(user_id, _create_views(count))
+
+    assert len(reads) == count
+    inserts = [statement for statement in statements if statement.startswith("INSERT")]
+    assert len(inserts) == 2
+    assert not [statement for statement in statements if statement.startswith("SELECT")]
+
+
+def test_save_transaction_views_rejects_unknown_user(
+    engine: Engine, transaction_service: TransactionService
+) -> None:
+    with pytest.raises(UserNotFoundError):
+        transaction_service.save_transaction_views(404, _create_views(2))
+
+    assert transaction_service.get_all_transactions_by_user_id(404, 10).is_empty_set
@@ -0,0 +1,113 @@
+import os
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+import pytest
+
+from money_saver_app.service.money_saver.error_code import NoSpeechDetectedError
+from money_saver_app.service.voice_recognizer.audio_decoder import (
+    WHISPER_SAMPLE_RATE,
+    decode_audio,
+)
+from money_saver_app.service.voice_recognizer.voice_activity import trim_silence
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _seconds(duration_seconds: float) -> npt.NDArray[np.float64]:
+    return np.arange(int(duration_seconds * WHISPER_SAMPLE_RATE)) / WHISPER_SAMPLE_RATE
+
+
+def _noise(duration_seconds: float, level: float, seed: int = 0) -> npt.NDArray[np.float32]:
+    generator = np.random.default_rng(seed)
+    return (generator.standard_normal(_seconds(duration_seconds).shape[0]) * level).astype(
+        np.float32
+    )
+
+
+def _syllables(duration_seconds: float) -> npt.NDArray[np.float32]:
+    """
+    A voiced, speech-like signal: a 150 Hz harmonic tone gated into ~4 syllables per second.
+    """
+    time = _seconds(duration_seconds)
+    tone = sum(np.sin(2 * np.pi * 150 * harmonic * time) / harmonic for harmonic in range(1, 6))
+    envelope = np.clip(np.sin(2 * np.pi * 2 * time), 0, None)
+    return (0.2 * tone * envelope).astype(np.float32)
+
+
+def _silence(duration_seconds: float) -> npt.NDArray[np.float32]:
+    return np.zeros(_seconds(duration_seconds).shape[0], dtype=np.float32)
+
+
+def _noise_only() -> npt.NDArray[np.float32]:
+    return _noise(3, 0.05)
+
+
+def _loud_noise_only() -> npt.NDArray[np.float32]:
+    return _noise(3, 0.3)
+
+
+def _mains_hum() -> npt.NDArray[np.float32]:
+    return (0.1 * np.sin(2 * np.pi * 60 * _seconds(3))).astype(np.float32)
+
+
+def _click_in_noise() -> npt.NDArray[np.float32]:
+    samples = _noise(3, 0.002)
+    samples[WHISPER_SAMPLE_RATE : WHISPER_SAMPLE_RATE + 160] = 0.8
+    return samples
+
+
+def _digital_silence() -> npt.NDArray[np.float32]:
+    return _silence(3)
+
+
+def _speech_between_silence() -> npt.NDArray[np.float32]:
+    return np.concatenate([_silence(2), _syllables(1.5), _silence(2)])
+
+
+def _speech_in_noise() -> npt.NDArray[np.float32]:
+    return np.concatenate([_silence(1), _syllables(2), _silence(1)]) + _noise(4, 0.003)
+
+
+def _speech_without_silence() -> npt.NDArray[np.float32]:
+    return _syllables(3)
+
+
+@pytest.mark.parametrize(
+    "create_samples",
+    [_noise_only, _loud_noise_only, _mains_hum, _click_in_noise, _digital_silence],
+)
+def test_trim_silence_rejects_clips_without_speech(
+    create_samples: Callable[[], npt.NDArray[np.float32]]
+) -> None:
+    with pytest.raises(NoSpeechDetectedError):
+        trim_silence(create_samples())
+
+
+@pytest.mark.parametrize(
+    "create_samples",
+    [_speech_between_silence, _speech_in_noise, _speech_without_silence],
+)
+def test_trim_silence_keeps_speech(
+    create_samples: Callable[[], npt.NDArray[np.float32]]
+) -> None:
+    samples = create_samples()
+
+    trimmed = trim_silence(samples)
+
+    assert 0.5 * WHISPER_SAMPLE_RATE < trimmed.shape[0] <= samples.shape[0]
+
+
+def test_trim_silence_drops_leading_and_trailing_silence() -> None:
+    trimmed = trim_silence(_speech_between_silence())
+
+    # 1.5s of speech plus at most 200ms of padding on each side
+    assert trimmed.shape[0] <= 1.9 * WHISPER_SAMPLE_RATE
+
+
+def test_trim_silence_keeps_recorded_voice_note() -> None:
+    with open(os.path.join(REPOSITORY_ROOT, "test_audio.mp3"), "rb") as file:
+        samples = decode_audio(file.read())
+
+    assert trim_silence(samples).shape[0] > 0